@@ -24,8 +24,13 @@ django.setup()
 # Importa dopo aver inizializzato Django
 from backend.game.routing import websocket_urlpatterns
 from backend.middleware import JWTAuthMiddlewareStack
+from backend.game.game_drain import install_drain_signal_handler
+from backend.game.game_watchdog import LoopWatchdogMiddleware
 
-application = ProtocolTypeRouter({
+# SIGUSR1 (STOPSIGNAL del container) avvia il drain del worker fin dall'avvio
+install_drain_signal_handler()
+
+application = LoopWatchdogMiddleware(ProtocolTypeRouter({
     "http": get_asgi_application(),
     "websocket": AllowedHostsOriginValidator(
         JWTAuthMiddlewareStack(
@@ -34,5 +39,4 @@ application = ProtocolTypeRouter({
             )
         )
     ),
-})
-
+}))
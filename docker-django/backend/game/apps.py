@@ -3,4 +3,9 @@ from django.apps import AppConfig
 class PongConfig(AppConfig):
 	default_auto_field = 'django.db.models.BigAutoField'
 	name = 'backend.game'
-	label = 'game'
\ No newline at end of file
+	label = 'game'
+
+	def ready(self):
+		# Il logger del gioco lascia passare i livelli richiesti da categorie e buffer per stanza
+		from .game_logging import configure_game_logger
+		configure_game_logger()
@@ -2,18 +2,39 @@ import json
 import uuid
 import logging
 import asyncio
-import math 
 import random
 import datetime
+import functools
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from asgiref.sync import sync_to_async
+from django.conf import settings
 from backend.game.game_utils import create_new_game_session
+from backend.game.game_clock import FixedTimestepClock
+from backend.game.game_scheduler import get_scheduler
+from backend.game.game_physics import move_paddle, step_ball, REFERENCE_TICK_RATE, NO_GOAL, GOAL_LEFT
+from backend.game.game_snapshots import SnapshotHistory
+from backend.game.game_inputs import SIDES, InputMailbox
+from backend.game.game_state import RoomState
+from backend.game.game_ratelimit import InboundRateLimiter
+from backend.game.game_replay import ReplayRecorder, restore_state
+from backend.game.game_checkpoint import CheckpointWriter, checkpoint_state, get_checkpoint_store, player_id
+from backend.game.game_drain import MIGRATE_CLOSE_CODE
+from backend.game.game_timers import get_timing_wheel
+from backend.game.game_metrics import TICK_BALL, TICK_NOTIFY, TICK_PADDLES, timed_group_send, track_socket, untrack_socket
+from backend.game.game_logging import RoomEventLog, bind_room, unbind_room
+from backend.game.game_spectators import SpectatorBroadcaster
+from backend.game.game_registry import get_room_host
+from backend.game.game_protocol import BINARY_SUBPROTOCOL, encode_snapshot, dumps, loads
 import time
 
 # WebSockets, un protocollo che consente la comunicazione bidirezionale a bassa latenza.
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+
+# Secondi prima di rimuovere la stanza di una partita finita
+ROOM_EXPIRY_SECONDS = 3
+# Chiusura delle connessioni di una stanza scaduta (attesa o conferma "pronto")
+ROOM_EXPIRED_CLOSE_CODE = 4008
 
 from asgiref.sync import sync_to_async
 
@@ -35,7 +56,7 @@ def create_game_session(game_id, player1_scope, player2_scope):
 
 	existing = GameSession.objects.filter(game_id=game_id).first()
 	if existing:
-		logger.warning(f"[CREATE SESSION] Sessione già esistente per game_id: {game_id}")
+		logger.warning("[CREATE SESSION] Sessione già esistente per game_id: %s", game_id)
 		return existing
 
 	try:
@@ -45,10 +66,10 @@ def create_game_session(game_id, player1_scope, player2_scope):
 			player2=player2_user,
 			status="active"
 		)
-		logger.info(f"[CREATE SESSION] Salvata sessione: {session}")
+		logger.info("[CREATE SESSION] Salvata sessione: %s", session)
 		return session
 	except IntegrityError as e:
-		logger.error(f"[CREATE SESSION] Errore di integrità: {e}")
+		logger.error("[CREATE SESSION] Errore di integrità: %s", e)
 		return None
 
 # Funzioni helper per la gestione dello stato utente
@@ -107,6 +128,7 @@ class UserStatusConsumer(AsyncJsonWebsocketConsumer):
 		
 		# Accetta la connessione WebSocket
 		await self.accept()
+		track_socket(self, "status")
 		# logger.info(f"[USER STATUS] Connessione accettata per {user.username}")
 		
 		# Aggiungi l'utente al gruppo per ricevere aggiornamenti sullo stato
@@ -131,7 +153,8 @@ class UserStatusConsumer(AsyncJsonWebsocketConsumer):
 				# logger.info(f"[USER STATUS] Utente {user.username} (ID: {user.id}) impostato come ONLINE")
 				
 				# Invia un aggiornamento a tutti gli utenti connessi sullo stato di questo utente
-				await self.channel_layer.group_send(
+				await timed_group_send(
+					self.channel_layer,
 					"user_status",
 					{
 						"type": "status_update",
@@ -154,7 +177,8 @@ class UserStatusConsumer(AsyncJsonWebsocketConsumer):
 		# Invia anche la lista completa degli utenti online a tutti i client
 		# Questo assicura che tutti abbiano una visione consistente
 		online_users = await get_online_users()
-		await self.channel_layer.group_send(
+		await timed_group_send(
+			self.channel_layer,
 			"user_status",
 			{
 				"type": "send_online_users",
@@ -163,6 +187,7 @@ class UserStatusConsumer(AsyncJsonWebsocketConsumer):
 		)
 
 	async def disconnect(self, close_code):
+		untrack_socket(self)
 		user = self.scope["user"]
 		if user.is_authenticated:
 			# Rimuovi questa connessione dall'utente
@@ -184,7 +209,8 @@ class UserStatusConsumer(AsyncJsonWebsocketConsumer):
 					# logger.info(f"[USER STATUS] Utente {user.username} (ID: {user.id}) impostato come OFFLINE - nessuna connessione attiva")
 					
 					# Invia un aggiornamento a tutti gli utenti connessi
-					await self.channel_layer.group_send(
+					await timed_group_send(
+						self.channel_layer,
 						"user_status",
 						{
 							"type": "status_update",
@@ -197,7 +223,8 @@ class UserStatusConsumer(AsyncJsonWebsocketConsumer):
 					# Invia anche la lista completa degli utenti online a tutti i client
 					# dopo che questo utente è stato disconnesso
 					online_users = await get_online_users()
-					await self.channel_layer.group_send(
+					await timed_group_send(
+						self.channel_layer,
 						"user_status",
 						{
 							"type": "send_online_users",
@@ -247,7 +274,8 @@ class UserStatusConsumer(AsyncJsonWebsocketConsumer):
 			online_users = await get_online_users()
 			
 			# Invia la lista a tutti i client connessi nel gruppo
-			await self.channel_layer.group_send(
+			await timed_group_send(
+				self.channel_layer,
 				"user_status",
 				{
 					"type": "send_online_users",
@@ -268,25 +296,21 @@ class UserStatusConsumer(AsyncJsonWebsocketConsumer):
 		})
 
 class Game: ## Definisco la classe, il costruttore accetta un game_id opzionale.
-	def __init__(self, game_id=None, channel_layer=None): # si potrebbe usare la var. (object)
+	def __init__(self, game_id=None, channel_layer=None, tick_rate=None): # si potrebbe usare la var. (object)
 		if game_id:
 			try:
 				self.game_id = uuid.UUID(str(game_id))  # Converte in stringa prima di creare UUID
-				logger.info(f"[GAME] Utilizzo del game_id fornito: {self.game_id}")
+				logger.info("[GAME] Utilizzo del game_id fornito: %s", self.game_id)
 			except ValueError:
 				self.game_id = uuid.uuid4() # Genera un nuovo game_id casuale se game_id non è valido.
-				logger.warning(f"[GAME] game_id fornito non valido, generato nuovo game_id: {self.game_id}")
+				logger.warning("[GAME] game_id fornito non valido, generato nuovo game_id: %s", self.game_id)
 		else:
 			self.game_id = uuid.uuid4() # game_id == null
-			logger.info(f"[GAME] game_id non fornito, generato nuovo game_id: {self.game_id}")
+			logger.info("[GAME] game_id non fornito, generato nuovo game_id: %s", self.game_id)
 
 		self.players = [] # Inizializza una lista vuota per memorizzare i websocket dei giocatori.
-		self.state = { # Inizializza lo stato del gioco con posizioni, velocità e punteggi iniziali.
-			"ball_position": {"x": 0.5, "y": 0.5},
-			"ball_velocity": {"x": 0.01, "y": 0.01},
-			"paddles": {"left": 0.5, "right": 0.5},
-			"scores": {"left": 0, "right": 0},
-		}
+		# Stato della simulazione (palla, paddle, punteggi), modificato sul posto a ogni tick
+		self.state = RoomState()
 		
 		# Inizializza la variabile game_started a False all'inizio
 		self.game_started = False
@@ -304,6 +328,17 @@ class Game: ## Definisco la classe, il costruttore accetta un game_id opzionale.
 		self.player1 = None  # Controlla il paddle di sinistra
 		self.player2 = None  # Controlla il paddle di destra
 
+		# Membri della stanza che ricevono gli snapshot. Con il registro delle
+		# stanze tutti i membri sono consumer di questo processo (i client degli
+		# altri worker arrivano tramite i consumer proxy), quindi li ricevono
+		# direttamente, senza passare dal channel layer.
+		self.local_members = []
+		# Stanza creata senza lease (registro non disponibile): altri worker
+		# possono avere membri nello stesso gruppo, gli snapshot passano dal
+		# channel layer (group_send) invece della consegna diretta
+		self.shared_group = False
+		self.instance_id = uuid.uuid4().hex  # Distingue questa stanza da omonime su altri worker
+
 		# Inizializza lo stato di connessione dei giocatori
 		self.player1_connected = False
 		self.player2_connected = False
@@ -321,8 +356,61 @@ class Game: ## Definisco la classe, il costruttore accetta un game_id opzionale.
 		self.paddle_movements = {"left": 0, "right": 0}  # -1 per su, 0 per fermo, 1 per giù
 		self.paddle_speed = 0.012  # Velocità di movimento dei paddle (normalizzata e ridotta per maggiore controllo)
 		
-		# Aumenta la frequenza di aggiornamento
-		self.update_interval = 1/120  # 120 FPS per movimento più fluido
+		# Frequenza di simulazione (settings.GAME_TICK_RATE, 120 Hz di default).
+		# Le collisioni continue permettono 60 o 30 Hz con lo stesso gameplay:
+		# ogni passo copre `step_scale` tick di riferimento
+		self.update_interval = 1 / (tick_rate or getattr(settings, "GAME_TICK_RATE", REFERENCE_TICK_RATE))
+
+		# Clock a passo fisso: numero di tick simulati e contatori di ritardo
+		self.clock = FixedTimestepClock(self.update_interval, max_catchup_ticks=5)
+		self.tick = 0
+		self.error_count = 0
+
+		# Frequenza di broadcast separata da quella di simulazione: uno snapshot
+		# ogni `snapshot_every` tick, oppure subito dopo un evento (gol, servizio)
+		self.tick_rate = round(1 / self.update_interval)
+		self.step_scale = REFERENCE_TICK_RATE / self.tick_rate
+		self.snapshot_every = max(1, round(self.tick_rate / getattr(settings, "GAME_SNAPSHOT_RATE", 30)))
+		self.last_snapshot_tick = 0
+		self.snapshot_pending = False
+		# Ultimi snapshot inviati, baseline per i frame delta
+		self.snapshots = SnapshotHistory()
+		# Frame già serializzati per l'ultimo snapshot: { baseline: testo JSON / "binary": bytes }
+		self._frame_cache_snapshot = None
+		self._frame_cache = {}
+
+		# Pausa prima del servizio, contata in tick di simulazione: il loop
+		# continua a girare (e i paddle a muoversi) mentre la palla è ferma
+		self.serve_delay_ticks = round(0.8 * self.tick_rate)
+		self.serve_ticks = 0
+
+		# Ultimo numero di sequenza di input elaborato per lato, rimandato negli
+		# snapshot per la predizione e la riconciliazione lato client
+		self.input_seq = {"left": 0, "right": 0}
+		# Input ricevuti dai consumer, applicati al prossimo tick
+		self.inputs = InputMailbox()
+		# Log recenti della stanza non scritti, riportati solo in caso di errore (vedi game_logging)
+		self.events = RoomEventLog(self.game_id)
+
+		# Generatore casuale della stanza: con il seed registrato nel replay la
+		# partita è riproducibile tick per tick
+		self.seed = None
+		self.rng = random.Random()
+		self.replay = None  # ReplayRecorder della partita in corso
+
+		# Checkpoint per la ripresa dopo un crash del worker (vedi game_checkpoint)
+		self.checkpoints = None  # CheckpointWriter della partita in corso
+		self.checkpoint_every = max(1, round(self.tick_rate * getattr(settings, "GAME_CHECKPOINT_SECONDS", 1)))
+		self.last_checkpoint_tick = 0
+		self.checkpoint_pending = False
+		self.restore_checked = False
+		# Stanza ricostruita da un checkpoint: posti riservati agli utenti della
+		# partita interrotta, che riprende quando entrambi sono tornati
+		self.resume_pending = False
+		self.resume_players = {}
+
+		# Spettatori in sola lettura, serviti da un flusso separato a frequenza ridotta
+		self.spectators = SpectatorBroadcaster(self, rate=getattr(settings, "GAME_SPECTATOR_RATE", 10))
 
 		# Aggiungi variabili per la gestione della velocità come in game_local.js
 		self.base_ball_speed = 0.005  # Equivalente a ballSpeed = 5 ma normalizzato per coordinate 0-1
@@ -332,6 +420,9 @@ class Game: ## Definisco la classe, il costruttore accetta un game_id opzionale.
 		self.player1_ready = False
 		self.player2_ready = False
 
+		# Scadenze della stanza sulla timing wheel del processo: { tipo: Timer }
+		self.timers = {}
+
 	async def is_active_player(self, player):
 		try:
 			await player.send_json({"type": "ping"})
@@ -340,36 +431,34 @@ class Game: ## Definisco la classe, il costruttore accetta un game_id opzionale.
 			return False
 	
 	async def start_game(self):
-		import random
-
 		# Verifica che ci siano entrambi i giocatori
 		if not self.player1 or not self.player2:
-			logger.warning(f"[GAME] Impossibile avviare la partita {self.game_id} - Mancano giocatori.")
+			logger.warning("[GAME] Impossibile avviare la partita %s - Mancano giocatori.", self.game_id)
 			return False
 
-		# Reset lo stato del gioco
-		self.state = {
-			"ball_position": {"x": 0.5, "y": 0.5},
-			"ball_velocity": {"x": 0.01, "y": 0.01},
-			"paddles": {"left": 0.5, "right": 0.5},
-			"scores": {"left": 0, "right": 0},
-		}
+		# Reset lo stato del gioco, con un nuovo seed per la partita
+		self.reset_match(random.getrandbits(32))
+
+		# Gli input arrivati prima dell'avvio non valgono per la nuova partita
+		self.inputs.clear()
 
 		# Imposta il gioco come avviato
 		self.game_started = True
-		logger.info(f"[GAME] Partita {self.game_id} avviata.")
-		logger.info(f"[GAME] Game started with ID: {self.game_id}")
+		self.update_lobby_timers()
+		logger.info("[GAME] Partita %s avviata.", self.game_id)
+		logger.info("[GAME] Game started with ID: %s", self.game_id)
 
-		# Soft reset palla all'avvio con direzione casuale
-		await self.soft_reset_ball(scored_left=random.choice([True, False]))
+		# Registrazione del replay della partita
+		self.start_replay()
+		self.start_checkpoints()
 
 		# Salva la sessione
 		try:
-			logger.info(f"[CREATE SESSION] Creo sessione per game_id: {self.game_id}")
+			logger.info("[CREATE SESSION] Creo sessione per game_id: %s", self.game_id)
 			if self.player1 and "user" in self.player1.scope:
-				logger.info(f"[CREATE SESSION] player1: {self.player1.scope['user']}")
+				logger.info("[CREATE SESSION] player1: %s", self.player1.scope['user'])
 			else:
-				logger.info(f"[CREATE SESSION] player1: None o utente non autenticato")
+				logger.info("[CREATE SESSION] player1: None o utente non autenticato")
 				
 			await create_game_session(
 				self.game_id,
@@ -377,47 +466,272 @@ class Game: ## Definisco la classe, il costruttore accetta un game_id opzionale.
 				self.player2.scope if self.player2 else None
 			)
 		except Exception as e:
-			logger.error(f"[CREATE SESSION] Errore durante la creazione della sessione: {e}")
+			logger.error("[CREATE SESSION] Errore durante la creazione della sessione: %s", e)
 			import traceback
 			logger.error(traceback.format_exc())
 
-		# 🚀 Avvia il game loop in un task separato
+		# 🚀 Registra la stanza nello scheduler condiviso del processo
 		try:
-			asyncio.create_task(self.update_game_loop())
+			self.error_count = 0
+			get_scheduler().add_room(self)
 			logger.info("[LOOP] Game loop avviato dopo start_game")
 			return True
 		except Exception as e:
-			logger.error(f"[LOOP] Errore nell'avvio del game loop: {e}")
+			logger.error("[LOOP] Errore nell'avvio del game loop: %s", e)
 			import traceback
 			logger.error(traceback.format_exc())
 			self.game_started = False
 			return False
 
+	def reset_match(self, seed):
+		"""Stato iniziale della partita; con lo stesso seed i servizi sono identici (replay)."""
+		self.seed = seed
+		self.rng = random.Random(seed)
+		self.state.reset()
+		# Soft reset palla all'avvio con direzione casuale
+		self.soft_reset_ball(scored_left=self.rng.choice([True, False]))
+
+	def set_timer(self, kind, delay, callback, *args):
+		"""(Ri)programma il timer `kind` della stanza."""
+		self.cancel_timer(kind)
+		self.timers[kind] = get_timing_wheel().schedule(delay, callback, *args, kind=kind)
+
+	def cancel_timer(self, kind):
+		timer = self.timers.pop(kind, None)
+		if timer is not None:
+			timer.cancel()
+
+	def has_timer(self, kind):
+		timer = self.timers.get(kind)
+		return timer is not None and timer.active
+
+	def update_lobby_timers(self):
+		"""Scadenze della sala d'attesa: avversario che non arriva o conferma "pronto" che non arriva."""
+		if self.game_started:
+			self.cancel_timer("waiting")
+			self.cancel_timer("ready")
+		elif self.player1 and self.player2:
+			self.cancel_timer("waiting")
+			if not self.has_timer("ready"):
+				self.set_timer("ready", getattr(settings, "GAME_READY_TIMEOUT_SECONDS", 60), self.expire, "ready_timeout")
+		else:
+			self.cancel_timer("ready")
+			if not self.has_timer("waiting"):
+				self.set_timer("waiting", getattr(settings, "GAME_WAITING_TIMEOUT_SECONDS", 300), self.expire, "waiting_timeout")
+
+	def close_room(self):
+		"""Rimuove la stanza da GameConsumer.game_rooms e ne annulla le scadenze (non i tempi di grazia)."""
+		for kind in ("waiting", "ready", "expiry"):
+			self.cancel_timer(kind)
+		for room_group_name, room in list(GameConsumer.game_rooms.items()):
+			if room is self:
+				del GameConsumer.game_rooms[room_group_name]
+				logger.info("[CLEANUP] Stanza %s rimossa", room_group_name)
+
+	async def expire(self, reason):
+		"""Stanza scaduta prima dell'inizio della partita: avvisa e chiude le connessioni, poi la rimuove."""
+		if self.game_started:
+			return
+		logger.info("[CLEANUP] Stanza %s scaduta: %s", self.game_id, reason)
+		members = [p for p in (self.player1, self.player2) if p]
+		self.close_room()
+		for member in members:
+			try:
+				await member.send_json({"type": "room_expired", "reason": reason})
+				await member.close(code=ROOM_EXPIRED_CLOSE_CODE)
+			except Exception as e:
+				logger.warning("[CLEANUP] Chiusura della connessione fallita: %s", e)
+		await self.spectators.close(ROOM_EXPIRED_CLOSE_CODE, {"type": "room_expired", "reason": reason})
+
+	async def end_room(self):
+		"""Pulizia dopo la fine della partita: chiude gli spettatori e rimuove la stanza."""
+		await self.spectators.close(ROOM_EXPIRED_CLOSE_CODE)
+		self.close_room()
+
+	def start_checkpoints(self):
+		"""Attiva i checkpoint della partita se settings.GAME_CHECKPOINT_STORE è configurato."""
+		store = get_checkpoint_store()
+		self.checkpoints = CheckpointWriter(store, self.game_id) if store is not None else None
+		self.checkpoint_pending = True
+
+	def maybe_checkpoint(self):
+		if self.checkpoints is None:
+			return
+		if self.checkpoint_pending or self.tick - self.last_checkpoint_tick >= self.checkpoint_every:
+			self.checkpoint_pending = False
+			self.last_checkpoint_tick = self.tick
+			self.checkpoints.submit(checkpoint_state(self))
+
+	async def discard_checkpoint(self):
+		"""Partita finita o abbandonata: il checkpoint non deve più essere ripreso."""
+		if self.checkpoints is not None:
+			checkpoints, self.checkpoints = self.checkpoints, None
+			await checkpoints.discard()
+
+	async def ensure_restored(self):
+		"""Al primo ingresso nella stanza carica l'eventuale checkpoint di una partita interrotta."""
+		async with self.lock:
+			if self.restore_checked:
+				return
+			self.restore_checked = True
+			store = get_checkpoint_store()
+			if store is None:
+				return
+			try:
+				checkpoint = await store.load(self.game_id)
+			except Exception as e:
+				logger.warning("[CHECKPOINT] Lettura fallita per la partita %s: %s", self.game_id, e)
+				return
+			if checkpoint and checkpoint.get("game_started"):
+				self.restore_checkpoint(checkpoint)
+
+	def restore_checkpoint(self, checkpoint):
+		"""Ricostruisce la partita dal checkpoint; riparte con resume_game()."""
+		restore_state(self, checkpoint)
+		# La pausa di servizio è contata in tick della frequenza salvata
+		self.serve_ticks = round(self.serve_ticks * self.tick_rate / checkpoint["tick_rate"])
+		self.input_seq = {"left": checkpoint["input_seq"][0], "right": checkpoint["input_seq"][1]}
+		self.resume_players = {"left": checkpoint["players"][0], "right": checkpoint["players"][1]}
+		self.resume_pending = True
+		self.last_snapshot_tick = self.last_checkpoint_tick = self.tick
+		logger.info("[CHECKPOINT] Partita %s ricostruita al tick %s (%s-%s)", self.game_id, self.tick, self.state.score_left, self.state.score_right)
+
+	async def suspend(self):
+		"""
+		Sospende la partita in corso per una migrazione: checkpoint finale e
+		posti riservati ai giocatori attuali. Riprende con resume_game().
+		"""
+		if not self.game_started:
+			return False
+		async with self.lock:
+			self.game_started = False
+			self.resume_pending = True
+			self.resume_players = {"left": player_id(self.player1), "right": player_id(self.player2)}
+			checkpoint = checkpoint_state(self)
+			checkpoint["game_started"] = True
+		if self.checkpoints is not None:
+			checkpoints, self.checkpoints = self.checkpoints, None
+			checkpoints.submit(checkpoint)
+			await checkpoints.flush()
+		logger.info("[CHECKPOINT] Partita %s sospesa al tick %s", self.game_id, self.tick)
+		return True
+
+	def release_seat(self, consumer):
+		"""Libera il posto di `consumer` senza toccare lo stato della partita."""
+		self.remove_member(consumer)
+		if consumer is self.player1:
+			self.player1 = None
+		elif consumer is self.player2:
+			self.player2 = None
+		self.players = [self.player1, self.player2]
+
+	def can_take_seat(self, consumer, side):
+		"""In una partita ripresa il posto spetta all'utente che lo occupava."""
+		expected = self.resume_players.get(side)
+		if expected is None:
+			return True
+		user = consumer.scope.get("user")
+		return user is not None and user.is_authenticated and user.pk == expected
+
+	async def resume_game(self):
+		"""Riprende dal checkpoint la partita interrotta, quando entrambi i giocatori sono tornati."""
+		self.resume_pending = False
+		self.resume_players = {}
+		self.inputs.clear()
+		self.paddle_movements = {"left": 0, "right": 0}
+		self.player1_ready = self.player2_ready = True
+		self.game_started = True
+		self.update_lobby_timers()
+		self.cancel_timer("reconnect_left")
+		self.cancel_timer("reconnect_right")
+		self.snapshot_pending = True
+		self.resume_replay()
+		self.start_checkpoints()
+		logger.info("[CHECKPOINT] Partita %s ripresa dal tick %s", self.game_id, self.tick)
+
+		await timed_group_send(
+			self.channel_layer,
+			f"game_{self.game_id}",
+			{
+				"type": "game_start",
+				"player1_name": getattr(self.player1.scope.get("user", None), "username", "Player 1"),
+				"player2_name": getattr(self.player2.scope.get("user", None), "username", "Player 2"),
+				"resumed": True,
+			}
+		)
+		self.error_count = 0
+		get_scheduler().add_room(self)
+
+	def start_replay(self, resumed=False):
+		"""Apre il replay della partita se settings.GAME_REPLAY_RECORDING è attivo."""
+		self.close_replay()
+		if not getattr(settings, "GAME_REPLAY_RECORDING", False):
+			return
+		# Il file viene aperto dal thread di scrittura dei replay: un errore di I/O
+		# disattiva solo la registrazione (vedi ReplayRecorder)
+		self.replay = ReplayRecorder.for_room(self, settings.GAME_REPLAY_DIR, resumed=resumed)
+
+	def resume_replay(self):
+		"""
+		Partita ripresa da un checkpoint: lo stato del generatore casuale non è
+		nel checkpoint, quindi la ripresa usa un nuovo seed registrato nel replay.
+		"""
+		self.seed = random.getrandbits(32)
+		self.rng = random.Random(self.seed)
+		self.start_replay(resumed=True)
+
+	def close_replay(self):
+		if self.replay is not None:
+			on_closed = None
+			# Archivio colonnare per la riproduzione in streaming, costruito fuori
+			# dal loop quando il file del replay è completo
+			if getattr(settings, "GAME_REPLAY_COLUMNAR", False):
+				from backend.game.game_replay_store import build_replay_store_in_background
+				on_closed = functools.partial(build_replay_store_in_background, self.replay.path)
+			self.replay.close(self, on_closed)
+			logger.info("[REPLAY] Replay della partita %s chiuso in %s (%s record)", self.game_id, self.replay.path, self.replay.records)
+			self.replay = None
+
 	async def add_player(self, consumer):
 		"""Aggiunge un nuovo giocatore alla partita."""
 		if consumer in self.players:
 			logger.warning("[GAME] Questo giocatore è già nella partita.")
 			return False  # ❗️
 
-		if not self.player1:
+		if not self.player1 and self.can_take_seat(consumer, "left"):
 			self.player1 = consumer
 			self.player1_connected = True
 			consumer.side = "left"
 			logger.info("[GAME] Giocatore 1 aggiunto.")
-		elif not self.player2:
+		elif not self.player2 and self.can_take_seat(consumer, "right"):
 			self.player2 = consumer
 			self.player2_connected = True
 			consumer.side = "right"
 			logger.info("[GAME] Giocatore 2 aggiunto.")
 		else:
-			logger.warning(f"[GAME] La partita {self.game_id} è già piena.")
+			logger.warning("[GAME] La partita %s è già piena.", self.game_id)
 			return False  # ❗️
 
 		self.players = [self.player1, self.player2]  # Aggiorna sempre la lista
 		return True  # ✅
 	
+	def add_member(self, consumer):
+		"""Registra un consumer locale come destinatario degli snapshot."""
+		if consumer not in self.local_members:
+			self.local_members.append(consumer)
+
+	def remove_member(self, consumer):
+		if consumer in self.local_members:
+			self.local_members.remove(consumer)
+
+	def acknowledge_input(self, side, seq):
+		"""Registra l'ultimo input elaborato per `side` (i numeri di sequenza vanno solo avanti)."""
+		if isinstance(seq, int) and not isinstance(seq, bool) and seq > self.input_seq[side]:
+			self.input_seq[side] = seq
+
 	async def remove_player(self, consumer):
 		"""Rimuove un giocatore dalla partita."""
+		self.remove_member(consumer)
 		self.game_started = False
 		if consumer == self.player1:
 			self.player1 = None
@@ -432,249 +746,313 @@ class Game: ## Definisco la classe, il costruttore accetta un game_id opzionale.
 		else:
 			consumer.side = "right"
 	
-	# Aggiornamento del gioco:
-	async def update_game_loop(self):
-		logger.info("[LOOP] Game loop avviato")
-		error_count = 0
-		
+	# Aggiornamento del gioco (invocato dallo scheduler condiviso):
+	def is_running(self):
+		return any(self.players) and self.game_started
+
+	async def run_due_ticks(self):
+		"""Simula i tick scaduti sul clock della stanza e notifica i client."""
+		token = bind_room(self.events)
 		try:
-			while any(self.players) and self.game_started:
-				try:
-					await asyncio.sleep(self.update_interval)
-					
-					async with self.lock:
-						# Aggiorna la posizione dei paddle in base al movimento
-						await self.update_paddles()
-						# Aggiorna la posizione della palla
-						await self.update_ball()
-						# Notifica i client dello stato aggiornato
-						await self.notify_players()
-					
-					# Reset contatore errori se l'aggiornamento va a buon fine
-					error_count = 0
-					
-				except Exception as e:
-					error_count += 1
-					logger.error(f"[LOOP] Errore #{error_count} nel game loop: {e}")
-					
-					if error_count >= 5:
-						logger.error("[LOOP] Troppi errori consecutivi, terminazione del loop")
+			due = self.clock.due_ticks()
+			if not due:
+				return
+
+			async with self.lock:
+				# Recupera i tick persi (fino al limite del clock)
+				for _ in range(due):
+					if not self.game_started:
 						break
-					
-					await asyncio.sleep(0.1)
+					await self.step()
+				# Notifica i client se è il momento di un nuovo snapshot
+				await self.maybe_notify()
+
+			# Reset contatore errori se l'aggiornamento va a buon fine
+			self.error_count = 0
+
 		except Exception as e:
-			logger.error(f"[LOOP] Errore fatale nel game loop: {e}")
-			import traceback
-			logger.error(traceback.format_exc())
+			self.error_count += 1
+			logger.error("[LOOP] Errore #%s nel game loop: %s", self.error_count, e)
+
+			if self.error_count >= 5:
+				logger.error("[LOOP] Troppi errori consecutivi, terminazione del loop")
+				import traceback
+				logger.error(traceback.format_exc())
+				self.game_started = False
+			else:
+				# Riparte dal tick corrente senza recuperare i tick persi
+				self.clock.start()
 		finally:
-			logger.info("[LOOP] Game loop terminato")
-			self.game_started = False
+			unbind_room(token)
+
+	def on_loop_stopped(self):
+		"""Chiamato dallo scheduler quando la stanza esce dal loop condiviso."""
+		if self.clock.overruns:
+			logger.info("[LOOP] Partita %s: %s ritardi, %s tick scartati", self.game_id, self.clock.overruns, self.clock.skipped_ticks)
+		logger.info("[LOOP] Game loop terminato")
+		self.game_started = False
+		self.close_replay()
+
+	async def step(self):
+		"""
+		Avanza la simulazione di un tick a passo fisso. È il percorso dei tick
+		dal vivo: solo qui i tempi delle fasi finiscono su /metrics (replay e
+		benchmark usano simulate_tick).
+		"""
+		started = time.perf_counter()
+		self.advance_paddles()
+		paddles_done = time.perf_counter()
+		TICK_PADDLES.observe(paddles_done - started)
+		goal = self.advance_ball()
+		TICK_BALL.observe(time.perf_counter() - paddles_done)
+		if goal != NO_GOAL:
+			await self.on_goal(goal)
+
+	def simulate_tick(self):
+		"""Parte deterministica di un tick (input, paddle, palla). Restituisce l'esito della palla."""
+		self.advance_paddles()
+		return self.advance_ball()
+
+	def advance_paddles(self):
+		"""Inizio del tick: applica gli input arrivati dall'ultimo tick e muove i paddle."""
+		self.tick += 1
+		self.apply_inputs()
+		self.update_paddles()
+
+	def advance_ball(self):
+		"""Fine del tick: muove la palla, ferma durante la pausa di servizio."""
+		if self.advance_serve():
+			return NO_GOAL
+		return self.update_ball()
+
+	def apply_inputs(self):
+		"""Applica gli input in attesa nella casella (al confine di tick)."""
+		for side, pending in self.inputs.drain():
+			if self.replay is not None:
+				self.replay.record_input(self.tick, side, pending)
+			if pending["movement"] is not None:
+				self.paddle_movements[side] = pending["movement"]
+			if pending["position"] is not None:
+				self.state.set_paddle(side, pending["position"])
+			self.acknowledge_input(side, pending["seq"])
+
+	@property
+	def paddle_step(self):
+		"""Spostamento dei paddle per tick a passo fisso (indipendente dal carico del loop)."""
+		return self.paddle_speed * self.update_interval * 60  # Normalizza per 60 FPS
 	
-	async def update_paddles(self):
+	def update_paddles(self):
 		"""Aggiorna la posizione dei paddle in base ai movimenti"""
-		paddle_height = 0.2  # Altezza normalizzata del paddle
-		
-		# Calcola il delta time per movimento uniforme
-		current_time = time.time()
-		if not hasattr(self, 'last_update_time'):
-			self.last_update_time = current_time
-		delta_time = current_time - self.last_update_time
-		self.last_update_time = current_time
-		
-		# Calcola lo spostamento in base al delta time
-		movement_amount = self.paddle_speed * delta_time * 60  # Normalizza per 60 FPS
-		
-		# Aggiorna paddle sinistro
-		if self.paddle_movements["left"] != 0:
-			current_pos = self.state["paddles"]["left"]
-			new_pos = current_pos + (self.paddle_movements["left"] * movement_amount)
-			self.state["paddles"]["left"] = max(0.0, min(1.0 - paddle_height, new_pos))
-			
-		# Aggiorna paddle destro
-		if self.paddle_movements["right"] != 0:
-			current_pos = self.state["paddles"]["right"]
-			new_pos = current_pos + (self.paddle_movements["right"] * movement_amount)
-			self.state["paddles"]["right"] = max(0.0, min(1.0 - paddle_height, new_pos))
-
-	async def soft_reset_ball(self, scored_left=False):
-		import math
-		import random
+		state = self.state
+		paddle_step = self.paddle_step
+		state.paddle_left = move_paddle(state.paddle_left, self.paddle_movements["left"], paddle_step)
+		state.paddle_right = move_paddle(state.paddle_right, self.paddle_movements["right"], paddle_step)
+
+	def advance_serve(self):
+		"""Consuma un tick della pausa di servizio. Restituisce True se la palla è ancora ferma."""
+		if self.serve_ticks <= 0:
+			return False
+		self.serve_ticks -= 1
+		return True
 
-		self.state["ball_position"] = {"x": 0.5, "y": 0.5}
+	def soft_reset_ball(self, scored_left=False):
+		self.state.ball_x = 0.5
+		self.state.ball_y = 0.5
 		self.current_multiplier = self.base_ball_speed  # Reset del moltiplicatore alla velocità base
 
 		direction = 1 if scored_left else -1
-		y_sign = random.choice([-1, 1])
+		y_sign = self.rng.choice([-1, 1])
 
 		# Imposta la velocità iniziale come in game_local.js
-		self.state["ball_velocity"] = {
-			"x": direction * self.base_ball_speed,
-			"y": y_sign * self.base_ball_speed
+		self.state.ball_vx = direction * self.base_ball_speed
+		self.state.ball_vy = y_sign * self.base_ball_speed
+
+		# La palla riparte dopo la pausa di servizio; la rimessa in gioco va
+		# trasmessa al prossimo confine di tick, senza attendere lo snapshot
+		self.serve_ticks = self.serve_delay_ticks
+		self.snapshot_pending = True
+
+	def update_ball(self):
+		"""Avanza la palla di un tick. Restituisce l'esito (NO_GOAL, GOAL_LEFT, GOAL_RIGHT)."""
+		state = self.state
+		x, y, vx, vy, self.current_multiplier, goal = step_ball(
+			state.ball_x,
+			state.ball_y,
+			state.ball_vx,
+			state.ball_vy,
+			self.current_multiplier,
+			state.paddle_left,
+			state.paddle_right,
+			self.paddle_positions["left"],
+			self.paddle_positions["right"],
+			self.step_scale,
+		)
+		if goal == NO_GOAL:
+			# Aggiorna lo stato sul posto
+			state.ball_x = x
+			state.ball_y = y
+			state.ball_vx = vx
+			state.ball_vy = vy
+		return goal
+
+	def score_goal(self, goal):
+		"""Assegna il punto e rimette in gioco la palla."""
+		scored_left = goal == GOAL_LEFT
+		self.state.add_point("left" if scored_left else "right")
+		self.soft_reset_ball(scored_left=scored_left)
+		if self.replay is not None:
+			self.replay.keyframe(self)
+
+	async def on_goal(self, goal):
+		"""Assegna il punto, rimette in gioco la palla e verifica la fine partita."""
+		self.score_goal(goal)
+		self.checkpoint_pending = True
+		await self.check_game_over()
+
+	async def maybe_notify(self):
+		"""Invia uno snapshot se è scaduto l'intervallo di broadcast o c'è un evento in sospeso."""
+		if self.replay is not None:
+			self.replay.maybe_keyframe(self)
+		self.maybe_checkpoint()
+		if self.snapshot_pending or self.tick - self.last_snapshot_tick >= self.snapshot_every:
+			started = time.perf_counter()
+			await self.notify_players()
+			TICK_NOTIFY.observe(time.perf_counter() - started)
+
+	def build_snapshot(self):
+		"""
+		Snapshot dello stato corrente nelle unità del canvas del client (1000x500).
+		È una vista costruita solo alla frequenza di broadcast, non a ogni tick:
+		la cronologia degli snapshot (baseline dei delta) ne tiene un riferimento.
+		"""
+		state = self.state
+		# Durante la pausa di servizio la palla è ferma: velocità nulla, così il
+		# client non la estrapola lungo la direzione del servizio
+		speed = 0 if self.serve_ticks > 0 else REFERENCE_TICK_RATE
+		return {
+			"tick": self.tick,
+			"serverTime": time.time() * 1000,  # ms
+			"ballX": state.ball_x * 1000,  # Scale to canvas size
+			"ballY": state.ball_y * 500,
+			# Velocità della palla in px/s per l'estrapolazione lato client
+			"ballVX": state.ball_vx * speed * 1000,
+			"ballVY": state.ball_vy * speed * 500,
+			"paddle1Y": state.paddle_left * 500,
+			"paddle2Y": state.paddle_right * 500,
+			"player1Score": state.score_left,
+			"player2Score": state.score_right,
+			# Ultimo input di ciascun giocatore già incluso in questo stato
+			"player1Seq": self.input_seq["left"],
+			"player2Seq": self.input_seq["right"],
 		}
 
-		await self.notify_players()
-		await asyncio.sleep(0.8)
-
-	async def update_ball(self):
-		import random
-
-		ball_radius = 0.02
-		paddle_height = 0.2
-
-		ball_x = self.state["ball_position"]["x"]
-		ball_y = self.state["ball_position"]["y"]
-		vx = self.state["ball_velocity"]["x"]
-		vy = self.state["ball_velocity"]["y"]
-
-		# Muovi la palla
-		ball_x += vx
-		ball_y += vy
-
-		# Gestione punto segnato
-		if ball_x + ball_radius < 0.0:
-			self.state["scores"]["right"] += 1
-			await self.soft_reset_ball(scored_left=False)
-			await self.check_game_over()
-			return
-
-		if ball_x - ball_radius > 1.0:
-			self.state["scores"]["left"] += 1
-			await self.soft_reset_ball(scored_left=True)
-			await self.check_game_over()
-			return
-
-		# Rimbalzo sui bordi superiore e inferiore (come in game_local.js)
-		if ball_y <= ball_radius:
-			ball_y = ball_radius
-			vy = abs(vy)  # Inverte la direzione verticale
-		elif ball_y >= 1 - ball_radius:
-			ball_y = 1 - ball_radius
-			vy = -abs(vy)  # Inverte la direzione verticale
-
-		# Collisione con i paddle (come in game_local.js)
-		if vx < 0:  # Movimento verso sinistra
-			paddle_y = self.state["paddles"]["left"]
-			if ball_x - ball_radius <= self.paddle_positions["left"] and ball_x >= self.paddle_positions["left"] - ball_radius:
-				if paddle_y <= ball_y <= paddle_y + paddle_height:
-					# Aumenta il moltiplicatore come in game_local.js (max 9.5)
-					if self.current_multiplier < 0.0095:  # 9.5 normalizzato
-						self.current_multiplier *= 1.10  # Aumentato da 1.05 a 1.10
-					
-					# Calcola la distanza dal centro del paddle
-					distanza = abs(paddle_y + paddle_height / 2 - ball_y)
-					
-					# Calcola la nuova velocità come in game_local.js
-					vx = (1 - 0.3 * (distanza / (paddle_height / 2)))
-					vx = min(1, max(0.7, vx)) * self.current_multiplier
-					
-					# Calcola la componente Y della velocità
-					vy = (ball_y < paddle_y + paddle_height / 2) and -self.current_multiplier or self.current_multiplier
-
-		elif vx > 0:  # Movimento verso destra
-			paddle_y = self.state["paddles"]["right"]
-			if ball_x + ball_radius >= self.paddle_positions["right"] and ball_x <= self.paddle_positions["right"] + ball_radius:
-				if paddle_y <= ball_y <= paddle_y + paddle_height:
-					# Aumenta il moltiplicatore come in game_local.js (max 9.5)
-					if self.current_multiplier < 0.0095:  # 9.5 normalizzato
-						self.current_multiplier *= 1.10  # Aumentato da 1.05 a 1.10
-					
-					# Calcola la distanza dal centro del paddle
-					distanza = abs(paddle_y + paddle_height / 2 - ball_y)
-					
-					# Calcola la nuova velocità come in game_local.js
-					vx = -(1 - 0.3 * (distanza / (paddle_height / 2)))
-					vx = max(-1, min(-0.7, vx)) * self.current_multiplier
-					
-					# Calcola la componente Y della velocità
-					vy = (ball_y < paddle_y + paddle_height / 2) and -self.current_multiplier or self.current_multiplier
-
-		# Aggiorna lo stato
-		self.state["ball_position"] = {"x": ball_x, "y": ball_y}
-		self.state["ball_velocity"] = {"x": vx, "y": vy}
+	def _frames_for(self, snapshot):
+		if self._frame_cache_snapshot is not snapshot:
+			self._frame_cache_snapshot = snapshot
+			self._frame_cache = {}
+		return self._frame_cache
 
-		await self.notify_players()
+	def encoded_frame(self, snapshot, baseline_tick=None):
+		"""
+		Frame JSON di `snapshot` per un client con baseline `baseline_tick`.
+		Viene serializzato una sola volta per snapshot e baseline, poi lo
+		stesso testo è condiviso da tutti i membri della stanza.
+		"""
+		frames = self._frames_for(snapshot)
+		key = self.snapshots.usable_baseline(snapshot, baseline_tick)
+		text = frames.get(key)
+		if text is None:
+			text = frames[key] = dumps(self.snapshots.frame(snapshot, key))
+		return text
+
+	def encoded_binary_frame(self, snapshot):
+		"""Frame binario di `snapshot`, codificato una sola volta per tutta la stanza."""
+		frames = self._frames_for(snapshot)
+		data = frames.get("binary")
+		if data is None:
+			data = frames["binary"] = encode_snapshot(snapshot)
+		return data
 
 	async def notify_players(self):
 		"""Notifica tutti i giocatori del nuovo stato del gioco."""
+		self.last_snapshot_tick = self.tick
+		self.snapshot_pending = False
 		try:
-			# Use channel layer to broadcast game state to all connected clients
-			await self.channel_layer.group_send(
-				f"game_{self.game_id}",
-				{
+			snapshot = self.build_snapshot()
+			self.snapshots.record(snapshot)
+
+			if self.shared_group:
+				# Membri anche su altri worker: tutto il gruppo passa dal channel layer
+				await timed_group_send(self.channel_layer, f"game_{self.game_id}", {
 					"type": "game_state_update",
-					"state": {
-						"ball_position": self.state["ball_position"],
-						"ball_velocity": self.state["ball_velocity"],
-						"paddles": self.state["paddles"],
-						"scores": self.state["scores"],
-						"game_started": self.game_started,
-						"paddle_positions": self.paddle_positions
-					}
-				}
-			)
+					"snapshot": snapshot,
+					"room": self.instance_id,
+				})
+				return
+
+			# Percorso veloce: consegna diretta ai membri di questo processo
+			for member in list(self.local_members):
+				await member.send_snapshot(self, snapshot)
 		except Exception as e:
-			logger.warning(f"[NOTIFY ERROR] Problema nell'invio dello stato del gioco: {e}")
+			logger.warning("[NOTIFY ERROR] Problema nell'invio dello stato del gioco: %s", e)
 			import traceback
 			logger.error(traceback.format_exc())
 
 	async def check_game_over(self):
-		if self.state["scores"]["left"] >= 5 or self.state["scores"]["right"] >= 5:
+		if self.state.score_left >= 5 or self.state.score_right >= 5:
 			# Determine the winner
-			winner = "player1" if self.state["scores"]["left"] >= 5 else "player2"
+			winner = "player1" if self.state.score_left >= 5 else "player2"
 			
-			await self.channel_layer.group_send(
+			await timed_group_send(
+				self.channel_layer,
 				f"game_{self.game_id}",
 				{
 					"type": "game_end",
 					"winner": winner,
-					"player1_score": self.state["scores"]["left"],
-					"player2_score": self.state["scores"]["right"]
+					"player1_score": self.state.score_left,
+					"player2_score": self.state.score_right
 				}
 			)
+			await self.spectators.send_event({
+				"type": "game_end",
+				"winner": winner,
+				"player1_score": self.state.score_left,
+				"player2_score": self.state.score_right
+			})
 			self.game_started = False
+			await self.discard_checkpoint()
+			# Replay chiuso con il punteggio finale, prima dell'azzeramento
+			self.close_replay()
 
 			# Save match history
 			from .game_utils import save_match_history
 			await save_match_history(
 				self.game_id,
-				self.state["scores"]["left"],
-				self.state["scores"]["right"]
+				self.state.score_left,
+				self.state.score_right
 			)
 			
-			# Pulizia della game room
-			try:
-				# Contrassegna la sessione per l'eliminazione
-				self.cleanup_scheduled = True
-				
-				# Crea un task per la pulizia ritardata
-				room_group_name = f"game_{self.game_id}"
-				# Import GameConsumer per accedere alla funzione di pulizia
-				from backend.game.consumers import GameConsumer
-				# Crea un'istanza consumer temporanea per accedere al metodo
-				for consumer in GameConsumer.game_rooms[room_group_name].players:
-					if consumer:
-						asyncio.create_task(consumer.cleanup_game_room_after_delay(room_group_name, 3))
-						break
-			except Exception as e:
-				logger.error(f"[CLEANUP ERROR] Errore durante la pulizia della game room: {e}")
+			# Pulizia della game room dopo qualche secondo (timing wheel del processo)
+			self.set_timer("expiry", ROOM_EXPIRY_SECONDS, self.end_room)
 			
 			# Reset scores for potential new game
-			self.state["scores"]["left"] = 0
-			self.state["scores"]["right"] = 0
+			self.state.set_scores(0, 0)
 
 	async def check_all_players_ready(self):
 		"""Check if all players are ready and start the game if they are"""
 		if self.player1_ready and self.player2_ready:
 			# Start the game immediately when both players are ready
 			if self.player1 and self.player2:
-				await self.channel_layer.group_send(
+				await timed_group_send(
+					self.channel_layer,
 					f"game_{self.game_id}",
 					{
 						"type": "all_players_ready"
 					}
 				)
 				
-				await self.channel_layer.group_send(
+				await timed_group_send(
+					self.channel_layer,
 					f"game_{self.game_id}",
 					{
 						"type": "game_start",
@@ -687,13 +1065,34 @@ class Game: ## Definisco la classe, il costruttore accetta un game_id opzionale.
 class GameConsumer(AsyncJsonWebsocketConsumer):
 	game_rooms = {}  # { "game_id": Game instance }
 
+	# Codec JSON veloce (orjson se installato) per tutti i messaggi del canale di gioco
+	@classmethod
+	async def decode_json(cls, text_data):
+		return loads(text_data)
+
+	@classmethod
+	async def encode_json(cls, content):
+		return dumps(content)
+
 	async def connect(self):
 		# Gestione della connessione
 		self.game_id = self.scope["url_route"]["kwargs"].get("game_id", None)
-		logger.info(f"[CONNECT] Tentativo di connessione con game_id: {self.game_id or '(vuoto)'}")
+		self.acked_tick = None  # Ultimo snapshot confermato dal client (baseline dei delta)
+		# Frame di stato binari se il client li ha chiesti nell'handshake
+		self.binary_frames = BINARY_SUBPROTOCOL in self.scope.get("subprotocols", [])
+		# Budget dei messaggi in ingresso e input paddle accorpati in attesa
+		self.rate_limiter = InboundRateLimiter()
+		self.coalesced_inputs = {}
+		self.coalesce_handle = None
+		self.spectator = False
+		# Worker proprietario della stanza, se la connessione viene inoltrata
+		self.forward_owner = None
+		self.forward_channel = None
+		self.migrating = False
+		logger.info("[CONNECT] Tentativo di connessione con game_id: %s", self.game_id or '(vuoto)')
 
 		client_ip, client_port = self.scope["client"]
-		logger.info(f"[CONNECT] Connessione da {client_ip}:{client_port}")
+		logger.info("[CONNECT] Connessione da %s:%s", client_ip, client_port)
 
 		# 🧠 Ottieni la sessione utente (se disponibile)
 		if "session" in self.scope:
@@ -701,7 +1100,7 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 			if not session_key:
 				await sync_to_async(self.scope["session"].save)()
 				session_key = self.scope["session"].session_key
-			logger.info(f"[SESSION] Trovata sessione con key: {session_key}")
+			logger.info("[SESSION] Trovata sessione con key: %s", session_key)
 		else:
 			logger.warning("[SESSION] Nessuna sessione trovata nello scope")
 
@@ -712,34 +1111,71 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 				if "user" in self.scope and self.scope["user"].is_authenticated:
 					game_session = await sync_to_async(GameSession.objects.get)(player1=self.scope["user"], status="waiting")
 					self.game_id = str(game_session.game_id)
-					logger.info(f"[SESSION] Trovata GameSession esistente per {self.scope['user']}: {self.game_id}")
+					logger.info("[SESSION] Trovata GameSession esistente per %s: %s", self.scope['user'], self.game_id)
 				else:
 					# Genera un nuovo game_id casuale per utenti non autenticati
 					self.game_id = str(uuid.uuid4())
-					logger.info(f"[SESSION] Creato nuovo game_id per utente non autenticato: {self.game_id}")
+					logger.info("[SESSION] Creato nuovo game_id per utente non autenticato: %s", self.game_id)
 			except GameSession.DoesNotExist:
 				# Crea una nuova sessione se l'utente è autenticato
 				if "user" in self.scope and self.scope["user"].is_authenticated:
 					game_session = await sync_to_async(create_new_game_session)(self.scope["user"])
 					self.game_id = str(game_session.game_id)
-					logger.info(f"[SESSION] Creata nuova GameSession {self.game_id} per {self.scope['user']}")
+					logger.info("[SESSION] Creata nuova GameSession %s per %s", self.game_id, self.scope['user'])
 				else:
 					# Genera un nuovo game_id casuale per utenti non autenticati
 					self.game_id = str(uuid.uuid4())
-					logger.info(f"[SESSION] Creato nuovo game_id per utente non autenticato: {self.game_id}")
+					logger.info("[SESSION] Creato nuovo game_id per utente non autenticato: %s", self.game_id)
 
 		self.room_group_name = f"game_{self.game_id}"
 
+		# 🌐 Una stanza vive su un solo worker: se è di un altro, la connessione viene inoltrata
+		leased = False
+		if self.room_group_name not in GameConsumer.game_rooms:
+			try:
+				host = await get_room_host(self.channel_layer)
+				if self.wants_to_spectate():
+					owner = await host.owner(self.game_id)
+				else:
+					owner = await host.claim(self.game_id)
+			except Exception as e:
+				logger.warning("[REGISTRY] Registro delle stanze non disponibile, stanza locale: %s", e)
+				host, owner = None, None
+			if owner is not None and owner != host.worker_id:
+				await self.connect_forwarded(host, owner)
+				return
+			leased = owner is not None
+
+		# 👀 Spettatore (?spectate=1): connessione in sola lettura a una stanza esistente
+		if self.wants_to_spectate():
+			await self.connect_spectator()
+			return
+
 		# Crea una nuova stanza se non esiste
 		if self.room_group_name not in GameConsumer.game_rooms:
 			from backend.game.consumers import Game  # Import locale (se Game è in consumers o altro modulo)
-			GameConsumer.game_rooms[self.room_group_name] = Game(self.game_id, channel_layer=self.channel_layer)
-			logger.info(f"[NEW GAME ROOM] Creata nuova stanza di gioco: {self.room_group_name}")
+			room = GameConsumer.game_rooms[self.room_group_name] = Game(self.game_id, channel_layer=self.channel_layer)
+			# Senza lease la stanza potrebbe esistere anche su altri worker
+			room.shared_group = not leased
+			logger.info("[NEW GAME ROOM] Creata nuova stanza di gioco: %s", self.room_group_name)
 		else:
-			logger.info(f"[EXISTING GAME] GameID {self.game_id} già esistente, aggiungendo un nuovo giocatore.")
+			logger.info("[EXISTING GAME] GameID %s già esistente, aggiungendo un nuovo giocatore.", self.game_id)
 
 		game = GameConsumer.game_rooms[self.room_group_name]
-		logger.info(f"[PLAYER COUNT] Giocatori attuali in {self.game_id}: {len([p for p in game.players if p])}")
+		# I log dell'ingresso finiscono anche nel buffer della stanza
+		token = bind_room(game.events)
+		try:
+			await self.join_room(game)
+		finally:
+			unbind_room(token)
+
+	async def join_room(self, game):
+		"""Ingresso del giocatore nella stanza locale `game` (seconda parte di connect)."""
+		# Partita interrotta da un crash: la stanza riparte dall'ultimo checkpoint
+		await game.ensure_restored()
+		# Una stanza senza giocatori non resta in memoria oltre il tempo di attesa
+		game.update_lobby_timers()
+		logger.info("[PLAYER COUNT] Giocatori attuali in %s: %s", self.game_id, len([p for p in game.players if p]))
 
 		# 👻 Cleanup automatico dei giocatori disconnessi
 		for p in [game.player1, game.player2]:
@@ -752,22 +1188,22 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 		# Check if game is full before adding player
 		active_players = len([p for p in game.players if p])
 		if active_players >= 2:
-			logger.warning(f"[FULL GAME] Partita {self.game_id} piena. Connessione rifiutata.")
+			logger.warning("[FULL GAME] Partita %s piena. Connessione rifiutata.", self.game_id)
 			await self.close(code=4000)
 			return
 
 		# ➕ Aggiunta player
-		logger.info(f"[CONSUMER] Game object: {game}")
-		logger.info(f"[CONSUMER] Players list before add_player: {[p.side if p else None for p in game.players]}")
+		logger.info("[CONSUMER] Game object: %s", game)
+		logger.info("[CONSUMER] Players list before add_player: %s", [p.side if p else None for p in game.players])
 
 		success = await game.add_player(self)
-		logger.debug(f"[DEBUG] Esito add_player: {success}")
+		logger.debug("[DEBUG] Esito add_player: %s", success)
 
 		if not success:
 			await self.close(code=4001)
 			return
 
-		logger.info(f"[CONSUMER] Players list after add_player: {[p.side if p else None for p in game.players]}")
+		logger.info("[CONSUMER] Players list after add_player: %s", [p.side if p else None for p in game.players])
 
 		if self not in [game.player1, game.player2]:
 			logger.warning("[CONNECT] Il consumer non è stato assegnato correttamente. Forzando chiusura.")
@@ -786,7 +1222,9 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 
 		# Join del gruppo
 		await self.channel_layer.group_add(self.room_group_name, self.channel_name)
-		await self.accept()  # 🔥 Important: solo ora
+		await self.accept(subprotocol=BINARY_SUBPROTOCOL if self.binary_frames else None)  # 🔥 Important: solo ora
+		track_socket(self, self.socket_kind("player"))
+		game.add_member(self)
 
 		# Invia il ruolo assegnato
 		await self.send_json({
@@ -800,7 +1238,8 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 			await self.send_json({"type": "waiting_for_opponent"})
 		else:
 			# Se entrambi i player sono connessi
-			await self.channel_layer.group_send(
+			await timed_group_send(
+				self.channel_layer,
 				self.room_group_name,
 				{
 					"type": "send_players_ready",
@@ -813,7 +1252,12 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 		# Notifica stato ai giocatori
 		await game.notify_players()
 
-		logger.info(f"[PLAYER JOIN] Il client si è unito alla partita {self.game_id}")
+		# Partita ripresa da un checkpoint: riparte quando entrambi i giocatori sono tornati
+		if game.resume_pending and game.player1 and game.player2:
+			await game.resume_game()
+		game.update_lobby_timers()
+
+		logger.info("[PLAYER JOIN] Il client si è unito alla partita %s", self.game_id)
 
 	async def send_game_over(self, event):
 		await self.send_json({
@@ -838,11 +1282,9 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 			from .models import GameSession, TournamentMatch, TournamentParticipant
 			from django.db.models import Q
 			from asgiref.sync import sync_to_async
-			import logging
 			import traceback
 			
-			logger = logging.getLogger(__name__)
-			logger.error(f"[TOURNAMENT UPDATE] INIZIO aggiornamento torneo per game_id: {game_id}, score: {player1_score}-{player2_score}")
+			logger.info("[TOURNAMENT UPDATE] INIZIO aggiornamento torneo per game_id: %s, score: %s-%s", game_id, player1_score, player2_score)
 			
 			# Funzione per trovare e aggiornare il record del torneo
 			@sync_to_async
@@ -851,29 +1293,29 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 					# Trova la sessione di gioco
 					session = GameSession.objects.filter(game_id=game_id).first()
 					if not session:
-						logger.error(f"[TOURNAMENT UPDATE] Sessione di gioco con ID {game_id} non trovata.")
+						logger.warning("[TOURNAMENT UPDATE] Sessione di gioco con ID %s non trovata.", game_id)
 						return
 						
 					# Verifica se è una partita di torneo
 					if session.session_type != 'tournament':
-						logger.error(f"[TOURNAMENT UPDATE] La sessione {game_id} non è una partita di torneo. Tipo: {session.session_type}")
+						logger.info("[TOURNAMENT UPDATE] La sessione %s non è una partita di torneo. Tipo: %s", game_id, session.session_type)
 						return
 						
 					# Ottieni i nomi degli utenti
 					player1_name = session.player1.username
 					player2_name = session.player2.username
 					
-					logger.error(f"[TOURNAMENT UPDATE] Cercando match di torneo per {player1_name} vs {player2_name}")
+					logger.debug("[TOURNAMENT UPDATE] Cercando match di torneo per %s vs %s", player1_name, player2_name)
 					
 					# Cerca i partecipanti ai tornei con questi nickname
 					participant1_list = TournamentParticipant.objects.filter(nickname=player1_name)
 					participant2_list = TournamentParticipant.objects.filter(nickname=player2_name)
 					
 					if not participant1_list or not participant2_list:
-						logger.error(f"[TOURNAMENT UPDATE] Partecipanti al torneo non trovati: {player1_name}, {player2_name}")
+						logger.warning("[TOURNAMENT UPDATE] Partecipanti al torneo non trovati: %s, %s", player1_name, player2_name)
 						# Lista tutti i partecipanti per debug
 						all_participants = TournamentParticipant.objects.all()
-						logger.error(f"[TOURNAMENT UPDATE] Tutti i partecipanti: {[p.nickname for p in all_participants]}")
+						logger.debug("[TOURNAMENT UPDATE] Tutti i partecipanti: %s", [p.nickname for p in all_participants])
 						return
 					
 					# Cerca il match di torneo che coinvolge entrambi i giocatori e che non ha ancora un vincitore
@@ -886,7 +1328,7 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 							if participant1.tournament_id != participant2.tournament_id:
 								continue
 								
-							logger.error(f"[TOURNAMENT UPDATE] Verificando torneo {participant1.tournament_id}: {participant1.nickname} vs {participant2.nickname}")
+							logger.debug("[TOURNAMENT UPDATE] Verificando torneo %s: %s vs %s", participant1.tournament_id, participant1.nickname, participant2.nickname)
 							
 							# Cerca il match nel torneo tra questi partecipanti che non ha ancora un vincitore
 							potential_match = TournamentMatch.objects.filter(
@@ -899,14 +1341,14 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 							
 							if potential_match:
 								match = potential_match
-								logger.error(f"[TOURNAMENT UPDATE] Match di torneo trovato: ID={match.id}, Torneo={match.tournament.id}, {match.player_1.nickname} vs {match.player_2.nickname}")
+								logger.info("[TOURNAMENT UPDATE] Match di torneo trovato: ID=%s, Torneo=%s, %s vs %s", match.id, match.tournament.id, match.player_1.nickname, match.player_2.nickname)
 								break
 						
 						if match:
 							break
 					
 					if not match:
-						logger.error(f"[TOURNAMENT UPDATE] Match di torneo non trovato per {player1_name} vs {player2_name}")
+						logger.warning("[TOURNAMENT UPDATE] Match di torneo non trovato per %s vs %s", player1_name, player2_name)
 						# Cerca comunque tutti i match di questi partecipanti anche con vincitore per debug
 						all_matches = []
 						for participant1 in participant1_list:
@@ -918,7 +1360,7 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 									)
 									all_matches.extend(matches)
 						
-						logger.error(f"[TOURNAMENT UPDATE] Match trovati (anche con vincitore): {[(m.id, m.tournament.id, m.winner.nickname if m.winner else 'None') for m in all_matches]}")
+						logger.debug("[TOURNAMENT UPDATE] Match trovati (anche con vincitore): %s", [(m.id, m.tournament.id, m.winner.nickname if m.winner else 'None') for m in all_matches])
 						return
 					
 					# Aggiorna il punteggio in base ai ruoli dei giocatori
@@ -933,52 +1375,52 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 						# Correggiamo la logica del vincitore quando i giocatori sono invertiti
 						match.winner = match.player_2 if player1_score > player2_score else match.player_1
 					
-					logger.error(f"[TOURNAMENT UPDATE] Impostazione punteggi: {match.score_player_1}-{match.score_player_2}, vincitore: {match.winner.nickname}")
+					logger.info("[TOURNAMENT UPDATE] Impostazione punteggi: %s-%s, vincitore: %s", match.score_player_1, match.score_player_2, match.winner.nickname)
 					
 					# Salva il match
 					match.save()
-					logger.error(f"[TOURNAMENT UPDATE] Match di torneo salvato con successo")
+					logger.info("[TOURNAMENT UPDATE] Match di torneo salvato con successo")
 					
 					# Ottieni le informazioni sul round e il torneo per debug
 					tournament = match.tournament
 					current_round = match.round
 					round_matches = TournamentMatch.objects.filter(tournament=tournament, round=current_round)
 					all_completed = all(m.winner is not None for m in round_matches)
-					logger.error(f"[TOURNAMENT UPDATE] Torneo ID={tournament.id}, Round={current_round}, Match completati: {all_completed}")
+					logger.info("[TOURNAMENT UPDATE] Torneo ID=%s, Round=%s, Match completati: %s", tournament.id, current_round, all_completed)
 					
 					# Conta i vincitori per verificare se servirebbe creare un nuovo round
 					winners = [m.winner for m in round_matches if m.winner is not None]
-					logger.error(f"[TOURNAMENT UPDATE] Vincitori trovati: {[w.nickname for w in winners]}, totale: {len(winners)}")
+					logger.debug("[TOURNAMENT UPDATE] Vincitori trovati: %s, totale: %s", [w.nickname for w in winners], len(winners))
 					
 					# Verifica se dobbiamo creare i match del turno successivo
 					from .tournament_views import TournamentMatchAPIView
 					api_view = TournamentMatchAPIView()
-					logger.error(f"[TOURNAMENT UPDATE] Chiamata a _check_and_create_next_round_matches")
+					logger.debug("[TOURNAMENT UPDATE] Chiamata a _check_and_create_next_round_matches")
 					try:
 						api_view._check_and_create_next_round_matches(match)
-						logger.error(f"[TOURNAMENT UPDATE] Chiamata completata con successo")
+						logger.debug("[TOURNAMENT UPDATE] Chiamata completata con successo")
 					except Exception as e:
-						logger.error(f"[TOURNAMENT UPDATE] Errore durante la creazione del prossimo round: {str(e)}")
+						logger.error("[TOURNAMENT UPDATE] Errore durante la creazione del prossimo round: %s", str(e))
 						import traceback
 						logger.error(traceback.format_exc())
 					
 					# Verifica se il match della finale è stato creato
 					next_round = current_round + 1
 					next_round_matches = TournamentMatch.objects.filter(tournament=tournament, round=next_round)
-					logger.error(f"[TOURNAMENT UPDATE] Match del round {next_round} creati: {len(next_round_matches)}")
+					logger.info("[TOURNAMENT UPDATE] Match del round %s creati: %s", next_round, len(next_round_matches))
 					for next_match in next_round_matches:
-						logger.error(f"[TOURNAMENT UPDATE] Match finale: {next_match.player_1.nickname} vs {next_match.player_2.nickname}")
+						logger.info("[TOURNAMENT UPDATE] Match finale: %s vs %s", next_match.player_1.nickname, next_match.player_2.nickname)
 					
 				except Exception as e:
-					logger.error(f"[TOURNAMENT UPDATE] Errore durante l'aggiornamento del match di torneo: {str(e)}")
+					logger.error("[TOURNAMENT UPDATE] Errore durante l'aggiornamento del match di torneo: %s", str(e))
 					logger.error(traceback.format_exc())
 					raise
 			
 			# Esegui la funzione di aggiornamento
 			await find_and_update_tournament_match()
-			logger.error(f"[TOURNAMENT UPDATE] COMPLETATO aggiornamento torneo")
+			logger.info("[TOURNAMENT UPDATE] COMPLETATO aggiornamento torneo")
 		except Exception as e:
-			logger.error(f"[TOURNAMENT UPDATE] Errore nell'aggiornamento del match di torneo: {str(e)}")
+			logger.error("[TOURNAMENT UPDATE] Errore nell'aggiornamento del match di torneo: %s", str(e))
 			logger.error(traceback.format_exc())
 
 	async def send_players_ready(self, event):
@@ -994,66 +1436,142 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 				"player2_ready": game.player2_ready
 			})
 
+	def socket_kind(self, role):
+		"""Tipo di connessione per le metriche: i consumer proxy non hanno un socket proprio."""
+		return "proxy" if self.scope.get("proxy") else role
+
+	def wants_to_spectate(self):
+		from urllib.parse import parse_qs
+		query = parse_qs(self.scope.get("query_string", b"").decode(errors="ignore"))
+		return query.get("spectate", ["0"])[0] in ("1", "true")
+
+	async def connect_spectator(self):
+		"""Registra la connessione come spettatore: riceve solo il flusso ridotto e gli eventi di fine partita."""
+		game = GameConsumer.game_rooms.get(self.room_group_name)
+		if game is None:
+			logger.warning("[SPECTATOR] Partita %s non trovata: spettatore rifiutato", self.game_id)
+			await self.close(code=4004)
+			return
+
+		self.spectator = True
+		self.side = None
+		await self.accept(subprotocol=BINARY_SUBPROTOCOL if self.binary_frames else None)
+		track_socket(self, self.socket_kind("spectator"))
+		await self.send_json({
+			"type": "assign_role",
+			"role": "spectator",
+			"can_start_game": False,
+		})
+		game.spectators.add(self)
+
+	async def connect_forwarded(self, host, owner):
+		"""La stanza è di un altro worker: il proprietario esegue un consumer proxy, questo fa da relay."""
+		channel = await host.registry.worker_channel(owner)
+		if channel is None:
+			logger.warning("[REGISTRY] Worker %s della partita %s non raggiungibile", owner, self.game_id)
+			await self.close(code=4013)
+			return
+
+		user = self.scope.get("user")
+		self.forward_owner = owner
+		self.forward_host = host
+		self.forward_host_channel = channel
+		host.edges.add(self)
+		track_socket(self, "forwarded")
+		await self.channel_layer.send(channel, {
+			"type": "room.join",
+			"reply_channel": self.channel_name,
+			"game_id": self.game_id,
+			"path": self.scope.get("path", ""),
+			"query_string": self.scope.get("query_string", b"").decode(errors="ignore"),
+			"subprotocols": list(self.scope.get("subprotocols", [])),
+			"client": list(self.scope.get("client") or ("", 0)),
+			"user_id": user.pk if user is not None and user.is_authenticated else None,
+		})
+		logger.info("[REGISTRY] Partita %s sul worker %s: connessione inoltrata", self.game_id, owner)
+
+	async def migrate(self, worker):
+		"""Drain del worker: il client deve riconnettersi, il load balancer lo instrada su `worker`."""
+		if self.migrating:
+			return
+		self.migrating = True
+		try:
+			await self.send_json({"type": "migrate", "worker": worker})
+			await self.close(code=MIGRATE_CLOSE_CODE)
+		except Exception as e:
+			logger.warning("[DRAIN] Migrazione del client %s fallita: %s", self.channel_name, e)
+
+	async def room_outbound(self, event):
+		"""Messaggio ASGI (accept, send, close) del consumer proxy, girato al websocket del client."""
+		self.forward_channel = event["proxy"]
+		message = event["message"]
+		await self.base_send(message)
+
+	async def forward_frame(self, text_data=None, bytes_data=None):
+		"""Inoltra un frame del client al consumer proxy sul worker proprietario."""
+		if self.forward_channel is None:
+			return
+		message = {"type": "websocket.receive"}
+		if text_data is not None:
+			message["text"] = text_data
+		else:
+			message["bytes"] = bytes_data
+		await self.channel_layer.send(self.forward_channel, message)
+
+	async def receive_spectator(self, game, content):
+		"""Messaggi ammessi per gli spettatori: nessun input di gioco."""
+		msg_type = content.get("type")
+		if msg_type == "resync_request":
+			game.spectators.request_keyframe(self)
+		elif msg_type == "ping":
+			await self.send_json({"type": "pong"})
+
 	async def disconnect(self, close_code):
+		untrack_socket(self)
+		# Annulla gli input accorpati ancora in attesa
+		if self.coalesce_handle is not None:
+			self.coalesce_handle.cancel()
+			self.coalesce_handle = None
+		if self.rate_limiter.limited():
+			logger.info("[RATE LIMIT] Messaggi limitati per %s: %s", self.channel_name, self.rate_limiter.stats())
+
+		# Connessione inoltrata: la disconnessione viene gestita dal proxy sul proprietario
+		if self.forward_owner is not None:
+			self.forward_host.edges.discard(self)
+			await self.channel_layer.send(self.forward_host_channel, {
+				"type": "room.leave",
+				"reply_channel": self.channel_name,
+				"code": MIGRATE_CLOSE_CODE if self.migrating else close_code,
+			})
+			return
+
+		# Lo spettatore esce senza effetti sulla partita
+		if self.spectator:
+			game = GameConsumer.game_rooms.get(self.room_group_name)
+			if game:
+				game.spectators.remove(self)
+			return
+
 		game = GameConsumer.game_rooms.get(self.room_group_name)
 		if game:
-			# Se la partita è in corso, assegna la vittoria all'avversario
-			if game.game_started:
-				logger.info(f"[DISCONNECT] Giocatore {self.side} ha abbandonato la partita {self.game_id} durante il gioco")
-				
-				# Determina quale giocatore si è disconnesso e assegna la vittoria all'altro
-				winner_side = "right" if self.side == "left" else "left"
-				winner_role = "player2" if self.side == "left" else "player1"
-				
-				# Imposta il punteggio a 3-0
-				if winner_side == "left":
-					game.state["scores"]["left"] = 3
-					game.state["scores"]["right"] = 0
-				else:
-					game.state["scores"]["left"] = 0
-					game.state["scores"]["right"] = 3
-				
-				# Invia un messaggio di fine partita con il motivo dell'abbandono
-				await self.channel_layer.group_send(
-					self.room_group_name,
-					{
-						"type": "game_abandoned",
-						"winner": winner_role,
-						"player1_score": game.state["scores"]["left"],
-						"player2_score": game.state["scores"]["right"],
-						"abandoned_by": self.side
-					}
-				)
-				
-				# Termina la partita
-				game.game_started = False
-				
-				# Salva la partita nello storico
-				from .game_utils import save_match_history
-				await save_match_history(
-					self.game_id,
-					game.state["scores"]["left"],
-					game.state["scores"]["right"],
-					abandoned=True
-				)
-
-				# Aggiorna il match del torneo se è una partita di torneo
-				try:
-					session_info = await self.get_session_info(self.game_id)
-					if session_info and session_info['type'] == 'tournament':
-						logger.error(f"[DISCONNECT] Chiamata update_tournament_match per partita di torneo abbandonata")
-						await self.update_tournament_match(
-							self.game_id,
-							game.state["scores"]["left"],
-							game.state["scores"]["right"]
-						)
-						logger.error(f"[DISCONNECT] Aggiornamento match torneo completato")
-				except Exception as e:
-					logger.error(f"[DISCONNECT] Errore durante l'aggiornamento del match di torneo: {str(e)}")
-					import traceback
-					logger.error(traceback.format_exc())
+			# Partita in corso: viene sospesa e il posto resta riservato per il
+			# tempo di grazia (riconnessione o migrazione su un altro worker);
+			# l'abbandono viene assegnato solo alla scadenza
+			if game.game_started and await game.suspend():
+				migrating = close_code == MIGRATE_CLOSE_CODE
+				logger.info("[DISCONNECT] Giocatore %s %s partita %s", self.side, 'in migrazione dalla' if migrating else 'disconnesso dalla', self.game_id)
+				game.release_seat(self)
+				grace = getattr(settings, "GAME_RECONNECT_GRACE_SECONDS", 15)
+				game.set_timer(f"reconnect_{self.side}", grace, self.abandon_match, game)
+				opponent = game.player1 or game.player2
+				if opponent is not None and not migrating:
+					try:
+						await opponent.send_json({"type": "opponent_disconnected", "grace": grace})
+					except Exception:
+						pass
 
 			# Rimuovi il giocatore dalla stanza
+			game.remove_member(self)
 			await self.channel_layer.group_discard(
 				self.room_group_name,
 				self.channel_name
@@ -1067,15 +1585,79 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 			
 			# Se nessun giocatore è connesso, rimuovi la stanza
 			if not game.player1_connected and not game.player2_connected:
-				del GameConsumer.game_rooms[self.room_group_name]
+				game.close_room()
+			else:
+				game.update_lobby_timers()
+
+	async def abandon_match(self, game):
+		"""Tempo di grazia scaduto senza riconnessione: vittoria a tavolino all'avversario."""
+		current = GameConsumer.game_rooms.get(self.room_group_name)
+		seat = game.player1 if self.side == "left" else game.player2
+		# Giocatore tornato, oppure partita già ripresa in una nuova stanza
+		if not game.resume_pending or seat is not None or current not in (None, game):
+			return
+		logger.info("[DISCONNECT] Giocatore %s ha abbandonato la partita %s durante il gioco", self.side, self.game_id)
 
-	async def cleanup_game_room_after_delay(self, room_group_name, delay_seconds):
-		"""Helper per eliminare una game room dopo un ritardo specificato"""
-		await asyncio.sleep(delay_seconds)
+		# Determina quale giocatore si è disconnesso e assegna la vittoria all'altro
+		winner_side = "right" if self.side == "left" else "left"
+		winner_role = "player2" if self.side == "left" else "player1"
+		
+		# Imposta il punteggio a 3-0
+		if winner_side == "left":
+			game.state.set_scores(3, 0)
+		else:
+			game.state.set_scores(0, 3)
 		
-		if room_group_name in GameConsumer.game_rooms:
-			logger.info(f"[CLEANUP] Rimozione della game room dopo {delay_seconds}s")
-			del GameConsumer.game_rooms[room_group_name]
+		# Invia un messaggio di fine partita con il motivo dell'abbandono
+		await timed_group_send(
+			self.channel_layer,
+			f"game_{game.game_id}",
+			{
+				"type": "game_abandoned",
+				"winner": winner_role,
+				"player1_score": game.state.score_left,
+				"player2_score": game.state.score_right,
+				"abandoned_by": self.side
+			}
+		)
+		await game.spectators.send_event({
+			"type": "game_abandoned",
+			"winner": winner_role,
+			"player1_score": game.state.score_left,
+			"player2_score": game.state.score_right,
+			"abandoned_by": self.side
+		})
+		
+		# Termina la partita
+		game.game_started = False
+		game.resume_pending = False
+		await game.discard_checkpoint()
+		game.set_timer("expiry", ROOM_EXPIRY_SECONDS, game.close_room)
+		
+		# Salva la partita nello storico
+		from .game_utils import save_match_history
+		await save_match_history(
+			self.game_id,
+			game.state.score_left,
+			game.state.score_right,
+			abandoned=True
+		)
+
+		# Aggiorna il match del torneo se è una partita di torneo
+		try:
+			session_info = await self.get_session_info(self.game_id)
+			if session_info and session_info['type'] == 'tournament':
+				logger.info("[DISCONNECT] Chiamata update_tournament_match per partita di torneo abbandonata")
+				await self.update_tournament_match(
+					self.game_id,
+					game.state.score_left,
+					game.state.score_right
+				)
+				logger.info("[DISCONNECT] Aggiornamento match torneo completato")
+		except Exception as e:
+			logger.error("[DISCONNECT] Errore durante l'aggiornamento del match di torneo: %s", str(e))
+			import traceback
+			logger.error(traceback.format_exc())
 
 	async def game_abandoned(self, event):
 		"""Gestisce l'evento di abbandono di una partita"""
@@ -1088,21 +1670,125 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 			"message": f"L'avversario ha abbandonato la partita. Vittoria assegnata {event['player1_score']}-{event['player2_score']}."
 		})
 
+	def post_paddle_input(self, game, content):
+		"""Valida un input paddle (paddle_move o paddle_position) e lo deposita nella casella della stanza."""
+		msg_type = content.get("type")
+		if msg_type == "paddle_move":
+			if not hasattr(game, 'game_started') or not game.game_started:
+				logger.warning("[MOVE IGNORED] Movimento prima dell'inizio della partita %s", self.game_id)
+				return
+
+			direction = content.get("direction")
+			action = content.get("action", "start")  # "start" or "stop"
+			
+			if direction not in ["up", "down"]:
+				logger.warning("[MOVE] Direzione non valida: %s", direction)
+				return
+
+			side = getattr(self, 'side', None)
+			if not side:
+				logger.warning("[MOVE] Paddle non trovato nella partita %s", self.game_id)
+				return
+			
+			# Converti direzione in movimento
+			movement = -1 if direction == "up" else 1
+			if action == "stop":
+				movement = 0
+			
+			# Il movimento viene applicato dalla stanza al prossimo tick
+			game.inputs.post(side, movement=movement, seq=content.get("seq"))
+			logger.info("[MOVE] Paddle '%s' movimento impostato a %s nella partita %s", side, movement, self.game_id)
+
+		# Gestione del messaggio paddle_position per sincronizzazione diretta
+		elif msg_type == "paddle_position":
+			if not hasattr(game, 'game_started') or not game.game_started:
+				logger.warning("[POSITION IGNORED] Posizionamento prima dell'inizio della partita %s", self.game_id)
+				return
+			
+			position = content.get("position")
+			if position is None:
+				logger.warning("[POSITION] Posizione non specificata")
+				return
+			
+			side = getattr(self, 'side', None)
+			if not side or side not in SIDES:
+				logger.warning("[POSITION] Paddle '%s' non trovato nella partita %s", getattr(self, 'side', None), self.game_id)
+				return
+			
+			# Controlla che la posizione sia valida (tra 0 e 0.8)
+			paddle_height = 0.2
+			position = max(0.0, min(1.0 - paddle_height, float(position)))
+			
+			# La posizione viene applicata dalla stanza al prossimo tick e
+			# raggiunge l'avversario con il prossimo snapshot
+			game.inputs.post(side, position=position, seq=content.get("seq"))
+
+	def coalesce_paddle_input(self, content):
+		"""
+		Input paddle oltre il budget: ne conserva solo l'ultimo per tipo e lo
+		applica quando il bucket torna ad avere token, così un "stop" non va perso.
+		"""
+		msg_type = content.get("type")
+		self.rate_limiter.count(msg_type, "coalesced")
+		self.coalesced_inputs[msg_type] = content
+		if self.coalesce_handle is None:
+			delay = self.rate_limiter.retry_after(msg_type)
+			self.coalesce_handle = asyncio.get_running_loop().call_later(delay, self.flush_coalesced_inputs)
+
+	def flush_coalesced_inputs(self):
+		self.coalesce_handle = None
+		game = GameConsumer.game_rooms.get(self.room_group_name)
+		for msg_type, content in list(self.coalesced_inputs.items()):
+			if not self.rate_limiter.allow(msg_type):
+				continue
+			del self.coalesced_inputs[msg_type]
+			if game:
+				try:
+					self.post_paddle_input(game, content)
+				except Exception as e:
+					logger.warning("[RATE LIMIT] Input accorpato non valido: %s", e)
+		# Budget ancora esaurito: riprova più tardi
+		if self.coalesced_inputs:
+			delay = max(self.rate_limiter.retry_after(t) for t in self.coalesced_inputs)
+			self.coalesce_handle = asyncio.get_running_loop().call_later(delay, self.flush_coalesced_inputs)
+
+	async def receive(self, text_data=None, bytes_data=None, **kwargs):
+		# I frame oltre il budget della connessione vengono scartati prima del parsing JSON
+		if not self.rate_limiter.allow_frame():
+			return
+		if self.forward_owner is not None:
+			await self.forward_frame(text_data, bytes_data)
+			return
+		await super().receive(text_data=text_data, bytes_data=bytes_data, **kwargs)
+
 	async def receive_json(self, content):
-		logger.info(f"[RECEIVE] JSON ricevuto: {content}")
+		msg_type = content.get("type")
+		# Budget per tipo di messaggio: gli input in eccesso vengono accorpati, il resto scartato
+		if not self.rate_limiter.allow(msg_type):
+			if msg_type in ("paddle_move", "paddle_position"):
+				self.coalesce_paddle_input(content)
+			else:
+				self.rate_limiter.count(msg_type, "dropped")
+			return
+
+		logger.info("[RECEIVE] JSON ricevuto: %s", content)
 
 		game = GameConsumer.game_rooms.get(self.room_group_name)
 		if not game:
-			logger.warning(f"[INVALID GAME] Messaggio per partita inesistente: {self.game_id}")
+			logger.warning("[INVALID GAME] Messaggio per partita inesistente: %s", self.game_id)
 			return
 
-		msg_type = content.get("type")
-		logger.info(f"[MESSAGE RECEIVED] Tipo: {msg_type} | Partita: {self.game_id}")
+		if self.spectator:
+			await self.receive_spectator(game, content)
+			return
 
+		logger.info("[MESSAGE RECEIVED] Tipo: %s | Partita: %s", msg_type, self.game_id)
+
+		token = bind_room(game.events)
 		try:
 			# Add handler for leave_waiting_room message
 			if msg_type == "leave_waiting_room":
-				logger.info(f"[LEAVE WAITING] Giocatore {self.side} lascia la waiting room {self.game_id}")
+				logger.info("[LEAVE WAITING] Giocatore %s lascia la waiting room %s", self.side, self.game_id)
 				
 				# Aggiorna lo stato della sessione nel database
 				try:
@@ -1114,13 +1800,14 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 						if session and session.status == "waiting":
 							session.status = "cancelled"
 							session.save()
-							logger.info(f"[CLEANUP] Sessione {self.game_id} marcata come cancelled nel database")
+							logger.info("[CLEANUP] Sessione %s marcata come cancelled nel database", self.game_id)
 					
 					await update_session()
 				except Exception as e:
-					logger.error(f"[CLEANUP] Errore nell'aggiornamento dello stato della sessione: {e}")
+					logger.error("[CLEANUP] Errore nell'aggiornamento dello stato della sessione: %s", e)
 
 				# Rimuovi il giocatore dalla stanza
+				game.remove_member(self)
 				if self.side == "left":
 					game.player1 = None
 					game.player1_connected = False
@@ -1130,8 +1817,10 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 				
 				# Se nessun giocatore è connesso, rimuovi la stanza
 				if not game.player1_connected and not game.player2_connected:
-					logger.info(f"[CLEANUP] Rimozione game room {self.game_id} - nessun giocatore connesso")
-					del GameConsumer.game_rooms[self.room_group_name]
+					logger.info("[CLEANUP] Rimozione game room %s - nessun giocatore connesso", self.game_id)
+					game.close_room()
+				else:
+					game.update_lobby_timers()
 
 				await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
 				return
@@ -1140,13 +1829,14 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 			if msg_type == "player_ready":
 				if self.side == "left":
 					game.player1_ready = True
-					logger.info(f"[READY] Player 1 ready in game {self.game_id}")
+					logger.info("[READY] Player 1 ready in game %s", self.game_id)
 				elif self.side == "right":
 					game.player2_ready = True
-					logger.info(f"[READY] Player 2 ready in game {self.game_id}")
+					logger.info("[READY] Player 2 ready in game %s", self.game_id)
 				
 				# Notify all players about ready status
-				await self.channel_layer.group_send(
+				await timed_group_send(
+					self.channel_layer,
 					self.room_group_name,
 					{
 						"type": "send_players_ready",
@@ -1159,83 +1849,9 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 				# Check if both players are ready
 				await game.check_all_players_ready()
 				
-			# Handle paddle movement (start/stop)
-			elif msg_type == "paddle_move":
-				if not hasattr(game, 'game_started') or not game.game_started:
-					logger.warning(f"[MOVE IGNORED] Movimento prima dell'inizio della partita {self.game_id}")
-					return
-
-				direction = content.get("direction")
-				action = content.get("action", "start")  # "start" or "stop"
-				
-				if direction not in ["up", "down"]:
-					logger.warning(f"[MOVE] Direzione non valida: {direction}")
-					return
-
-				side = getattr(self, 'side', None)
-				if not side:
-					logger.error(f"[MOVE] Paddle non trovato nella partita {self.game_id}")
-					return
-				
-				# Converti direzione in movimento
-				movement = -1 if direction == "up" else 1
-				if action == "stop":
-					movement = 0
-				
-				# Aggiorna il movimento del paddle
-				game.paddle_movements[side] = movement
-				logger.info(f"[MOVE] Paddle '{side}' movimento impostato a {movement} nella partita {self.game_id}")
-
-			# Gestione del nuovo messaggio paddle_position per sincronizzazione diretta
-			elif msg_type == "paddle_position":
-				if not hasattr(game, 'game_started') or not game.game_started:
-					logger.warning(f"[POSITION IGNORED] Posizionamento prima dell'inizio della partita {self.game_id}")
-					return
-				
-				position = content.get("position")
-				if position is None:
-					logger.warning(f"[POSITION] Posizione non specificata")
-					return
-				
-				side = getattr(self, 'side', None)
-				if not side or side not in game.state["paddles"]:
-					logger.error(f"[POSITION] Paddle '{getattr(self, 'side', None)}' non trovato nella partita {self.game_id}")
-					return
-				
-				# Controlla che la posizione sia valida (tra 0 e 0.8)
-				paddle_height = 0.2
-				position = max(0.0, min(1.0 - paddle_height, float(position)))
-				
-				# Imposta direttamente la posizione del paddle
-				game.state["paddles"][side] = position
-				
-				# Notifica la posizione solo al giocatore avversario per ottimizzare la frequenza
-				try:
-					# Trova l'avversario
-					if side == "left" and game.player2:
-						await game.player2.send_json({
-							"type": "game_update",
-							"ballX": game.state["ball_position"]["x"] * 1000,
-							"ballY": game.state["ball_position"]["y"] * 500,
-							"paddle1Y": game.state["paddles"]["left"] * 500,
-							"paddle2Y": game.state["paddles"]["right"] * 500,
-							"player1Score": game.state["scores"]["left"],
-							"player2Score": game.state["scores"]["right"]
-						})
-					elif side == "right" and game.player1:
-						await game.player1.send_json({
-							"type": "game_update",
-							"ballX": game.state["ball_position"]["x"] * 1000,
-							"ballY": game.state["ball_position"]["y"] * 500,
-							"paddle1Y": game.state["paddles"]["left"] * 500,
-							"paddle2Y": game.state["paddles"]["right"] * 500,
-							"player1Score": game.state["scores"]["left"],
-							"player2Score": game.state["scores"]["right"]
-						})
-				except Exception as e:
-					logger.warning(f"[POSITION] Errore nell'invio dell'aggiornamento: {e}")
-					# Se fallisce, usa la notifica standard come fallback
-					await game.notify_players()
+			# Handle paddle movement (start/stop) e posizione diretta
+			elif msg_type in ("paddle_move", "paddle_position"):
+				self.post_paddle_input(game, content)
 
 			# 👥 Riconnessione client già assegnato
 			elif msg_type == "join":
@@ -1247,10 +1863,11 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 				if game.player1 and game.player2:
 					if self.side == "left":  # Solo Player1 può avviare
 						if not hasattr(game, 'game_started') or not game.game_started:
-							logger.info(f"[START GAME] Avvio partita {self.game_id}")
+							logger.info("[START GAME] Avvio partita %s", self.game_id)
 							
 							# Notify players that the game is starting
-							await self.channel_layer.group_send(
+							await timed_group_send(
+								self.channel_layer,
 								self.room_group_name,
 								{
 									"type": "game_start",
@@ -1261,58 +1878,83 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 							
 							await game.start_game()
 						else:
-							logger.warning(f"[START GAME] Partita {self.game_id} già avviata")
+							logger.warning("[START GAME] Partita %s già avviata", self.game_id)
 					else:
-						logger.warning(f"[START GAME] Solo Player1 può avviare la partita {self.game_id}")
+						logger.warning("[START GAME] Solo Player1 può avviare la partita %s", self.game_id)
 				else:
-					logger.warning(f"[START GAME] Impossibile avviare {self.game_id}: mancano giocatori")
+					logger.warning("[START GAME] Impossibile avviare %s: mancano giocatori", self.game_id)
 					await self.send_json({"type": "error", "message": "Waiting for both players to join"})
 			
+			# Conferma di ricezione di uno snapshot: diventa il baseline dei delta
+			elif msg_type == "snapshot_ack":
+				tick = content.get("tick")
+				if isinstance(tick, int) and (self.acked_tick is None or tick > self.acked_tick):
+					self.acked_tick = tick
+
+			# Il client ha perso il baseline: invia un keyframe completo
+			elif msg_type == "resync_request":
+				self.acked_tick = None
+				latest = game.snapshots.latest()
+				if latest:
+					await self.send_snapshot(game, latest)
+
 			# Handle ping messages to check connection
 			elif msg_type == "ping":
 				await self.send_json({"type": "pong"})
-				logger.debug(f"[PING] Ping ricevuto da {self.channel_name}, pong inviato")
+				logger.debug("[PING] Ping ricevuto da %s, pong inviato", self.channel_name)
 				
 		except Exception as e:
-			logger.error(f"[ERROR] Errore durante l'elaborazione del messaggio: {str(e)}")
+			logger.error("[ERROR] Errore durante l'elaborazione del messaggio: %s", str(e))
 			import traceback
 			logger.error(traceback.format_exc())
+		finally:
+			unbind_room(token)
 			
 	async def game_start(self, event):
 		"""Handle game start event"""
 		await self.send_json({
 			"type": "game_start",
 			"player1_name": event["player1_name"],
-			"player2_name": event["player2_name"]
+			"player2_name": event["player2_name"],
+			"resumed": event.get("resumed", False),
 		})
 		
 	# Handler for the 'game_state_update' event that sends the new state to each client
 	async def game_state_update(self, event):
+		"""Snapshot ricevuto dal channel layer (stanza con shared_group)."""
+		snapshot = event["snapshot"]
+		game = GameConsumer.game_rooms.get(self.room_group_name)
+		if game is not None and game.instance_id == event.get("room"):
+			# Stessa stanza: usa la sua copia, a cui sono associati i frame già codificati
+			snapshot = game.snapshots.get(snapshot["tick"]) or snapshot
+		else:
+			# Snapshot di una stanza omonima su un altro worker: codifica locale
+			game = None
+		await self.send_snapshot(game, snapshot)
+
+	async def send_snapshot(self, game, snapshot):
+		"""Invia uno snapshot al client nel formato negoziato (JSON delta o binario)."""
 		try:
-			state = event.get("state", {})
-			ball_position = state.get("ball_position", {"x": 0.5, "y": 0.5})
-			paddles = state.get("paddles", {"left": 0.5, "right": 0.5})
-			scores = state.get("scores", {"left": 0, "right": 0})
-			
-			await self.send_json({
-				"type": "game_update",
-				"ballX": ball_position["x"] * 1000,  # Scale to canvas size
-				"ballY": ball_position["y"] * 500,
-				"paddle1Y": paddles["left"] * 500,
-				"paddle2Y": paddles["right"] * 500,
-				"player1Score": scores["left"],
-				"player2Score": scores["right"]
-			})
+			if game is None:
+				# Stanza non presente in questo processo: codifica locale
+				if self.binary_frames:
+					await self.send(bytes_data=encode_snapshot(snapshot))
+				else:
+					await self.send_json(dict(snapshot, type="game_update", keyframe=True))
+			elif self.binary_frames:
+				# Frame binario a layout fisso: sempre completo, nessun ack necessario
+				await self.send(bytes_data=game.encoded_binary_frame(snapshot))
+			else:
+				# Delta rispetto all'ultimo snapshot confermato dal client
+				await self.send(text_data=game.encoded_frame(snapshot, self.acked_tick))
 		except Exception as e:
-			logger.error(f"[ERROR] Errore durante l'invio dell'aggiornamento di stato: {str(e)}")
+			logger.error("[ERROR] Errore durante l'invio dell'aggiornamento di stato: %s", str(e))
 			import traceback
 			logger.error(traceback.format_exc())
 		
 	async def game_end(self, event):
 		"""Handle game end event"""
-		import logging
-		logger = logging.getLogger(__name__)
-		logger.error(f"[GAME END] INIZIO gestione game_end: {event}")
+		logger.debug("[GAME END] INIZIO gestione game_end: %s", event)
 		
 		await self.send_json({
 			"type": "game_end",
@@ -1331,36 +1973,36 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 			def get_session_info():
 				session = GameSession.objects.filter(game_id=self.game_id).first()
 				if session:
-					logger.error(f"[GAME END] Trovata sessione {self.game_id}, tipo: {session.session_type}")
+					logger.debug("[GAME END] Trovata sessione %s, tipo: %s", self.game_id, session.session_type)
 					return {
 						'type': session.session_type,
 						'player1': session.player1.username if session.player1 else None,
 						'player2': session.player2.username if session.player2 else None
 					}
-				logger.error(f"[GAME END] Sessione {self.game_id} non trovata")
+				logger.warning("[GAME END] Sessione %s non trovata", self.game_id)
 				return None
 				
 			session_info = await get_session_info()
 			
 			if session_info and session_info['type'] == 'tournament':
-				logger.error(f"[GAME END] Chiamata update_tournament_match per partita di torneo tra {session_info['player1']} e {session_info['player2']}")
+				logger.info("[GAME END] Chiamata update_tournament_match per partita di torneo tra %s e %s", session_info['player1'], session_info['player2'])
 				# Esegui l'aggiornamento in modo asincrono
 				asyncio.create_task(self.update_tournament_match(
 					self.game_id, 
 					event["player1_score"], 
 					event["player2_score"]
 				))
-				logger.error(f"[GAME END] Task update_tournament_match creato")
+				logger.debug("[GAME END] Task update_tournament_match creato")
 				
 				# Attendi un po' prima di considerare la partita conclusa
 				# per dare tempo all'aggiornamento del match del torneo
 				await asyncio.sleep(1.5)
 		except Exception as e:
-			logger.error(f"[GAME END] Errore durante la verifica/aggiornamento del torneo: {str(e)}")
+			logger.error("[GAME END] Errore durante la verifica/aggiornamento del torneo: %s", str(e))
 			import traceback
 			logger.error(traceback.format_exc())
 			
-		logger.error("[GAME END] FINE gestione game_end")
+		logger.debug("[GAME END] FINE gestione game_end")
 
 	async def all_players_ready(self, event):
 		"""Handle all players ready event"""
@@ -0,0 +1,284 @@
+import contextlib
+import logging
+import time
+import traceback
+
+from backend.game.game_logging import bind_room, unbind_room
+from backend.game.game_metrics import TICK_BALL_BATCH
+from backend.game.game_physics import (
+	BALL_RADIUS, PADDLE_HEIGHT, MAX_MULTIPLIER, MULTIPLIER_GROWTH,
+	MAX_SWEEP_EVENTS, INF, NO_GOAL, GOAL_LEFT, GOAL_RIGHT,
+)
+
+try:
+	import numpy as np
+except ImportError:  # NumPy è opzionale: senza, lo scheduler usa il percorso scalare
+	np = None
+
+logger = logging.getLogger(__name__)
+
+# Motore di fisica vettoriale (struct-of-arrays) per tutte le stanze del processo.
+# Ad ogni tick lo stato di palla e paddle delle stanze viene raccolto in array
+# NumPy (una colonna per campo), avanzato con poche operazioni vettoriali e
+# riscritto nelle stanze. Deve produrre gli stessi risultati di
+# game_physics.move_paddle/step_ball (verificato in tests.py).
+
+# Colonne della matrice di stato
+BALL_X, BALL_Y, BALL_VX, BALL_VY, MULTIPLIER, PADDLE_LEFT, PADDLE_RIGHT, MOVE_LEFT, MOVE_RIGHT, \
+	LEFT_X, RIGHT_X, PADDLE_STEP, STEP_SCALE = range(13)
+N_COLUMNS = 13
+
+
+def step_paddles_batch(paddles, movements, amount):
+	"""Versione vettoriale di game_physics.move_paddle."""
+	moved = np.clip(paddles + movements * amount, 0.0, 1.0 - PADDLE_HEIGHT)
+	return np.where(movements != 0, moved, paddles)
+
+
+def step_ball_batch(x, y, vx, vy, multiplier, paddle_left, paddle_right, left_x, right_x, scale):
+	"""
+	Versione vettoriale di game_physics.step_ball (collisioni continue).
+
+	Restituisce (x, y, vx, vy, multiplier, goal) come array; per le stanze
+	con goal != NO_GOAL gli altri valori non sono significativi.
+	"""
+	remaining = np.ones_like(x)
+	done = np.zeros(x.shape, dtype=bool)
+	for _ in range(MAX_SWEEP_EVENTS):
+		dx = vx * scale * remaining
+		dy = vy * scale * remaining
+
+		with np.errstate(divide="ignore", invalid="ignore"):
+			# Impatto con i bordi superiore e inferiore
+			low = (dy < 0) & (y + dy < BALL_RADIUS)
+			high = ~low & (dy > 0) & (y + dy > 1 - BALL_RADIUS)
+			t_wall = np.where(low, np.maximum(0.0, (BALL_RADIUS - y) / dy),
+				np.where(high, np.maximum(0.0, (1 - BALL_RADIUS - y) / dy), INF))
+
+			# Impatto con il piano del paddle verso cui si muove la palla
+			left = dx < 0
+			left_plane = left_x + BALL_RADIUS
+			right_plane = right_x - BALL_RADIUS
+			cross_left = left & (x + dx <= left_plane) & (x >= left_x - BALL_RADIUS)
+			cross_right = (dx > 0) & (x + dx >= right_plane) & (x <= right_x + BALL_RADIUS)
+			t_plane = np.where(cross_left, np.maximum(0.0, (left_plane - x) / dx),
+				np.where(cross_right, np.maximum(0.0, (right_plane - x) / dx), INF))
+		crossing = cross_left | cross_right
+		paddle_y = np.where(left, paddle_left, paddle_right)
+		y_hit = y + dy * np.where(crossing, t_plane, 0.0)
+		t_paddle = np.where(crossing & (paddle_y <= y_hit) & (y_hit <= paddle_y + PADDLE_HEIGHT), t_plane, INF)
+
+		t = np.minimum(t_wall, t_paddle)
+		free = ~done & (t > 1.0)
+		event = ~done & (t <= 1.0)
+		t = np.where(event, t, 0.0)
+
+		# Nessun impatto: percorre tutto il resto del passo
+		x = np.where(free, x + dx, x)
+		y = np.where(free, y + dy, y)
+		# Impatto: avanza fino all'impatto e applica il rimbalzo
+		x = np.where(event, x + dx * t, x)
+		y = np.where(event, y + dy * t, y)
+		remaining = np.where(event, remaining * (1 - t), remaining)
+
+		wall = event & (t_wall <= t_paddle)
+		y = np.where(wall, np.where(dy < 0, BALL_RADIUS, 1 - BALL_RADIUS), y)
+		vy = np.where(wall, np.where(dy < 0, np.abs(vy), -np.abs(vy)), vy)
+
+		hit = event & ~wall
+		multiplier = np.where(hit & (multiplier < MAX_MULTIPLIER), multiplier * MULTIPLIER_GROWTH, multiplier)
+		distanza = np.abs(paddle_y + PADDLE_HEIGHT / 2 - y)
+		factor = np.clip(1 - 0.3 * (distanza / (PADDLE_HEIGHT / 2)), 0.7, 1) * multiplier
+		vx = np.where(hit, np.where(left, factor, -factor), vx)
+		vy = np.where(hit, np.where(y < paddle_y + PADDLE_HEIGHT / 2, -multiplier, multiplier), vy)
+
+		done |= free
+		if done.all():
+			break
+
+	# Gestione punto segnato
+	goal = np.where(x + BALL_RADIUS < 0.0, GOAL_RIGHT, np.where(x - BALL_RADIUS > 1.0, GOAL_LEFT, NO_GOAL))
+
+	return x, y, vx, vy, multiplier, goal
+
+
+class BatchPhysicsEngine:
+	"""
+	Avanza un insieme di stanze con la fisica vettoriale.
+
+	Usato dal GameTickScheduler al posto di Game.run_due_ticks quando
+	settings.GAME_BATCH_PHYSICS è attivo e NumPy è installato.
+	"""
+
+	def __init__(self):
+		if np is None:
+			raise RuntimeError("BatchPhysicsEngine richiede NumPy")
+		self.batches = 0
+		self.room_ticks = 0
+
+	def gather(self, rooms):
+		"""Raccoglie lo stato delle stanze in una matrice (stanze x colonne)."""
+		return np.array([
+			(
+				room.state.ball_x, room.state.ball_y,
+				room.state.ball_vx, room.state.ball_vy,
+				room.current_multiplier,
+				room.state.paddle_left, room.state.paddle_right,
+				room.paddle_movements["left"], room.paddle_movements["right"],
+				room.paddle_positions["left"], room.paddle_positions["right"],
+				room.paddle_step, room.step_scale,
+			)
+			for room in rooms
+		], dtype=np.float64).reshape(len(rooms), N_COLUMNS)
+
+	def step(self, rooms):
+		"""Simula un tick per tutte le stanze. Restituisce l'esito (goal) per stanza."""
+		if not rooms:
+			return []
+		data = self.gather(rooms)
+
+		paddle_left = step_paddles_batch(data[:, PADDLE_LEFT], data[:, MOVE_LEFT], data[:, PADDLE_STEP])
+		paddle_right = step_paddles_batch(data[:, PADDLE_RIGHT], data[:, MOVE_RIGHT], data[:, PADDLE_STEP])
+		x, y, vx, vy, multiplier, goal = step_ball_batch(
+			data[:, BALL_X], data[:, BALL_Y], data[:, BALL_VX], data[:, BALL_VY], data[:, MULTIPLIER],
+			paddle_left, paddle_right, data[:, LEFT_X], data[:, RIGHT_X], data[:, STEP_SCALE],
+		)
+
+		# Riscrive i risultati nelle stanze (una conversione per colonna)
+		goals = goal.tolist()
+		for room, pl, pr, bx, by, bvx, bvy, mult, g in zip(
+			rooms, paddle_left.tolist(), paddle_right.tolist(), x.tolist(), y.tolist(),
+			vx.tolist(), vy.tolist(), multiplier.tolist(), goals,
+		):
+			state = room.state
+			state.paddle_left = pl
+			state.paddle_right = pr
+			room.current_multiplier = mult
+			if g == NO_GOAL:
+				state.ball_x, state.ball_y = bx, by
+				state.ball_vx, state.ball_vy = bvx, bvy
+
+		self.batches += 1
+		self.room_ticks += len(rooms)
+		return goals
+
+	async def run_rooms(self, rooms):
+		"""
+		Equivalente batch di Game.run_due_ticks per un gruppo di stanze: ogni
+		tick viene simulato con i lock di tutte le stanze del batch, così input,
+		sospensioni e trasferimenti non si intrecciano con l'avanzamento.
+		"""
+		due = {}
+		for room in rooms:
+			n = room.clock.due_ticks()
+			if n:
+				due[room] = n
+		if not due:
+			return
+
+		failed = set()
+		for k in range(max(due.values())):
+			batch = [room for room, n in due.items() if n > k and room not in failed]
+			if not batch:
+				break
+			async with contextlib.AsyncExitStack() as stack:
+				for room in batch:
+					await stack.enter_async_context(room.lock)
+				# Le stanze in pausa di servizio muovono solo i paddle
+				playing = []
+				for room in batch:
+					if not room.game_started:
+						continue
+					token = bind_room(room.events)
+					try:
+						if self._pre_step(room):
+							playing.append(room)
+					except Exception as e:
+						self._room_error(room, failed, e)
+					finally:
+						unbind_room(token)
+				goals = self._step_with_fallback(playing, failed)
+				# Gli eventi asincroni (gol, fine partita) restano per stanza
+				for room, goal in zip(playing, goals):
+					if goal != NO_GOAL:
+						await self._run_room_event(room, failed, room.on_goal, goal)
+
+		for room in due:
+			if room in failed:
+				continue
+			async with room.lock:
+				notified = await self._run_room_event(room, failed, room.maybe_notify)
+			# Reset contatore errori se l'aggiornamento va a buon fine
+			if notified:
+				room.error_count = 0
+
+	@staticmethod
+	def _pre_step(room):
+		"""Parte per stanza del tick. Restituisce True se la palla è in gioco."""
+		room.tick += 1
+		room.apply_inputs()
+		if room.advance_serve():
+			room.update_paddles()
+			return False
+		return True
+
+	def _step_with_fallback(self, playing, failed):
+		"""Avanza le stanze in gioco; se la fisica vettoriale fallisce usa quella scalare."""
+		if not playing:
+			return []
+		try:
+			started = time.perf_counter()
+			goals = self.step(playing)
+			TICK_BALL_BATCH.observe(time.perf_counter() - started)
+			return goals
+		except Exception as e:
+			logger.error("[BATCH] Errore nella fisica vettoriale, uso la fisica scalare: %s", e)
+			logger.error(traceback.format_exc())
+
+		goals = []
+		for room in playing:
+			token = bind_room(room.events)
+			try:
+				room.update_paddles()
+				goals.append(room.update_ball())
+			except Exception as e:
+				self._room_error(room, failed, e)
+				goals.append(NO_GOAL)
+			finally:
+				unbind_room(token)
+		return goals
+
+	async def _run_room_event(self, room, failed, handler, *args):
+		"""Esegue `handler` nel contesto della stanza (il lock è già preso). False in caso di errore."""
+		token = bind_room(room.events)
+		try:
+			await handler(*args)
+			return True
+		except Exception as e:
+			self._room_error(room, failed, e)
+			return False
+		finally:
+			unbind_room(token)
+
+	@staticmethod
+	def _room_error(room, failed, error):
+		"""Come in Game.run_due_ticks: la stanza salta il resto del batch e riparte dal tick corrente."""
+		failed.add(room)
+		room.error_count += 1
+		logger.error("[BATCH] Errore #%s nella stanza %s: %s", room.error_count, room.game_id, error)
+		if room.error_count >= 5:
+			logger.error("[BATCH] Troppi errori consecutivi nella stanza %s, terminazione", room.game_id)
+			logger.error(traceback.format_exc())
+			room.game_started = False
+		else:
+			room.clock.start()
+
+_engine = None
+
+
+def get_batch_engine():
+	"""Restituisce il motore batch del processo, o None se NumPy non è disponibile."""
+	global _engine
+	if _engine is None and np is not None:
+		_engine = BatchPhysicsEngine()
+	return _engine
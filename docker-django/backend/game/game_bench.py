@@ -0,0 +1,305 @@
+import asyncio
+import gc
+import json
+import logging
+import random
+import time
+import tracemalloc
+import uuid
+
+from channels.exceptions import StopConsumer
+
+from backend.game.game_physics import NO_GOAL
+
+# Benchmark headless della simulazione delle stanze (senza rete né event loop).
+# Misura le allocazioni del percorso di tick: a regime una stanza in gioco
+# non deve trattenere memoria né produrre oggetti che richiedano il garbage
+# collector (vedi game_state.RoomState).
+
+INPUT_EVERY_TICKS = 30  # Un cambio di direzione per lato ogni mezzo secondo a 60 Hz
+
+
+def make_rooms(count, tick_rate=120, seed=0):
+	"""Stanze in gioco, con seed diversi, pronte per simulate_tick."""
+	from backend.game.consumers import Game
+
+	rng = random.Random(seed)
+	rooms = []
+	for _ in range(count):
+		room = Game(tick_rate=tick_rate)
+		room.reset_match(rng.getrandbits(32))
+		room.game_started = True
+		rooms.append(room)
+	return rooms
+
+
+def run_ticks(rooms, ticks, rng):
+	"""Avanza tutte le stanze di `ticks` tick, con input casuali come quelli dei client."""
+	for _ in range(ticks):
+		for room in rooms:
+			if room.tick % INPUT_EVERY_TICKS == 0:
+				room.inputs.post("left", movement=rng.choice((-1, 0, 1)))
+				room.inputs.post("right", movement=rng.choice((-1, 0, 1)))
+			goal = room.simulate_tick()
+			if goal != NO_GOAL:
+				room.score_goal(goal)
+
+
+def measure_tick_allocations(rooms=50, ticks=2000, tick_rate=120, seed=0, warmup_ticks=200):
+	"""
+	Memoria trattenuta, picco di memoria e raccolte del GC durante `ticks` tick
+	di `rooms` stanze, dopo un riscaldamento. Il tempo è misurato in un
+	passaggio separato, senza tracemalloc.
+	"""
+	rng = random.Random(seed)
+	games = make_rooms(rooms, tick_rate, seed)
+	run_ticks(games, warmup_ticks, rng)
+
+	started = time.perf_counter()
+	run_ticks(games, ticks, rng)
+	elapsed = time.perf_counter() - started
+
+	gc.collect()
+	collections = gc.get_stats()[0]["collections"]
+	tracemalloc.start()
+	try:
+		run_ticks(games, ticks, rng)
+		retained, peak = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+	collections = gc.get_stats()[0]["collections"] - collections
+
+	room_ticks = rooms * ticks
+	return {
+		"rooms": rooms,
+		"ticks": ticks,
+		"tick_rate": tick_rate,
+		"room_ticks_per_second": round(room_ticks / elapsed) if elapsed > 0 else None,
+		"retained_bytes": retained,
+		# Costante per stanza (i valori correnti dello stato), non cresce con i tick
+		"retained_bytes_per_room": round(retained / rooms, 1),
+		"peak_bytes": peak,
+		"gc_collections": collections,
+	}
+
+
+# Capacità di un worker: stanze complete (due GameConsumer per stanza, channel
+# layer in memoria) guidate dai percorsi reali: gli input dei client entrano da
+# dispatch()/receive_json e i tick da Game.run_due_ticks. Il tempo di gioco è
+# virtuale (un tick per giro su tutte le stanze), quindi la misura non è
+# limitata dalla frequenza dei tick: il tempo reale di un giro confrontato con
+# il budget del tick dice quante stanze il worker regge.
+
+ACK_EVERY_TICKS = INPUT_EVERY_TICKS
+MAX_SCORE = 4  # Sotto i 5 punti: la fine partita salverebbe lo storico nel database
+
+# Metriche confrontate con il baseline: True se più alto è meglio
+REGRESSION_METRICS = {
+	"room_ticks_per_second": True,
+	"tick_p50_ms": False,
+	"tick_p99_ms": False,
+	"memory_per_room_bytes": False,
+}
+
+
+class VirtualClock:
+	"""Tempo di gioco del benchmark, condiviso da clock delle stanze e rate limiter."""
+
+	def __init__(self, now=0.0):
+		self.now = now
+
+	def __call__(self):
+		return self.now
+
+
+class ClientSink:
+	"""Trasporto finto di un client: conta i messaggi WebSocket inviati dal consumer."""
+
+	def __init__(self):
+		self.messages = 0
+		self.bytes = 0
+
+	async def __call__(self, message):
+		if message["type"] == "websocket.send":
+			self.messages += 1
+			data = message.get("text") or message.get("bytes") or ""
+			self.bytes += len(data)
+
+
+def percentile(values, q):
+	ordered = sorted(values)
+	return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def connect_client(layer, game_id, binary=False):
+	"""GameConsumer collegato come da una connessione WebSocket reale (vedi RoomHost.join)."""
+	from django.contrib.auth.models import AnonymousUser
+	from backend.game.consumers import GameConsumer
+	from backend.game.game_protocol import BINARY_SUBPROTOCOL
+
+	consumer = GameConsumer()
+	consumer.scope = {
+		"type": "websocket",
+		"path": f"/ws/game/{game_id}/",
+		"query_string": b"",
+		"subprotocols": [BINARY_SUBPROTOCOL] if binary else [],
+		"client": ("127.0.0.1", 0),
+		"url_route": {"kwargs": {"game_id": game_id}},
+		"user": AnonymousUser(),
+	}
+	consumer.channel_layer = layer
+	consumer.channel_name = await layer.new_channel()
+	consumer.sink = ClientSink()
+	consumer.base_send = consumer.sink
+	await consumer.dispatch({"type": "websocket.connect"})
+	return consumer
+
+
+async def pump_channel(layer, consumer):
+	"""Consegna al consumer i messaggi del channel layer (eventi di gruppo)."""
+	while True:
+		message = await layer.receive(consumer.channel_name)
+		await consumer.dispatch(message)
+
+
+async def send_frame(consumer, content):
+	await consumer.dispatch({"type": "websocket.receive", "text": json.dumps(content)})
+
+
+async def measure_room_capacity(rooms=50, ticks=1200, tick_rate=120, seed=0, warmup_ticks=120, binary=False):
+	"""
+	Giri di tick al secondo, tempo di un giro (p50/p99) su tutte le stanze,
+	memoria per stanza e messaggi inviati ai client al secondo.
+	"""
+	from channels.layers import InMemoryChannelLayer
+	from backend.game import game_registry
+	from backend.game.consumers import Game, GameConsumer
+	from backend.game.game_ratelimit import InboundRateLimiter
+	from backend.game.game_registry import LocalRoomRegistry, RoomHost
+
+	rng = random.Random(seed)
+	clock = VirtualClock()
+	layer = InMemoryChannelLayer(capacity=10000)
+	previous_host = game_registry._room_host
+	host = game_registry._room_host = RoomHost(layer, LocalRoomRegistry(), "bench")
+	games, clients, pumps = [], [], []
+
+	tracemalloc.start()
+	try:
+		await host.start()
+		before = tracemalloc.get_traced_memory()[0]
+		# I log delle connessioni (sessione assente, stanza creata) non fanno parte della misura
+		logging.disable(logging.WARNING)
+		for _ in range(rooms):
+			game_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+			# Stanza creata prima delle connessioni: frequenza del benchmark, clock
+			# virtuale e nessun checkpoint da leggere (nessun servizio esterno)
+			room = Game(game_id, channel_layer=layer, tick_rate=tick_rate)
+			room.clock.time_func = clock
+			room.restore_checked = True
+			GameConsumer.game_rooms[f"game_{game_id}"] = room
+			pair = [await connect_client(layer, game_id, binary) for _ in range(2)]
+			for client in pair:
+				# Budget degli input sul tempo di gioco, non su quello reale del benchmark
+				client.rate_limiter = InboundRateLimiter(time_func=clock)
+				pumps.append(asyncio.create_task(pump_channel(layer, client)))
+			# Avvio senza start_game(): niente sessione nel database né scheduler,
+			# i tick sono guidati dal benchmark
+			room.reset_match(rng.getrandbits(32))
+			room.game_started = True
+			room.update_lobby_timers()
+			room.clock.start()
+			games.append(room)
+			clients.append(pair)
+			await asyncio.sleep(0)
+		logging.disable(logging.NOTSET)
+
+		async def play(count, tick_times=None):
+			interval = 1 / tick_rate
+			for _ in range(count):
+				clock.now += interval
+				started = time.perf_counter()
+				for index, (room, pair) in enumerate(zip(games, clients)):
+					# Input sfasati tra le stanze, come quelli di client indipendenti
+					phase = room.tick + index
+					if phase % INPUT_EVERY_TICKS == 0:
+						for client in pair:
+							action = rng.choice(("start", "start", "stop"))
+							await send_frame(client, {"type": "paddle_move", "direction": rng.choice(("up", "down")), "action": action, "seq": room.tick})
+					if phase % ACK_EVERY_TICKS == ACK_EVERY_TICKS // 2:
+						latest = room.snapshots.latest()
+						if latest is not None:
+							for client in pair:
+								await send_frame(client, {"type": "snapshot_ack", "tick": latest["tick"]})
+					await room.run_due_ticks()
+					if room.state.score_left >= MAX_SCORE or room.state.score_right >= MAX_SCORE:
+						room.state.set_scores(0, 0)
+				# Eventi di gruppo in coda (gol, stato dei giocatori)
+				await asyncio.sleep(0)
+				if tick_times is not None:
+					tick_times.append(time.perf_counter() - started)
+
+		await play(warmup_ticks)
+		memory = tracemalloc.get_traced_memory()[0] - before
+		tracemalloc.stop()
+
+		gc.collect()
+		sinks = [client.sink for pair in clients for client in pair]
+		messages = sum(sink.messages for sink in sinks)
+		sent_bytes = sum(sink.bytes for sink in sinks)
+		tick_times = []
+		started = time.perf_counter()
+		await play(ticks, tick_times)
+		elapsed = time.perf_counter() - started
+		messages = sum(sink.messages for sink in sinks) - messages
+		sent_bytes = sum(sink.bytes for sink in sinks) - sent_bytes
+	finally:
+		logging.disable(logging.NOTSET)
+		if tracemalloc.is_tracing():
+			tracemalloc.stop()
+		for task in pumps:
+			task.cancel()
+		logging.disable(logging.WARNING)
+		for room, pair in zip(games, clients):
+			# Partita ferma: la disconnessione chiude la stanza senza tempo di grazia
+			room.game_started = False
+			for client in pair:
+				try:
+					await client.dispatch({"type": "websocket.disconnect", "code": 1000})
+				except StopConsumer:
+					pass
+		await host.stop()
+		game_registry._room_host = previous_host
+		logging.disable(logging.NOTSET)
+
+	budget = 1 / tick_rate
+	p50 = percentile(tick_times, 0.5) if tick_times else None
+	p99 = percentile(tick_times, 0.99) if tick_times else None
+	return {
+		"rooms": rooms,
+		"ticks": ticks,
+		"tick_rate": tick_rate,
+		"binary": binary,
+		"room_ticks_per_second": round(rooms * ticks / elapsed) if elapsed > 0 else None,
+		"tick_p50_ms": round(p50 * 1000, 3) if p50 is not None else None,
+		"tick_p99_ms": round(p99 * 1000, 3) if p99 is not None else None,
+		"tick_budget_ms": round(budget * 1000, 3),
+		# Stanze che stanno nel budget del tick al p99, a parità di carico per stanza
+		"estimated_capacity": int(rooms * budget / p99) if p99 else None,
+		"memory_per_room_bytes": round(memory / rooms) if rooms else None,
+		"messages_per_second": round(messages / elapsed) if elapsed > 0 else None,
+		"bytes_per_second": round(sent_bytes / elapsed) if elapsed > 0 else None,
+	}
+
+
+def check_regressions(result, baseline, tolerance=0.1):
+	"""Metriche peggiorate di oltre `tolerance` (frazione) rispetto a `baseline`."""
+	regressions = []
+	for metric, higher_is_better in REGRESSION_METRICS.items():
+		current, reference = result.get(metric), baseline.get(metric)
+		if current is None or not reference:
+			continue
+		change = (current - reference) / reference
+		if (change < -tolerance) if higher_is_better else (change > tolerance):
+			regressions.append(f"{metric}: {current} (baseline {reference}, {change:+.1%})")
+	return regressions
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import os
+import time
+
+try:
+	import redis.asyncio as aioredis
+except ImportError:
+	aioredis = None
+
+from backend.game.game_protocol import dumps, loads
+from backend.game.game_replay import capture_state
+
+logger = logging.getLogger(__name__)
+
+# Checkpoint delle stanze per la ripresa dopo un crash del worker.
+# Ogni stanza in gioco salva uno stato compatto (capture_state: palla,
+# paddle, moltiplicatore, punteggi, tick, più i giocatori e gli ultimi
+# numeri di sequenza) ogni GAME_CHECKPOINT_SECONDS e dopo ogni gol, su Redis
+# o su disco. Se il worker muore, il primo worker che riceve di nuovo la
+# stanza (vedi game_registry) la ricostruisce dal checkpoint e la partita
+# riprende quando entrambi i giocatori sono tornati, senza abbandono 3-0.
+# Il checkpoint viene cancellato a fine partita o dopo un abbandono reale.
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_KEY = "pong:checkpoint:{}"
+
+
+def checkpoint_state(room):
+	"""Stato compatto di una stanza da salvare nel checkpoint."""
+	checkpoint = capture_state(room)
+	checkpoint.update({
+		"version": CHECKPOINT_VERSION,
+		"game_id": str(room.game_id),
+		"tick_rate": room.tick_rate,
+		"game_started": room.game_started,
+		"input_seq": [room.input_seq["left"], room.input_seq["right"]],
+		"players": [player_id(room.player1), player_id(room.player2)],
+		"saved_at": time.time(),
+	})
+	return checkpoint
+
+
+def player_id(consumer):
+	"""Id dell'utente autenticato di un consumer (None se anonimo o assente)."""
+	user = consumer.scope.get("user") if consumer is not None else None
+	if user is None or not user.is_authenticated:
+		return None
+	return user.pk
+
+
+class DiskCheckpointStore:
+	"""Un file JSON per stanza, sostituito atomicamente a ogni salvataggio."""
+
+	def __init__(self, directory, ttl_seconds=300):
+		self.directory = directory
+		self.ttl_seconds = ttl_seconds
+		os.makedirs(directory, exist_ok=True)
+
+	def path(self, game_id):
+		return os.path.join(self.directory, f"{game_id}.json")
+
+	def _write(self, game_id, checkpoint):
+		path = self.path(game_id)
+		tmp_path = f"{path}.tmp"
+		with open(tmp_path, "w", encoding="utf-8") as f:
+			f.write(dumps(checkpoint))
+		os.replace(tmp_path, path)
+
+	def _read(self, game_id):
+		try:
+			with open(self.path(game_id), encoding="utf-8") as f:
+				checkpoint = loads(f.read())
+		except FileNotFoundError:
+			return None
+		if time.time() - checkpoint.get("saved_at", 0) > self.ttl_seconds:
+			return None
+		return checkpoint
+
+	def _remove(self, game_id):
+		try:
+			os.remove(self.path(game_id))
+		except FileNotFoundError:
+			pass
+
+	async def save(self, game_id, checkpoint):
+		await asyncio.get_running_loop().run_in_executor(None, self._write, game_id, checkpoint)
+
+	async def load(self, game_id):
+		return await asyncio.get_running_loop().run_in_executor(None, self._read, game_id)
+
+	async def delete(self, game_id):
+		await asyncio.get_running_loop().run_in_executor(None, self._remove, game_id)
+
+
+class RedisCheckpointStore:
+	"""Checkpoint su Redis, con scadenza: una stanza non ripresa entro `ttl_seconds` è persa."""
+
+	def __init__(self, url, ttl_seconds=300):
+		if aioredis is None:
+			raise ImportError("redis non è installato")
+		self.ttl_seconds = ttl_seconds
+		self.redis = aioredis.from_url(url, decode_responses=True)
+
+	async def save(self, game_id, checkpoint):
+		await self.redis.set(CHECKPOINT_KEY.format(game_id), dumps(checkpoint), ex=self.ttl_seconds)
+
+	async def load(self, game_id):
+		data = await self.redis.get(CHECKPOINT_KEY.format(game_id))
+		return loads(data) if data else None
+
+	async def delete(self, game_id):
+		await self.redis.delete(CHECKPOINT_KEY.format(game_id))
+
+
+class CheckpointWriter:
+	"""
+	Salvataggi di una stanza senza bloccare il loop di gioco: al più una
+	scrittura in corso; i checkpoint arrivati nel frattempo sono sostituiti
+	dall'ultimo.
+	"""
+
+	def __init__(self, store, game_id):
+		self.store = store
+		self.game_id = str(game_id)
+		self._pending = None
+		self._task = None
+
+		# Statistiche
+		self.saved = 0
+		self.failed = 0
+
+	def submit(self, checkpoint):
+		self._pending = checkpoint
+		if self._task is None or self._task.done():
+			self._task = asyncio.create_task(self._drain())
+
+	async def _drain(self):
+		while self._pending is not None:
+			checkpoint, self._pending = self._pending, None
+			try:
+				await self.store.save(self.game_id, checkpoint)
+				self.saved += 1
+			except Exception as e:
+				self.failed += 1
+				logger.warning("[CHECKPOINT] Salvataggio fallito per la partita %s: %s", self.game_id, e)
+
+	async def flush(self):
+		"""Attende la scrittura in corso (e quella in attesa)."""
+		if self._task is not None:
+			await self._task
+
+	async def discard(self):
+		"""Partita conclusa: niente più salvataggi e checkpoint cancellato."""
+		self._pending = None
+		await self.flush()
+		try:
+			await self.store.delete(self.game_id)
+		except Exception as e:
+			logger.warning("[CHECKPOINT] Cancellazione fallita per la partita %s: %s", self.game_id, e)
+
+
+_checkpoint_store = None
+
+
+def get_checkpoint_store():
+	"""Store dei checkpoint da settings.GAME_CHECKPOINT_STORE ("redis", "disk"); None se disattivati."""
+	global _checkpoint_store
+	if _checkpoint_store is None:
+		from django.conf import settings
+		kind = getattr(settings, "GAME_CHECKPOINT_STORE", "")
+		ttl_seconds = getattr(settings, "GAME_CHECKPOINT_TTL", 300)
+		try:
+			if kind == "redis":
+				_checkpoint_store = RedisCheckpointStore(settings.GAME_ROOM_REGISTRY_URL, ttl_seconds=ttl_seconds)
+			elif kind == "disk":
+				_checkpoint_store = DiskCheckpointStore(settings.GAME_CHECKPOINT_DIR, ttl_seconds=ttl_seconds)
+		except (ImportError, AttributeError, OSError) as e:
+			logger.warning("[CHECKPOINT] Store %s non disponibile, checkpoint disattivati: %s", kind, e)
+	return _checkpoint_store
@@ -0,0 +1,61 @@
+import time
+
+# Clock a passo fisso per la simulazione delle partite remote.
+# Il tempo di simulazione avanza solo a multipli esatti di `interval`:
+# il ritardo del loop non si accumula (drift-free) e i tick persi vengono
+# recuperati fino a `max_catchup_ticks` per iterazione.
+
+
+class FixedTimestepClock:
+	"""
+	Scheduler a passo fisso basato su time.monotonic().
+
+	Ogni chiamata a due_ticks() restituisce quanti tick di simulazione sono
+	scaduti dall'ultima chiamata. Se il loop è rimasto indietro di più di
+	max_catchup_ticks tick, quelli in eccesso vengono scartati (skipped_ticks)
+	invece di essere simulati tutti insieme.
+	"""
+
+	def __init__(self, interval, max_catchup_ticks=5, time_func=time.monotonic):
+		self.interval = interval
+		self.max_catchup_ticks = max_catchup_ticks
+		self.time_func = time_func
+
+		self.next_tick_time = None  # Istante (monotonic) del prossimo tick
+		self.overruns = 0           # Iterazioni in cui il loop era in ritardo di più di un tick
+		self.skipped_ticks = 0      # Tick scartati perché oltre il limite di recupero
+
+	def start(self, offset=0.0):
+		"""Avvia il clock: il primo tick scade dopo un intervallo (+ offset)."""
+		self.next_tick_time = self.time_func() + self.interval + offset
+
+	def start_at(self, when):
+		"""Avvia il clock con il primo tick all'istante monotonic `when`."""
+		self.next_tick_time = when
+
+	def due_ticks(self):
+		"""Restituisce il numero di tick da simulare adesso e avanza il clock."""
+		if self.next_tick_time is None:
+			self.start()
+
+		now = self.time_func()
+		if now < self.next_tick_time:
+			return 0
+
+		due = int((now - self.next_tick_time) // self.interval) + 1
+		# Avanza sempre di un numero intero di intervalli: nessun drift
+		self.next_tick_time += due * self.interval
+
+		if due > 1:
+			self.overruns += 1
+		if due > self.max_catchup_ticks:
+			self.skipped_ticks += due - self.max_catchup_ticks
+			due = self.max_catchup_ticks
+
+		return due
+
+	def time_until_next_tick(self):
+		"""Secondi mancanti al prossimo tick (0 se già scaduto)."""
+		if self.next_tick_time is None:
+			return 0.0
+		return max(0.0, self.next_tick_time - self.time_func())
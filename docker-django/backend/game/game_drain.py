@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+import signal
+
+from backend.game.game_checkpoint import get_checkpoint_store
+from backend.game.game_logging import process_task
+
+logger = logging.getLogger(__name__)
+
+# Drain del worker per i deploy a rotazione (SIGUSR1 o messaggio worker.drain,
+# vedi manage.py drain_worker).
+#   1. Il worker smette di accettare stanze: le nuove vengono assegnate a un
+#      altro worker (RoomHost.claim) e le connessioni inoltrate.
+#   2. Le stanze in attesa passano subito a un altro worker; quelle in gioco
+#      hanno GAME_DRAIN_GRACE_SECONDS per finire, poi vengono sospese con un
+#      checkpoint (game_checkpoint) e il lease passa al nuovo worker.
+#   3. I client ricevono `migrate` con il worker di destinazione e si
+#      riconnettono; la partita riprende dal checkpoint, senza abbandono.
+# Quando il worker è vuoto (o scade GAME_DRAIN_TIMEOUT_SECONDS) rilascia i
+# lease e, con GAME_DRAIN_EXIT, termina il processo.
+
+MIGRATE_CLOSE_CODE = 4012
+POLL_SECONDS = 1
+
+
+async def hand_off_room(host, room, peer):
+	"""Passa `room` al worker `peer`. Restituisce False se la partita non può essere trasferita."""
+	game_id = str(room.game_id)
+	if room.game_started:
+		# Senza uno store condiviso la partita non sopravvive al trasferimento
+		if get_checkpoint_store() is None:
+			return False
+		await room.suspend()
+	if not await host.registry.transfer(game_id, host.worker_id, peer):
+		logger.warning("[DRAIN] Lease della partita %s non più di questo worker", game_id)
+	host.owned.discard(game_id)
+	await evict_room(room, peer)
+	logger.info("[DRAIN] Partita %s trasferita al worker %s (tick %s)", game_id, peer, room.tick)
+	return True
+
+
+async def evict_room(room, worker):
+	"""Chiude `room` su questo worker e manda i suoi client al worker `worker`."""
+	# La stanza sparisce da questo worker prima che i client si riconnettano;
+	# le sue scadenze vengono annullate (il nuovo worker programma le proprie)
+	room.close_room()
+	for kind in list(room.timers):
+		room.cancel_timer(kind)
+	for consumer in [room.player1, room.player2] + list(room.spectators.members):
+		if consumer is not None:
+			await consumer.migrate(worker)
+
+
+def drain_settings():
+	"""(grace, timeout, exit) del drain da settings.GAME_DRAIN_*."""
+	from django.conf import settings
+	return (
+		getattr(settings, "GAME_DRAIN_GRACE_SECONDS", 20),
+		getattr(settings, "GAME_DRAIN_TIMEOUT_SECONDS", 120),
+		getattr(settings, "GAME_DRAIN_EXIT", True),
+	)
+
+
+def install_drain_signal_handler():
+	"""
+	SIGUSR1 (STOPSIGNAL del container) avvia il drain del worker. Va installato
+	all'avvio del processo ASGI (backend.asgi), nel thread principale, così
+	anche un worker senza ancora connessioni di gioco fa il drain invece di morire.
+	"""
+	try:
+		signal.signal(signal.SIGUSR1, _on_drain_signal)
+	except (AttributeError, ValueError):
+		# Piattaforma senza SIGUSR1 o import fuori dal thread principale
+		pass
+
+
+def _on_drain_signal(signum, frame):
+	try:
+		loop = asyncio.get_running_loop()
+	except RuntimeError:
+		# Server non ancora in ascolto: nessuna stanza né connessione da trasferire
+		logger.info("[DRAIN] Segnale di drain prima dell'avvio del server")
+		if drain_settings()[2]:
+			raise SystemExit(0)
+		return
+	loop.call_soon_threadsafe(lambda: process_task(_drain_on_signal()))
+
+
+async def _drain_on_signal():
+	from channels.layers import get_channel_layer
+	from backend.game.game_registry import get_room_host
+
+	host = await get_room_host(get_channel_layer())
+	host.request_drain()
+
+
+async def drain_worker(host, grace_seconds=None, timeout_seconds=None, exit_when_done=None):
+	"""Svuota il worker: vedi il commento in testa al modulo."""
+	from backend.game.consumers import GameConsumer
+
+	default_grace, default_timeout, default_exit = drain_settings()
+	if grace_seconds is None:
+		grace_seconds = default_grace
+	if timeout_seconds is None:
+		timeout_seconds = default_timeout
+	if exit_when_done is None:
+		exit_when_done = default_exit
+
+	loop = asyncio.get_running_loop()
+	started = loop.time()
+	host.accepting = False
+	await host.register()
+	logger.info("[DRAIN] Drain del worker %s: %s stanze, %s connessioni inoltrate", host.worker_id, len(GameConsumer.game_rooms), len(host.edges))
+
+	handed_off = 0
+	try:
+		while True:
+			elapsed = loop.time() - started
+			# Connessioni inoltrate: il client si riconnette direttamente al proprietario
+			for edge in list(host.edges):
+				await edge.migrate(edge.forward_owner)
+
+			for room in list(GameConsumer.game_rooms.values()):
+				# Le partite brevi hanno tempo per finire qui
+				if room.game_started and elapsed < grace_seconds:
+					continue
+				peer = await host.pick_peer()
+				if peer is None:
+					break
+				try:
+					if await hand_off_room(host, room, peer):
+						handed_off += 1
+				except Exception as e:
+					logger.error("[DRAIN] Trasferimento della partita %s fallito: %s", room.game_id, e)
+
+			if not GameConsumer.game_rooms and not host.edges and not host.proxies:
+				break
+			# Nessun altro worker: si aspettano solo le partite in corso
+			if not any(room.game_started for room in GameConsumer.game_rooms.values()) and await host.pick_peer() is None:
+				break
+			if elapsed >= timeout_seconds:
+				logger.warning("[DRAIN] Timeout: %s stanze ancora attive", len(GameConsumer.game_rooms))
+				break
+			await asyncio.sleep(POLL_SECONDS)
+	finally:
+		logger.info("[DRAIN] Drain completato in %.1fs: %s partite trasferite", loop.time() - started, handed_off)
+		await host.stop()
+
+	if exit_when_done:
+		os.kill(os.getpid(), signal.SIGTERM)
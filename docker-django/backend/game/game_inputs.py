@@ -0,0 +1,74 @@
+import time
+
+# Casella degli input dei giocatori per una stanza.
+# receive_json non modifica più lo stato della partita: deposita l'input qui
+# (senza lock, tutto avviene nello stesso event loop) e la stanza lo applica
+# al prossimo confine di tick. Per ogni lato vale l'ultimo input arrivato
+# prima del tick (last-write-wins), così l'ordine di applicazione è
+# deterministico e il loop di gioco non contende il lock con i consumer.
+
+SIDES = ("left", "right")
+
+
+class InputMailbox:
+	"""Input in attesa per lato, applicati una volta per tick."""
+
+	def __init__(self, time_func=time.monotonic):
+		self.time_func = time_func
+		self._pending = {}  # { lato: input }
+
+		# Statistiche
+		self.posted = 0     # Input ricevuti
+		self.coalesced = 0  # Input sovrascritti prima del tick successivo
+		self.applied = 0    # Input applicati alla simulazione
+		self.max_wait = 0.0  # Attesa massima fra arrivo e applicazione (s)
+
+	def post(self, side, movement=None, position=None, seq=None):
+		"""
+		Deposita un input per `side`.
+
+		`movement` (-1, 0, 1) e `position` (0-1) sovrascrivono quelli ancora in
+		attesa per lo stesso lato; `seq` è il numero di sequenza del client.
+		"""
+		self.posted += 1
+		pending = self._pending.get(side)
+		if pending is None:
+			pending = self._pending[side] = {"movement": None, "position": None, "seq": None, "received_at": self.time_func()}
+		else:
+			self.coalesced += 1
+			pending["received_at"] = self.time_func()
+		if movement is not None:
+			pending["movement"] = movement
+		if position is not None:
+			pending["position"] = position
+		if seq is not None:
+			pending["seq"] = seq
+
+	def drain(self):
+		"""Restituisce gli input in attesa nell'ordine dei lati e svuota la casella."""
+		if not self._pending:
+			return ()
+		now = self.time_func()
+		inputs = []
+		for side in SIDES:
+			pending = self._pending.pop(side, None)
+			if pending is not None:
+				self.max_wait = max(self.max_wait, now - pending["received_at"])
+				inputs.append((side, pending))
+		self._pending.clear()
+		self.applied += len(inputs)
+		return inputs
+
+	def clear(self):
+		self._pending.clear()
+
+	def __len__(self):
+		return len(self._pending)
+
+	def stats(self):
+		return {
+			"posted": self.posted,
+			"coalesced": self.coalesced,
+			"applied": self.applied,
+			"max_wait_ms": round(self.max_wait * 1000, 3),
+		}
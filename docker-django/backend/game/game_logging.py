@@ -0,0 +1,191 @@
+import asyncio
+import atexit
+import collections
+import contextvars
+import logging
+import logging.handlers
+import queue
+import sys
+
+# Logging del motore di gioco (logger backend.game, vedi LOGGING in settings).
+#  - Coda: il record viene solo accodato; formattazione e scrittura avvengono
+#    nel thread del QueueListener, fuori dall'event loop. I messaggi usano
+#    argomenti %-style, quindi la stringa viene costruita solo se il record
+#    viene davvero scritto.
+#  - Categorie: il tag iniziale del messaggio ("[RECEIVE] ...", "[LOOP] ...")
+#    è la categoria, con un livello proprio (GAME_LOG_CATEGORIES).
+#  - Campionamento: per le categorie ad alta frequenza (input, tick) viene
+#    scritto un record ogni N (GAME_LOG_SAMPLING).
+#  - Buffer per stanza: i record non scritti (sotto il livello della categoria
+#    o scartati dal campionamento) emessi mentre si lavora per una stanza
+#    (bind_room) finiscono in un buffer circolare della stanza; il buffer
+#    viene scritto solo quando la stanza registra un errore, prima dell'errore.
+#    I task di processo (scheduler, timing wheel, registro) vanno avviati con
+#    process_task, altrimenti erediterebbero il buffer della stanza che li avvia.
+
+DEFAULT_BUFFER_SIZE = 200
+
+_room_events = contextvars.ContextVar("pong_room_events", default=None)
+
+
+def parse_levels(spec):
+	"""'RECEIVE=WARNING,LOOP=INFO' -> { "RECEIVE": logging.WARNING, "LOOP": logging.INFO }."""
+	levels = {}
+	for item in (spec or "").split(","):
+		if "=" in item:
+			category, level = item.split("=", 1)
+			levels[category.strip().upper()] = logging.getLevelName(level.strip().upper())
+	return levels
+
+
+def parse_sampling(spec):
+	"""'MOVE=100,POSITION=50' -> { "MOVE": 100, "POSITION": 50 }."""
+	sampling = {}
+	for item in (spec or "").split(","):
+		if "=" in item:
+			category, every = item.split("=", 1)
+			sampling[category.strip().upper()] = max(1, int(every))
+	return sampling
+
+
+def record_category(record):
+	"""Tag iniziale del messaggio non formattato ("[GAME END] ..." -> "GAME END")."""
+	msg = record.msg
+	if isinstance(msg, str) and msg.startswith("["):
+		end = msg.find("]", 1)
+		if end > 0:
+			return msg[1:end]
+	return None
+
+
+class RoomEventLog:
+	"""Ultimi record di una stanza, scritti solo in caso di errore."""
+
+	__slots__ = ("game_id", "records")
+
+	def __init__(self, game_id, size=DEFAULT_BUFFER_SIZE):
+		self.game_id = game_id
+		self.records = collections.deque(maxlen=size)
+
+	def drain(self):
+		records = list(self.records)
+		self.records.clear()
+		return records
+
+
+def bind_room(events):
+	"""Associa il contesto corrente (task) al buffer di una stanza. Restituisce il token per unbind_room."""
+	return _room_events.set(events)
+
+
+def unbind_room(token):
+	_room_events.reset(token)
+
+
+def process_task(coro, loop=None):
+	"""Task condiviso da tutte le stanze del processo: non eredita il buffer di stanza del contesto che lo avvia."""
+	context = contextvars.copy_context()
+	context.run(_room_events.set, None)
+	return (loop or asyncio.get_running_loop()).create_task(coro, context=context)
+
+
+class GameLogHandler(logging.handlers.QueueHandler):
+	"""
+	QueueHandler con livelli per categoria, campionamento e buffer per stanza.
+	Il filtraggio avviene nel chiamante (costo di un accesso a dizionario),
+	la formattazione nel thread del listener verso `stream`.
+	"""
+
+	def __init__(self, default_level="INFO", categories="", sampling="", buffer_level="INFO", stream=None):
+		super().__init__(queue.SimpleQueue())
+		self.default_level = logging.getLevelName(default_level.upper()) if isinstance(default_level, str) else default_level
+		self.category_levels = parse_levels(categories) if isinstance(categories, str) else dict(categories)
+		self.sampling = parse_sampling(sampling) if isinstance(sampling, str) else dict(sampling)
+		self.buffer_level = logging.getLevelName(buffer_level.upper()) if isinstance(buffer_level, str) else buffer_level
+		self._sample_counts = collections.Counter()
+
+		# Statistiche
+		self.enqueued = 0
+		self.sampled_out = 0
+		self.dumps = 0
+
+		self.target = logging.StreamHandler(stream or sys.stderr)
+		self.listener = logging.handlers.QueueListener(self.queue, self.target)
+		self.listener.start()
+		self._stopped = False
+		atexit.register(self.stop)
+
+	def stop(self):
+		"""Scrive i record ancora in coda e ferma il thread del listener (idempotente)."""
+		if not self._stopped:
+			self._stopped = True
+			self.listener.stop()
+
+	def lowest_level(self):
+		"""Livello minimo da impostare sul logger perché i record arrivino fin qui."""
+		return min([self.default_level, self.buffer_level, *self.category_levels.values()])
+
+	def setFormatter(self, fmt):
+		# La formattazione avviene nel thread del listener
+		self.target.setFormatter(fmt)
+
+	def prepare(self, record):
+		# Coda nello stesso processo: il record viaggia non formattato
+		return record
+
+	def handle(self, record):
+		events = _room_events.get()
+		if not self.should_emit(record):
+			# Non scritto: resta nel buffer della stanza come contesto di un eventuale errore
+			if events is not None and record.levelno >= self.buffer_level:
+				events.records.append(record)
+			return False
+		if events is not None and record.levelno >= logging.ERROR:
+			self.dump_room(events, record)
+		self.enqueued += 1
+		self.enqueue(record)
+		return True
+
+	def should_emit(self, record):
+		category = record_category(record)
+		if record.levelno < self.category_levels.get(category, self.default_level):
+			return False
+		every = self.sampling.get(category)
+		if every is not None and record.levelno < logging.WARNING:
+			count = self._sample_counts[category]
+			self._sample_counts[category] = count + 1
+			if count % every:
+				self.sampled_out += 1
+				return False
+		return bool(self.filter(record))
+
+	def dump_room(self, events, error):
+		"""Scrive gli eventi recenti della stanza non ancora scritti (sotto livello o campionati) prima dell'errore."""
+		records = events.drain()
+		if not records:
+			return
+		self.dumps += 1
+		header = logging.LogRecord(
+			error.name, logging.ERROR, error.pathname, error.lineno,
+			"[ROOM LOG] Ultimi %d eventi della partita %s prima dell'errore:", (len(records), events.game_id), None,
+		)
+		self.enqueue(header)
+		for record in records:
+			self.enqueue(record)
+
+	def stats(self):
+		return {
+			"enqueued": self.enqueued,
+			"sampled_out": self.sampled_out,
+			"room_dumps": self.dumps,
+			"queue": self.queue.qsize(),
+		}
+
+
+def configure_game_logger(name="backend.game"):
+	"""Allinea il livello del logger al minimo richiesto dai GameLogHandler (dopo dictConfig)."""
+	logger = logging.getLogger(name)
+	levels = [h.lowest_level() for h in logger.handlers if isinstance(h, GameLogHandler)]
+	if levels:
+		logger.setLevel(min(levels))
+	return logger
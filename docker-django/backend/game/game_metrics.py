@@ -0,0 +1,302 @@
+import bisect
+import time
+
+# Metriche del motore di gioco in formato Prometheus (text exposition 0.0.4),
+# servite da /metrics su ogni worker (vedi game_views.metrics_view).
+# Sul percorso a 120 Hz si usano solo contatori e istogrammi già risolti per
+# etichetta (costanti di modulo più sotto): un'osservazione costa una
+# ricerca binaria sui bucket e tre somme, senza lock né allocazioni.
+# Le grandezze per stanza (tick, tick rate reale, tick scartati) non passano
+# dal percorso caldo: vengono lette dallo stato delle stanze al momento della
+# richiesta (collect_engine_metrics).
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket in secondi: fasi del tick (fino a un intervallo a 120 Hz e oltre)
+TICK_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+# Ritardi di risveglio dello scheduler e latenza del channel layer
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _format_value(value):
+	if isinstance(value, float):
+		if value == float("inf"):
+			return "+Inf"
+		return repr(value)
+	return str(value)
+
+
+def _escape(value):
+	return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+	pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+	if extra is not None:
+		pairs.append(f'{extra[0]}="{extra[1]}"')
+	return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+	__slots__ = ("value",)
+
+	def __init__(self):
+		self.value = 0
+
+	def inc(self, amount=1):
+		self.value += amount
+
+
+class Gauge:
+	__slots__ = ("value",)
+
+	def __init__(self):
+		self.value = 0
+
+	def set(self, value):
+		self.value = value
+
+	def inc(self, amount=1):
+		self.value += amount
+
+	def dec(self, amount=1):
+		self.value -= amount
+
+
+class Histogram:
+	"""Bucket fissi: `counts[i]` conta le osservazioni <= bounds[i] e > bounds[i-1]."""
+
+	__slots__ = ("bounds", "counts", "sum", "count")
+
+	def __init__(self, bounds):
+		self.bounds = bounds
+		self.counts = [0] * (len(bounds) + 1)  # L'ultimo è +Inf
+		self.sum = 0.0
+		self.count = 0
+
+	def observe(self, value):
+		self.counts[bisect.bisect_left(self.bounds, value)] += 1
+		self.sum += value
+		self.count += 1
+
+
+class MetricFamily:
+	"""Una metrica con le sue serie, una per combinazione di valori delle etichette."""
+
+	def __init__(self, name, help_text, kind, labelnames=(), buckets=None):
+		self.name = name
+		self.help_text = help_text
+		self.kind = kind
+		self.labelnames = tuple(labelnames)
+		self.buckets = tuple(buckets) if buckets is not None else None
+		self._children = {}
+
+	def _new_child(self):
+		if self.kind == "counter":
+			return Counter()
+		if self.kind == "gauge":
+			return Gauge()
+		return Histogram(self.buckets)
+
+	def labels(self, *values):
+		"""Serie per i valori di etichetta dati (creata al primo utilizzo)."""
+		values = tuple(str(v) for v in values)
+		child = self._children.get(values)
+		if child is None:
+			child = self._children[values] = self._new_child()
+		return child
+
+	def remove(self, *values):
+		self._children.pop(tuple(str(v) for v in values), None)
+
+	def clear(self):
+		self._children.clear()
+
+	def render(self, lines):
+		lines.append(f"# HELP {self.name} {self.help_text}")
+		lines.append(f"# TYPE {self.name} {self.kind}")
+		for values, child in list(self._children.items()):
+			if self.kind != "histogram":
+				lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}")
+				continue
+			cumulative = 0
+			for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+				cumulative += count
+				labels = _format_labels(self.labelnames, values, ("le", _format_value(float(bound))))
+				lines.append(f"{self.name}_bucket{labels} {cumulative}")
+			labels = _format_labels(self.labelnames, values)
+			lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+			lines.append(f"{self.name}_count{labels} {child.count}")
+
+
+class MetricsRegistry:
+	"""Metriche del processo; i collector aggiornano le grandezze lette su richiesta."""
+
+	def __init__(self):
+		self.families = {}
+		self.collectors = []
+
+	def _register(self, family):
+		if family.name in self.families:
+			raise ValueError(f"Metrica già registrata: {family.name}")
+		self.families[family.name] = family
+		return family
+
+	def counter(self, name, help_text, labelnames=()):
+		return self._register(MetricFamily(name, help_text, "counter", labelnames))
+
+	def gauge(self, name, help_text, labelnames=()):
+		return self._register(MetricFamily(name, help_text, "gauge", labelnames))
+
+	def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+		return self._register(MetricFamily(name, help_text, "histogram", labelnames, buckets))
+
+	def add_collector(self, collector):
+		self.collectors.append(collector)
+
+	def render(self):
+		"""Testo in formato Prometheus con lo stato attuale di tutte le metriche."""
+		for collector in self.collectors:
+			collector()
+		lines = []
+		for family in self.families.values():
+			family.render(lines)
+		return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+# Percorso caldo: aggiornate a ogni tick o a ogni invio
+TICK_PHASE_SECONDS = METRICS.histogram(
+	"pong_tick_phase_seconds", "Durata delle fasi del tick di simulazione",
+	("phase",), buckets=TICK_BUCKETS,
+)
+TICK_PADDLES = TICK_PHASE_SECONDS.labels("paddles")
+TICK_BALL = TICK_PHASE_SECONDS.labels("ball")
+TICK_BALL_BATCH = TICK_PHASE_SECONDS.labels("ball_batch")
+TICK_NOTIFY = TICK_PHASE_SECONDS.labels("notify")
+SCHEDULER_LATENESS = METRICS.histogram(
+	"pong_scheduler_lateness_seconds", "Ritardo di risveglio dello scheduler rispetto alla fase prevista",
+).labels()
+GROUP_SEND_SECONDS = METRICS.histogram(
+	"pong_group_send_seconds", "Latenza di channel_layer.group_send per tipo di messaggio", ("type",),
+)
+CONNECTED_SOCKETS = METRICS.gauge(
+	"pong_connected_sockets", "WebSocket aperti per tipo di consumer", ("consumer",),
+)
+
+# Lette su richiesta da collect_engine_metrics
+WORKER_INFO = METRICS.gauge("pong_worker_info", "Identificativo del worker", ("worker",))
+GAME_ROOMS = METRICS.gauge("pong_game_rooms", "Stanze in memoria (GameConsumer.game_rooms)")
+RUNNING_ROOMS = METRICS.gauge("pong_running_rooms", "Stanze registrate nello scheduler")
+SCHEDULER_DEADLINE_MISSES = METRICS.counter("pong_scheduler_deadline_misses_total", "Fasi dello scheduler che hanno sforato il budget")
+SCHEDULER_BUSY_RATIO = METRICS.gauge("pong_scheduler_busy_ratio", "Frazione del tick spesa a simulare (media mobile)")
+SKIPPED_TICKS = METRICS.counter("pong_skipped_ticks_total", "Tick scartati oltre il limite di recupero, tutte le stanze")
+ROOM_TICKS = METRICS.counter("pong_room_ticks_total", "Tick simulati dalla stanza", ("room",))
+ROOM_TICK_RATE = METRICS.gauge("pong_room_tick_rate", "Tick al secondo della stanza dall'ultima lettura", ("room",))
+ROOM_SKIPPED_TICKS = METRICS.counter("pong_room_skipped_ticks_total", "Tick scartati dalla stanza", ("room",))
+TIMERS_PENDING = METRICS.gauge("pong_timers_pending", "Scadenze in attesa sulla timing wheel", ("kind",))
+
+# Watchdog dell'event loop (game_watchdog): campioni registrati dall'heartbeat
+LOOP_LAG = METRICS.histogram(
+	"pong_loop_lag_seconds", "Ritardo di risveglio dell'heartbeat sull'event loop",
+	buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+).labels()
+LOOP_LAG_QUANTILES = METRICS.gauge(
+	"pong_loop_lag_quantile_seconds", "Percentili del lag dell'event loop sulla finestra recente", ("quantile",),
+)
+LOOP_STALLS = METRICS.counter("pong_loop_stalls_total", "Blocchi dell'event loop oltre la soglia del watchdog")
+
+
+async def timed_group_send(channel_layer, group, message):
+	"""channel_layer.group_send con la latenza registrata in pong_group_send_seconds."""
+	started = time.perf_counter()
+	try:
+		await channel_layer.group_send(group, message)
+	finally:
+		GROUP_SEND_SECONDS.labels(message.get("type", "")).observe(time.perf_counter() - started)
+
+
+def track_socket(consumer, kind):
+	"""Conta il WebSocket di `consumer` come `kind` fino a untrack_socket."""
+	if getattr(consumer, "metrics_socket", None) is None:
+		consumer.metrics_socket = kind
+		CONNECTED_SOCKETS.labels(kind).inc()
+
+
+def untrack_socket(consumer):
+	kind = getattr(consumer, "metrics_socket", None)
+	if kind is not None:
+		consumer.metrics_socket = None
+		CONNECTED_SOCKETS.labels(kind).dec()
+
+
+class RoomRateTracker:
+	"""Tick rate reale per stanza, dal numero di tick fra due letture."""
+
+	def __init__(self, time_func=time.monotonic):
+		self.time_func = time_func
+		self._last = {}  # { game_id: (tick, istante) }
+
+	def update(self, rooms):
+		"""Restituisce { game_id: tick al secondo } per le stanze già viste alla lettura precedente."""
+		now = self.time_func()
+		rates = {}
+		last, self._last = self._last, {}
+		for room in rooms:
+			game_id = str(room.game_id)
+			previous = last.get(game_id)
+			if previous is not None and now > previous[1]:
+				rates[game_id] = (room.tick - previous[0]) / (now - previous[1])
+			self._last[game_id] = (room.tick, now)
+		return rates
+
+
+_rate_tracker = RoomRateTracker()
+
+
+def collect_engine_metrics():
+	"""Aggiorna le metriche lette dallo stato delle stanze, dello scheduler e dei timer."""
+	from backend.game import game_registry, game_scheduler
+	from backend.game.consumers import GameConsumer
+	from backend.game.game_timers import get_timing_wheel
+	from backend.game.game_watchdog import get_loop_watchdog
+
+	host = game_registry._room_host
+	WORKER_INFO.clear()
+	WORKER_INFO.labels(host.worker_id if host is not None else game_registry.default_worker_id()).set(1)
+
+	GAME_ROOMS.labels().set(len(GameConsumer.game_rooms))
+	# Lo scheduler non viene creato qui: la prima partita ne fissa l'intervallo
+	scheduler = game_scheduler._scheduler
+	if scheduler is not None:
+		stats = scheduler.stats()
+		RUNNING_ROOMS.labels().set(stats["rooms"])
+		SCHEDULER_DEADLINE_MISSES.labels().value = stats["deadline_misses"]
+		SCHEDULER_BUSY_RATIO.labels().set(stats["busy_ratio"])
+		SKIPPED_TICKS.labels().value = stats["skipped_ticks"]
+
+	# Serie per stanza: solo le stanze ancora in memoria
+	rooms = list(GameConsumer.game_rooms.values())
+	rates = _rate_tracker.update(rooms)
+	for family in (ROOM_TICKS, ROOM_TICK_RATE, ROOM_SKIPPED_TICKS):
+		family.clear()
+	for room in rooms:
+		game_id = str(room.game_id)
+		ROOM_TICKS.labels(game_id).value = room.tick
+		ROOM_SKIPPED_TICKS.labels(game_id).value = room.clock.skipped_ticks
+		if game_id in rates:
+			ROOM_TICK_RATE.labels(game_id).set(round(rates[game_id], 2))
+
+	TIMERS_PENDING.clear()
+	for kind, count in get_timing_wheel().stats()["pending"].items():
+		TIMERS_PENDING.labels(kind).set(count)
+
+	watchdog = get_loop_watchdog()
+	if watchdog is not None:
+		LOOP_STALLS.labels().value = watchdog.stall_count
+		for quantile, lag in watchdog.percentiles().items():
+			LOOP_LAG_QUANTILES.labels(quantile).set(lag)
+
+
+METRICS.add_collector(collect_engine_metrics)
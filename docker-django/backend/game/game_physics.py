@@ -0,0 +1,114 @@
+# Fisica della partita remota, in coordinate normalizzate 0-1.
+# Funzioni pure (senza stato né I/O) condivise da Game e dal motore batch,
+# così i due percorsi restano confrontabili tick per tick.
+
+BALL_RADIUS = 0.02
+PADDLE_HEIGHT = 0.2
+MAX_MULTIPLIER = 0.0095     # 9.5 normalizzato (come in game_local.js)
+MULTIPLIER_GROWTH = 1.10    # Aumento della velocità a ogni colpo di paddle
+
+# Le velocità della palla sono espresse per tick a questa frequenza: a tick
+# rate diversi ogni passo copre REFERENCE_TICK_RATE / tick_rate tick
+REFERENCE_TICK_RATE = 120
+# Impatti (bordi/paddle) risolti al massimo in un singolo passo
+MAX_SWEEP_EVENTS = 4
+
+INF = float("inf")
+
+# Esito di un tick di palla
+NO_GOAL = 0
+GOAL_LEFT = 1   # Punto per il giocatore di sinistra (palla uscita a destra)
+GOAL_RIGHT = 2  # Punto per il giocatore di destra (palla uscita a sinistra)
+
+
+def move_paddle(position, movement, amount):
+	"""Sposta un paddle di `amount` nella direzione `movement` (-1, 0, 1)."""
+	if movement == 0:
+		return position
+	new_pos = position + movement * amount
+	return max(0.0, min(1.0 - PADDLE_HEIGHT, new_pos))
+
+
+def _paddle_bounce(y, multiplier, paddle_y, left):
+	"""Risposta al colpo di paddle (come in game_local.js): nuova velocità e moltiplicatore."""
+	if multiplier < MAX_MULTIPLIER:
+		multiplier *= MULTIPLIER_GROWTH
+	# Più la palla colpisce lontano dal centro, più esce lenta in orizzontale
+	distanza = abs(paddle_y + PADDLE_HEIGHT / 2 - y)
+	factor = min(1, max(0.7, 1 - 0.3 * (distanza / (PADDLE_HEIGHT / 2)))) * multiplier
+	vx = factor if left else -factor
+	vy = -multiplier if y < paddle_y + PADDLE_HEIGHT / 2 else multiplier
+	return vx, vy, multiplier
+
+
+def step_ball(x, y, vx, vy, multiplier, paddle_left, paddle_right, left_x, right_x, scale=1.0):
+	"""
+	Avanza la palla di un tick con collisioni continue (swept).
+
+	La velocità è espressa per tick di riferimento (REFERENCE_TICK_RATE);
+	`scale` è il numero di tick di riferimento coperti dal passo (2 a 60 Hz,
+	4 a 30 Hz). Il segmento percorso viene intersecato con i bordi e con i
+	piani dei paddle: la palla rimbalza nell'istante esatto dell'impatto e
+	percorre il resto del passo con la nuova velocità, quindi non attraversa
+	i paddle anche a tick rate bassi.
+
+	Restituisce (x, y, vx, vy, multiplier, goal) dove goal è NO_GOAL,
+	GOAL_LEFT o GOAL_RIGHT. In caso di gol posizione e velocità non sono
+	significative: la palla viene rimessa in gioco dal chiamante.
+	"""
+	remaining = 1.0  # Frazione del passo ancora da percorrere
+	for _ in range(MAX_SWEEP_EVENTS):
+		dx = vx * scale * remaining
+		dy = vy * scale * remaining
+
+		# Istante (frazione del segmento) dell'impatto con i bordi superiore e inferiore
+		t_wall = INF
+		if dy < 0 and y + dy < BALL_RADIUS:
+			t_wall = max(0.0, (BALL_RADIUS - y) / dy)
+		elif dy > 0 and y + dy > 1 - BALL_RADIUS:
+			t_wall = max(0.0, (1 - BALL_RADIUS - y) / dy)
+
+		# Istante dell'impatto con il piano del paddle verso cui si muove la palla,
+		# se la palla non l'ha già superato e lo incrocia entro l'altezza del paddle
+		t_paddle = INF
+		if dx < 0:  # Movimento verso sinistra
+			paddle_y = paddle_left
+			plane = left_x + BALL_RADIUS
+			if x + dx <= plane and x >= left_x - BALL_RADIUS:
+				t = max(0.0, (plane - x) / dx)
+				y_hit = y + dy * t
+				if paddle_y <= y_hit <= paddle_y + PADDLE_HEIGHT:
+					t_paddle = t
+		elif dx > 0:  # Movimento verso destra
+			paddle_y = paddle_right
+			plane = right_x - BALL_RADIUS
+			if x + dx >= plane and x <= right_x + BALL_RADIUS:
+				t = max(0.0, (plane - x) / dx)
+				y_hit = y + dy * t
+				if paddle_y <= y_hit <= paddle_y + PADDLE_HEIGHT:
+					t_paddle = t
+
+		t = min(t_wall, t_paddle)
+		if t > 1.0:
+			# Nessun impatto nel resto del passo
+			x += dx
+			y += dy
+			break
+
+		# Avanza fino all'impatto e applica il rimbalzo
+		x += dx * t
+		y += dy * t
+		remaining *= 1 - t
+		if t_wall <= t_paddle:
+			y = BALL_RADIUS if dy < 0 else 1 - BALL_RADIUS
+			vy = abs(vy) if dy < 0 else -abs(vy)
+		else:
+			vx, vy, multiplier = _paddle_bounce(y, multiplier, paddle_y, dx < 0)
+
+	# Gestione punto segnato
+	if x + BALL_RADIUS < 0.0:
+		return x, y, vx, vy, multiplier, GOAL_RIGHT
+	if x - BALL_RADIUS > 1.0:
+		return x, y, vx, vy, multiplier, GOAL_LEFT
+
+	return x, y, vx, vy, multiplier, NO_GOAL
@@ -0,0 +1,93 @@
+import json
+import struct
+
+try:
+	import orjson
+except ImportError:  # orjson è opzionale: senza, si usa il modulo json standard
+	orjson = None
+
+# Formato binario opzionale per il canale ws/game/<id>/.
+# Il client lo sceglie nell'handshake con il subprotocol BINARY_SUBPROTOCOL;
+# senza, il server continua a inviare i frame JSON.
+#
+# Frame snapshot (little endian, 28 byte):
+#   u8  kind          FRAME_SNAPSHOT
+#   u8  flags         bit 0: keyframe (i frame binari sono sempre completi)
+#   u32 tick
+#   i16 ballX, ballY              px del canvas * POSITION_SCALE
+#   i16 ballVX, ballVY            px/s * POSITION_SCALE
+#   i16 paddle1Y, paddle2Y        px del canvas * POSITION_SCALE
+#   u8  player1Score, player2Score
+#   u32 player1Seq, player2Seq    ultimo input elaborato per giocatore
+
+BINARY_SUBPROTOCOL = "pong.bin.v2"
+
+FRAME_SNAPSHOT = 1
+FLAG_KEYFRAME = 0x01
+
+POSITION_SCALE = 16  # Risoluzione di 1/16 di pixel
+
+SNAPSHOT_FRAME = struct.Struct("<BBIhhhhhhBBII")
+
+_INT16_MIN, _INT16_MAX = -32768, 32767
+
+
+def _quantize(value):
+	return max(_INT16_MIN, min(_INT16_MAX, round(value * POSITION_SCALE)))
+
+
+def encode_snapshot(snapshot):
+	"""Codifica uno snapshot (vedi Game.build_snapshot) in un frame binario."""
+	return SNAPSHOT_FRAME.pack(
+		FRAME_SNAPSHOT,
+		FLAG_KEYFRAME,
+		snapshot["tick"] & 0xFFFFFFFF,
+		_quantize(snapshot["ballX"]),
+		_quantize(snapshot["ballY"]),
+		_quantize(snapshot["ballVX"]),
+		_quantize(snapshot["ballVY"]),
+		_quantize(snapshot["paddle1Y"]),
+		_quantize(snapshot["paddle2Y"]),
+		min(snapshot["player1Score"], 255),
+		min(snapshot["player2Score"], 255),
+		snapshot["player1Seq"] & 0xFFFFFFFF,
+		snapshot["player2Seq"] & 0xFFFFFFFF,
+	)
+
+
+def decode_snapshot(data):
+	"""Decodifica un frame binario nello stesso formato dei frame JSON."""
+	kind, flags, tick, bx, by, bvx, bvy, p1, p2, s1, s2, seq1, seq2 = SNAPSHOT_FRAME.unpack(data)
+	if kind != FRAME_SNAPSHOT:
+		raise ValueError(f"Tipo di frame binario sconosciuto: {kind}")
+	return {
+		"type": "game_update",
+		"keyframe": bool(flags & FLAG_KEYFRAME),
+		"tick": tick,
+		"ballX": bx / POSITION_SCALE,
+		"ballY": by / POSITION_SCALE,
+		"ballVX": bvx / POSITION_SCALE,
+		"ballVY": bvy / POSITION_SCALE,
+		"paddle1Y": p1 / POSITION_SCALE,
+		"paddle2Y": p2 / POSITION_SCALE,
+		"player1Score": s1,
+		"player2Score": s2,
+		"player1Seq": seq1,
+		"player2Seq": seq2,
+	}
+
+
+# Codec JSON del canale di gioco (frame testuali e messaggi di controllo)
+
+
+def dumps(content):
+	"""Serializza in JSON compatto (str), con orjson se disponibile."""
+	if orjson is not None:
+		return orjson.dumps(content).decode()
+	return json.dumps(content, separators=(",", ":"))
+
+
+def loads(text):
+	if orjson is not None:
+		return orjson.loads(text)
+	return json.loads(text)
@@ -0,0 +1,106 @@
+import time
+
+# Limitazione dei messaggi in ingresso per connessione sul canale ws/game.
+# Ogni connessione ha un token bucket complessivo (controllato prima del
+# parsing JSON) e uno per ciascun tipo di messaggio con un budget proprio.
+# Il costo per stanza resta limitato qualunque cosa invii il client.
+
+# Chiave del budget complessivo della connessione in GAME_WS_RATE_LIMITS
+CONNECTION_BUDGET = "*"
+
+# Solo fallback se settings.GAME_WS_RATE_LIMITS non è definito (i budget si configurano lì)
+DEFAULT_RATE_LIMITS = {
+	CONNECTION_BUDGET: (60, 60),
+	"paddle_move": (30, 10),
+	"paddle_position": (30, 10),
+	"snapshot_ack": (20, 5),
+	"resync_request": (1, 3),
+}
+
+
+class TokenBucket:
+	"""Token bucket: `rate` token al secondo, al massimo `burst` accumulati."""
+
+	def __init__(self, rate, burst, time_func=time.monotonic):
+		self.rate = rate
+		self.burst = burst
+		self.time_func = time_func
+		self.tokens = float(burst)
+		self.updated = time_func()
+
+	def _refill(self):
+		now = self.time_func()
+		self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+		self.updated = now
+
+	def consume(self, amount=1):
+		"""Consuma `amount` token se disponibili. Restituisce False se il budget è esaurito."""
+		self._refill()
+		if self.tokens >= amount:
+			self.tokens -= amount
+			return True
+		return False
+
+	def retry_after(self, amount=1):
+		"""Secondi da attendere prima che siano disponibili `amount` token."""
+		self._refill()
+		return max(0.0, (amount - self.tokens) / self.rate)
+
+
+class InboundRateLimiter:
+	"""
+	Budget dei messaggi in ingresso di una connessione.
+
+	`limits` associa a ogni tipo di messaggio (rate, burst); la chiave
+	CONNECTION_BUDGET vale per tutti i frame della connessione.
+	Senza `limits` vengono usati quelli di settings.GAME_WS_RATE_LIMITS.
+	"""
+
+	def __init__(self, limits=None, time_func=time.monotonic):
+		if limits is None:
+			from django.conf import settings
+			limits = getattr(settings, "GAME_WS_RATE_LIMITS", DEFAULT_RATE_LIMITS)
+		self.connection = None
+		self.buckets = {}
+		for msg_type, (rate, burst) in limits.items():
+			bucket = TokenBucket(rate, burst, time_func)
+			if msg_type == CONNECTION_BUDGET:
+				self.connection = bucket
+			else:
+				self.buckets[msg_type] = bucket
+		# { tipo: { esito: conteggio } }, solo per i tipi con budget (più CONNECTION_BUDGET)
+		self.counters = {}
+
+	def count(self, msg_type, outcome):
+		"""Incrementa il contatore `outcome` (accepted, coalesced, dropped) per il tipo."""
+		key = msg_type if msg_type in self.buckets else CONNECTION_BUDGET
+		counters = self.counters.setdefault(key, {"accepted": 0, "coalesced": 0, "dropped": 0})
+		counters[outcome] += 1
+
+	def allow_frame(self):
+		"""Controlla il budget complessivo della connessione (prima del parsing)."""
+		if self.connection is None or self.connection.consume():
+			return True
+		self.count(CONNECTION_BUDGET, "dropped")
+		return False
+
+	def allow(self, msg_type):
+		"""Controlla il budget del tipo di messaggio; i tipi senza budget sono sempre ammessi."""
+		bucket = self.buckets.get(msg_type)
+		if bucket is None:
+			return True
+		if bucket.consume():
+			self.count(msg_type, "accepted")
+			return True
+		return False
+
+	def retry_after(self, msg_type):
+		bucket = self.buckets.get(msg_type)
+		return bucket.retry_after() if bucket is not None else 0.0
+
+	def limited(self):
+		"""Numero di messaggi scartati o accorpati finora."""
+		return sum(c["coalesced"] + c["dropped"] for c in self.counters.values())
+
+	def stats(self):
+		return {msg_type: dict(counters) for msg_type, counters in self.counters.items()}
@@ -0,0 +1,438 @@
+import asyncio
+import functools
+import logging
+import os
+import random
+import socket
+import time
+
+from asgiref.sync import sync_to_async
+from channels.exceptions import StopConsumer
+
+from backend.game.game_logging import process_task
+
+try:
+	import redis.asyncio as aioredis
+except ImportError:
+	aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# Registro delle stanze fra più worker Daphne.
+# Ogni stanza vive su un solo worker (il proprietario), che ne detiene un
+# lease nel registro (Redis, rinnovato periodicamente). Un worker che riceve
+# una connessione per una stanza altrui non crea un secondo Game: inoltra la
+# connessione al proprietario tramite il channel layer. Sul proprietario un
+# GameConsumer "proxy" esegue la logica di sempre; i suoi messaggi ASGI
+# (accept, send, close) tornano al worker del client, che li gira al
+# websocket, mentre i frame del client vanno al canale del proxy.
+# Se il lease scade senza rinnovo e un altro worker prende la stanza, la copia
+# locale viene sospesa e chiusa e i client migrano al nuovo proprietario.
+
+ROOM_KEY = "pong:room:{}"
+WORKER_KEY = "pong:worker:{}"
+# Worker che accettano nuove stanze (non in drain), con il numero di stanze possedute
+PEER_KEY = "pong:peer:{}"
+
+# Rinnova il lease solo se appartiene ancora al worker
+_RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+	return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Passa il lease a un altro worker solo se appartiene ancora al worker
+_TRANSFER_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+	return redis.call("set", KEYS[1], ARGV[2], "PX", ARGV[3]) and 1 or 0
+end
+return 0
+"""
+
+# Rilascia il lease solo se appartiene ancora al worker
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+	return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def default_worker_id():
+	from django.conf import settings
+	return getattr(settings, "GAME_WORKER_ID", None) or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LocalRoomRegistry:
+	"""Registro in memoria (un solo processo, test): stessa interfaccia di RedisRoomRegistry."""
+
+	def __init__(self, lease_seconds=10, time_func=time.monotonic):
+		self.lease_seconds = lease_seconds
+		self.time_func = time_func
+		self._leases = {}  # { chiave: (valore, scadenza) }
+
+	def _get(self, key):
+		lease = self._leases.get(key)
+		if lease is None:
+			return None
+		if lease[1] <= self.time_func():
+			del self._leases[key]
+			return None
+		return lease[0]
+
+	def _set(self, key, value):
+		self._leases[key] = (value, self.time_func() + self.lease_seconds)
+
+	async def claim(self, game_id, worker_id):
+		"""Acquisisce (o rinnova) il lease della stanza se è libera. Restituisce il proprietario."""
+		key = ROOM_KEY.format(game_id)
+		owner = self._get(key)
+		if owner is None or owner == worker_id:
+			self._set(key, worker_id)
+			return worker_id
+		return owner
+
+	async def renew(self, game_id, worker_id):
+		key = ROOM_KEY.format(game_id)
+		if self._get(key) != worker_id:
+			return False
+		self._set(key, worker_id)
+		return True
+
+	async def release(self, game_id, worker_id):
+		key = ROOM_KEY.format(game_id)
+		if self._get(key) != worker_id:
+			return False
+		del self._leases[key]
+		return True
+
+	async def transfer(self, game_id, worker_id, new_owner):
+		key = ROOM_KEY.format(game_id)
+		if self._get(key) != worker_id:
+			return False
+		self._set(key, new_owner)
+		return True
+
+	async def owner(self, game_id):
+		return self._get(ROOM_KEY.format(game_id))
+
+	async def register_worker(self, worker_id, channel_name, accepting=True, rooms=0):
+		self._set(WORKER_KEY.format(worker_id), channel_name)
+		if accepting:
+			self._set(PEER_KEY.format(worker_id), rooms)
+		else:
+			self._leases.pop(PEER_KEY.format(worker_id), None)
+
+	async def worker_channel(self, worker_id):
+		return self._get(WORKER_KEY.format(worker_id))
+
+	async def peers(self):
+		"""Worker che accettano nuove stanze: { worker_id: stanze possedute }."""
+		prefix = PEER_KEY.format("")
+		peers = {}
+		for key in list(self._leases):
+			rooms = self._get(key) if key.startswith(prefix) else None
+			if rooms is not None:
+				peers[key[len(prefix):]] = rooms
+		return peers
+
+
+class RedisRoomRegistry:
+	"""Registro condiviso su Redis: lease con scadenza (SET NX PX), rinnovo e rilascio atomici."""
+
+	def __init__(self, url, lease_seconds=10):
+		if aioredis is None:
+			raise ImportError("redis non è installato")
+		self.lease_seconds = lease_seconds
+		self.redis = aioredis.from_url(url, decode_responses=True)
+		self._renew = self.redis.register_script(_RENEW_SCRIPT)
+		self._transfer = self.redis.register_script(_TRANSFER_SCRIPT)
+		self._release = self.redis.register_script(_RELEASE_SCRIPT)
+
+	@property
+	def lease_ms(self):
+		return int(self.lease_seconds * 1000)
+
+	async def claim(self, game_id, worker_id):
+		key = ROOM_KEY.format(game_id)
+		for _ in range(2):
+			if await self.redis.set(key, worker_id, nx=True, px=self.lease_ms):
+				return worker_id
+			owner = await self.redis.get(key)
+			if owner == worker_id:
+				await self.renew(game_id, worker_id)
+				return worker_id
+			if owner is not None:
+				return owner
+			# Lease scaduto fra SET e GET: riprova
+		return await self.redis.get(key)
+
+	async def renew(self, game_id, worker_id):
+		return bool(await self._renew(keys=[ROOM_KEY.format(game_id)], args=[worker_id, self.lease_ms]))
+
+	async def release(self, game_id, worker_id):
+		return bool(await self._release(keys=[ROOM_KEY.format(game_id)], args=[worker_id]))
+
+	async def transfer(self, game_id, worker_id, new_owner):
+		return bool(await self._transfer(keys=[ROOM_KEY.format(game_id)], args=[worker_id, new_owner, self.lease_ms]))
+
+	async def owner(self, game_id):
+		return await self.redis.get(ROOM_KEY.format(game_id))
+
+	async def register_worker(self, worker_id, channel_name, accepting=True, rooms=0):
+		async with self.redis.pipeline(transaction=False) as pipe:
+			pipe.set(WORKER_KEY.format(worker_id), channel_name, px=self.lease_ms)
+			if accepting:
+				pipe.set(PEER_KEY.format(worker_id), rooms, px=self.lease_ms)
+			else:
+				pipe.delete(PEER_KEY.format(worker_id))
+			await pipe.execute()
+
+	async def worker_channel(self, worker_id):
+		return await self.redis.get(WORKER_KEY.format(worker_id))
+
+	async def peers(self):
+		prefix = PEER_KEY.format("")
+		keys = [key async for key in self.redis.scan_iter(match=f"{prefix}*")]
+		if not keys:
+			return {}
+		values = await self.redis.mget(keys)
+		return {key[len(prefix):]: int(rooms) for key, rooms in zip(keys, values) if rooms is not None}
+
+
+def build_registry():
+	"""Registro scelto da settings.GAME_ROOM_REGISTRY ("redis" o "local")."""
+	from django.conf import settings
+	lease_seconds = getattr(settings, "GAME_ROOM_LEASE_SECONDS", 10)
+	if getattr(settings, "GAME_ROOM_REGISTRY", "local") == "redis":
+		try:
+			return RedisRoomRegistry(settings.GAME_ROOM_REGISTRY_URL, lease_seconds=lease_seconds)
+		except (ImportError, AttributeError) as e:
+			logger.warning("[REGISTRY] Registro Redis non disponibile (%s): uso il registro locale", e)
+	return LocalRoomRegistry(lease_seconds=lease_seconds)
+
+
+async def load_user(user_id):
+	"""Utente del client inoltrato (AnonymousUser se non autenticato)."""
+	from django.contrib.auth import get_user_model
+	from django.contrib.auth.models import AnonymousUser
+
+	if user_id is None:
+		return AnonymousUser()
+	user = await sync_to_async(get_user_model().objects.filter(pk=user_id).first)()
+	return user or AnonymousUser()
+
+
+class RoomHost:
+	"""
+	Canale del worker e lease delle stanze di cui è proprietario.
+
+	Riceve dagli altri worker le connessioni inoltrate (room.join / room.leave)
+	e per ciascuna esegue un GameConsumer proxy.
+	"""
+
+	def __init__(self, channel_layer, registry, worker_id, user_loader=load_user):
+		self.channel_layer = channel_layer
+		self.registry = registry
+		self.worker_id = worker_id
+		self.user_loader = user_loader
+		self.channel_name = None
+		self.owned = set()   # game_id delle stanze di questo worker
+		self.proxies = {}    # { canale del client: consumer proxy }
+		self.edges = set()   # Consumer di questo worker inoltrati ad altri proprietari
+		# False durante il drain: le nuove stanze vengono assegnate a un altro worker
+		self.accepting = True
+		self.drain_task = None
+		self._tasks = []
+		self._start_lock = asyncio.Lock()
+
+		# Statistiche
+		self.joins = 0
+		self.lost_leases = 0
+
+	async def start(self):
+		"""Apre il canale del worker e avvia ricezione e rinnovo dei lease (una sola volta)."""
+		async with self._start_lock:
+			if self.channel_name is not None:
+				return
+			self.channel_name = await self.channel_layer.new_channel()
+			await self.register()
+			self._tasks = [
+				process_task(self._receive_loop()),
+				process_task(self._renew_loop()),
+			]
+			logger.info("[REGISTRY] Worker %s in ascolto su %s", self.worker_id, self.channel_name)
+
+	async def register(self):
+		await self.registry.register_worker(self.worker_id, self.channel_name, accepting=self.accepting, rooms=len(self.owned))
+
+	def request_drain(self):
+		if self.drain_task is None:
+			from backend.game.game_drain import drain_worker
+			self.drain_task = process_task(drain_worker(self))
+
+	async def stop(self):
+		for task in self._tasks:
+			task.cancel()
+		self._tasks = []
+		for game_id in list(self.owned):
+			await self.registry.release(game_id, self.worker_id)
+		self.owned.clear()
+		self.channel_name = None
+
+	async def claim(self, game_id):
+		"""Proprietario della stanza: questo worker se era libera (un altro worker durante il drain)."""
+		worker_id = self.worker_id
+		if not self.accepting:
+			worker_id = await self.pick_peer() or self.worker_id
+		owner = await self.registry.claim(str(game_id), worker_id)
+		if owner == self.worker_id:
+			self.owned.add(str(game_id))
+		return owner
+
+	async def owner(self, game_id):
+		return await self.registry.owner(str(game_id))
+
+	async def pick_peer(self):
+		"""Il worker (non in drain) con meno stanze, None se non ce ne sono."""
+		peers = await self.registry.peers()
+		peers.pop(self.worker_id, None)
+		if not peers:
+			return None
+		fewest = min(peers.values())
+		return random.choice([worker for worker, rooms in peers.items() if rooms == fewest])
+
+	async def _receive_loop(self):
+		while True:
+			message = await self.channel_layer.receive(self.channel_name)
+			try:
+				if message["type"] == "room.join":
+					await self.join(message)
+				elif message["type"] == "room.leave":
+					await self.leave(message)
+				elif message["type"] == "worker.drain":
+					self.request_drain()
+			except Exception as e:
+				logger.error("[REGISTRY] Errore nella gestione di %s: %s", message.get('type'), e)
+
+	async def _renew_loop(self):
+		while True:
+			await asyncio.sleep(self.registry.lease_seconds / 3)
+			try:
+				await self.register()
+				await self.check_leases()
+			except Exception as e:
+				logger.warning("[REGISTRY] Rinnovo dei lease fallito: %s", e)
+
+	async def check_leases(self):
+		"""Rinnova i lease delle stanze di questo worker e rilascia quelli delle stanze chiuse."""
+		from backend.game.consumers import GameConsumer
+
+		for game_id in list(self.owned):
+			# Stanza chiusa: il lease viene rilasciato
+			if f"game_{game_id}" not in GameConsumer.game_rooms:
+				self.owned.discard(game_id)
+				await self.registry.release(game_id, self.worker_id)
+			elif not await self.registry.renew(game_id, self.worker_id):
+				await self.lose_room(game_id)
+
+	async def lose_room(self, game_id):
+		"""
+		Lease scaduto senza rinnovo: se nessun altro worker ha preso la stanza
+		la si riacquisisce, altrimenti la copia locale viene sospesa e chiusa
+		perché la partita non venga simulata da due worker.
+		"""
+		from backend.game.consumers import GameConsumer
+		from backend.game.game_drain import evict_room
+
+		self.lost_leases += 1
+		owner = await self.registry.claim(game_id, self.worker_id)
+		if owner == self.worker_id:
+			logger.warning("[REGISTRY] Lease della stanza %s scaduto e riacquisito dal worker %s", game_id, self.worker_id)
+			return
+		logger.error("[REGISTRY] Lease della stanza %s perso dal worker %s: proprietario %s", game_id, self.worker_id, owner)
+		self.owned.discard(game_id)
+		room = GameConsumer.game_rooms.get(f"game_{game_id}")
+		if room is None:
+			return
+		# Checkpoint per il nuovo proprietario, poi i client si riconnettono a lui
+		await room.suspend()
+		await evict_room(room, owner)
+
+	async def join(self, message):
+		"""Crea il consumer proxy per un client connesso a un altro worker."""
+		from backend.game.consumers import GameConsumer
+
+		reply_channel = message["reply_channel"]
+		proxy = GameConsumer()
+		proxy.scope = {
+			"type": "websocket",
+			"path": message.get("path", ""),
+			"query_string": message.get("query_string", "").encode(),
+			"subprotocols": message.get("subprotocols", []),
+			"client": tuple(message.get("client") or ("", 0)),
+			"url_route": {"kwargs": {"game_id": message["game_id"]}},
+			"user": await self.user_loader(message.get("user_id")),
+			"proxy": True,
+		}
+		proxy.channel_layer = self.channel_layer
+		proxy.channel_name = await self.channel_layer.new_channel()
+		proxy.base_send = functools.partial(self._forward, reply_channel, proxy.channel_name)
+		self.proxies[reply_channel] = proxy
+		self.joins += 1
+		asyncio.create_task(self._run_proxy(reply_channel, proxy))
+		logger.info("[REGISTRY] Connessione inoltrata per la partita %s da %s", message['game_id'], reply_channel)
+
+	async def _forward(self, reply_channel, proxy_channel, message):
+		"""base_send del proxy: il messaggio ASGI torna al worker del client."""
+		await self.channel_layer.send(reply_channel, {
+			"type": "room.outbound",
+			"proxy": proxy_channel,
+			"message": message,
+		})
+
+	async def _run_proxy(self, reply_channel, proxy):
+		try:
+			await proxy.dispatch({"type": "websocket.connect"})
+			while True:
+				message = await self.channel_layer.receive(proxy.channel_name)
+				await proxy.dispatch(message)
+		except StopConsumer:
+			pass
+		except Exception as e:
+			logger.error("[REGISTRY] Errore nel consumer proxy di %s: %s", reply_channel, e)
+		finally:
+			self.proxies.pop(reply_channel, None)
+
+	async def leave(self, message):
+		"""Il client si è disconnesso: la disconnessione segue gli input già inoltrati."""
+		proxy = self.proxies.get(message["reply_channel"])
+		if proxy is not None:
+			await self.channel_layer.send(proxy.channel_name, {
+				"type": "websocket.disconnect",
+				"code": message.get("code", 1000),
+			})
+
+	def stats(self):
+		return {
+			"worker": self.worker_id,
+			"owned_rooms": len(self.owned),
+			"proxies": len(self.proxies),
+			"edges": len(self.edges),
+			"accepting": self.accepting,
+			"joins": self.joins,
+			"lost_leases": self.lost_leases,
+		}
+
+
+_room_host = None
+
+
+async def get_room_host(channel_layer):
+	"""Restituisce il RoomHost del processo, avviandolo al primo utilizzo."""
+	global _room_host
+	if _room_host is None:
+		_room_host = RoomHost(channel_layer, build_registry(), default_worker_id())
+	await _room_host.start()
+	return _room_host
@@ -0,0 +1,325 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.game.game_physics import NO_GOAL
+from backend.game.game_protocol import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# Replay deterministici delle partite remote, in JSON Lines (un record per riga,
+# un file per stanza, riscritto a ogni nuova partita):
+#   header    seed del generatore casuale della stanza, tick rate, tick iniziale
+#   input     input applicato al tick `tick` (movimento/posizione per lato)
+#   keyframe  stato completo della simulazione, ogni KEYFRAME_SECONDS e dopo ogni gol
+#   resume    partita ripresa da un checkpoint (crash o migrazione): nuovo seed dal
+#             tick `start_tick`, seguito dal keyframe dello stato ripreso
+#   end       tick e punteggio finali
+# Con seed e input la partita si può ri-simulare tick per tick senza traffico
+# reale; i keyframe servono a verificare che la ri-simulazione non diverga.
+
+REPLAY_VERSION = 1
+KEYFRAME_SECONDS = 5
+
+
+def capture_state(room):
+	"""Stato completo (deterministico) della simulazione di una stanza."""
+	state = room.state
+	return {
+		"tick": room.tick,
+		"ball": [state.ball_x, state.ball_y, state.ball_vx, state.ball_vy],
+		"multiplier": room.current_multiplier,
+		"paddles": [state.paddle_left, state.paddle_right],
+		"movements": [room.paddle_movements["left"], room.paddle_movements["right"]],
+		"scores": [state.score_left, state.score_right],
+		"serve_ticks": room.serve_ticks,
+	}
+
+
+def restore_state(room, keyframe):
+	"""Riporta una stanza allo stato di un keyframe (vedi capture_state)."""
+	state = room.state
+	room.tick = keyframe["tick"]
+	state.ball_x, state.ball_y, state.ball_vx, state.ball_vy = keyframe["ball"]
+	room.current_multiplier = keyframe["multiplier"]
+	state.paddle_left, state.paddle_right = keyframe["paddles"]
+	room.paddle_movements["left"], room.paddle_movements["right"] = keyframe["movements"]
+	state.score_left, state.score_right = keyframe["scores"]
+	room.serve_ticks = keyframe["serve_ticks"]
+
+
+def replay_path(directory, game_id):
+	return os.path.join(directory, f"{game_id}.jsonl")
+
+
+# Le scritture dei replay di tutte le stanze passano da un solo thread, in ordine:
+# un disco lento rallenta il replay, non l'event loop del gioco
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="replay-writer")
+
+
+class ReplayRecorder:
+	"""
+	Registra il replay di una stanza su disco.
+
+	I record restano in memoria e vengono passati al thread di scrittura a ogni
+	keyframe; senza un event loop in esecuzione (strumenti offline) il file
+	viene scritto direttamente. Un errore di I/O disattiva la registrazione
+	senza interrompere la partita.
+	"""
+
+	def __init__(self, path, keyframe_every, mode="w"):
+		self.path = path
+		self.keyframe_every = keyframe_every
+		self.last_keyframe_tick = None
+		self.records = 0
+		self._mode = mode
+		self._lines = []
+		self._file = None     # Usato solo dal thread di scrittura
+		self._future = None   # Ultima scrittura affidata al thread
+		self._closed = False
+		self._failed = False
+
+	@classmethod
+	def for_room(cls, room, directory, resumed=False):
+		"""
+		Apre il replay di `room` e scrive intestazione e keyframe iniziale.
+		Una partita ripresa (`resumed`) continua il file esistente con un record resume.
+		"""
+		recorder = cls(
+			replay_path(directory, room.game_id), keyframe_every=KEYFRAME_SECONDS * room.tick_rate,
+			mode="a" if resumed else "w",
+		)
+		recorder.write({
+			"type": "resume" if resumed else "header",
+			"version": REPLAY_VERSION,
+			"game_id": str(room.game_id),
+			"seed": room.seed,
+			"tick_rate": room.tick_rate,
+			"start_tick": room.tick,
+			"started_at": time.time(),
+		})
+		recorder.keyframe(room)
+		return recorder
+
+	@property
+	def closed(self):
+		return self._closed or self._failed
+
+	def write(self, record):
+		if self.closed:
+			return
+		self._lines.append(dumps(record))
+		self.records += 1
+
+	def record_input(self, tick, side, pending):
+		"""Registra un input applicato al tick `tick` (vedi InputMailbox.drain)."""
+		record = {"type": "input", "tick": tick, "side": side}
+		if pending["movement"] is not None:
+			record["movement"] = pending["movement"]
+		if pending["position"] is not None:
+			record["position"] = pending["position"]
+		self.write(record)
+
+	def keyframe(self, room):
+		record = capture_state(room)
+		record["type"] = "keyframe"
+		self.write(record)
+		self.last_keyframe_tick = room.tick
+		self.flush()
+
+	def maybe_keyframe(self, room):
+		if self.last_keyframe_tick is None or room.tick - self.last_keyframe_tick >= self.keyframe_every:
+			self.keyframe(room)
+
+	def flush(self):
+		"""Passa i record in memoria al disco."""
+		if self.closed or not self._lines:
+			return
+		lines, self._lines = self._lines, []
+		self._submit(self._write_lines, lines)
+
+	def close(self, room, on_closed=None):
+		"""
+		Chiude il replay con il record finale. `on_closed` viene chiamato senza
+		argomenti quando il file è completo (nel thread di scrittura).
+		"""
+		self.keyframe(room)
+		self.write({
+			"type": "end",
+			"tick": room.tick,
+			"scores": [room.state.score_left, room.state.score_right],
+			"ended_at": time.time(),
+		})
+		self.flush()
+		self._closed = True
+		self._submit(self._close_file, on_closed)
+
+	def wait(self, timeout=None):
+		"""Attende che le scritture affidate al thread siano su disco (strumenti e test)."""
+		if self._future is not None:
+			self._future.result(timeout)
+
+	def _submit(self, func, *args):
+		try:
+			asyncio.get_running_loop()
+		except RuntimeError:
+			# Nessun event loop: le scritture precedenti prima, poi direttamente qui
+			self.wait()
+			func(*args)
+			return
+		self._future = _writer.submit(func, *args)
+
+	def _write_lines(self, lines):
+		if self._failed:
+			return
+		try:
+			if self._file is None:
+				os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+				self._file = open(self.path, self._mode, encoding="utf-8")
+			self._file.write("\n".join(lines))
+			self._file.write("\n")
+			self._file.flush()
+		except (OSError, ValueError) as e:
+			logger.warning("[REPLAY] Registrazione interrotta per %s: %s", self.path, e)
+			self._failed = True
+			self._close_file()
+
+	def _close_file(self, on_closed=None):
+		if self._file is not None:
+			try:
+				self._file.close()
+			except OSError:
+				pass
+			self._file = None
+		if on_closed is not None and not self._failed:
+			on_closed()
+
+
+def read_replay(path):
+	"""
+	Legge un file di replay. Restituisce (header, input per tick, keyframe, end).
+
+	A ogni record resume i record oltre il tick di ripresa (persi con il worker
+	interrotto) vengono scartati e il keyframe successivo porta il nuovo seed
+	in `resume_seed`. Un file che inizia con un resume (la prima parte è su un
+	altro worker) ha un header con `partial`.
+	"""
+	header, end = None, None
+	inputs = {}  # { tick: [record input] }
+	keyframes = []
+	resume_seed = None
+	with open(path, encoding="utf-8") as f:
+		for line in f:
+			line = line.strip()
+			if not line:
+				continue
+			record = loads(line)
+			kind = record.get("type")
+			if kind == "header":
+				header = record
+			elif kind == "input":
+				inputs.setdefault(record["tick"], []).append(record)
+			elif kind == "resume":
+				start = record["start_tick"]
+				inputs = {tick: records for tick, records in inputs.items() if tick <= start}
+				keyframes = [keyframe for keyframe in keyframes if keyframe["tick"] < start]
+				end = None
+				resume_seed = record["seed"]
+				if header is None:
+					header = dict(record, type="header", partial=True)
+			elif kind == "keyframe":
+				if resume_seed is not None and keyframes:
+					record["resume_seed"] = resume_seed
+				resume_seed = None
+				keyframes.append(record)
+			elif kind == "end":
+				end = record
+	if header is None or not keyframes:
+		raise ValueError(f"Replay incompleto: {path}")
+	return header, inputs, keyframes, end
+
+
+class ReplaySimulator:
+	"""
+	Ri-simula una partita registrata, senza rete né event loop.
+
+	Parte dal seed e dal primo keyframe, applica gli input al loro tick e
+	confronta lo stato con ogni keyframe registrato.
+	"""
+
+	def __init__(self, path):
+		self.path = path
+		self.header, self.inputs, self.keyframes, self.end = read_replay(path)
+
+	def last_tick(self):
+		if self.end is not None:
+			return self.end["tick"]
+		last = self.keyframes[-1]["tick"]
+		return max([last] + list(self.inputs))
+
+	def build_room(self):
+		from backend.game.consumers import Game
+
+		room = Game(game_id=self.header["game_id"], tick_rate=self.header["tick_rate"])
+		# Stesso seed: il generatore della stanza riproduce gli stessi servizi
+		room.reset_match(self.header["seed"])
+		restore_state(room, self.keyframes[0])
+		return room
+
+	def run(self, verify=True, on_tick=None):
+		"""
+		Esegue la ri-simulazione. Restituisce un riepilogo con le eventuali divergenze.
+
+		`on_tick(room)`, se indicato, viene chiamato dopo ogni tick simulato.
+		"""
+		room = self.build_room()
+		expected = {}
+		resumes = {}
+		for keyframe in self.keyframes[1:]:
+			if "resume_seed" in keyframe:
+				resumes[keyframe["tick"]] = keyframe
+			else:
+				expected[keyframe["tick"]] = keyframe
+		mismatches = []
+		goals = 0
+		end_tick = self.last_tick()
+
+		started = time.perf_counter()
+		while room.tick < end_tick:
+			resume = resumes.get(room.tick)
+			if resume is not None:
+				# Partita ripresa: nuovo seed e stato del checkpoint (input azzerati)
+				room.seed = resume["resume_seed"]
+				room.rng = random.Random(room.seed)
+				restore_state(room, resume)
+			for record in self.inputs.get(room.tick + 1, ()):
+				room.inputs.post(record["side"], movement=record.get("movement"), position=record.get("position"))
+			goal = room.simulate_tick()
+			if goal != NO_GOAL:
+				room.score_goal(goal)
+				goals += 1
+			if on_tick is not None:
+				on_tick(room)
+			keyframe = expected.get(room.tick)
+			if verify and keyframe is not None:
+				state = capture_state(room)
+				diff = [field for field, value in state.items() if keyframe.get(field) != value]
+				if diff:
+					mismatches.append({"tick": room.tick, "fields": diff})
+		elapsed = time.perf_counter() - started
+
+		ticks = room.tick - self.keyframes[0]["tick"]
+		return {
+			"game_id": self.header["game_id"],
+			"ticks": ticks,
+			"goals": goals,
+			"scores": [room.state.score_left, room.state.score_right],
+			"recorded_scores": self.end["scores"] if self.end else None,
+			"keyframes_checked": len(expected) if verify else 0,
+			"mismatches": mismatches,
+			"seconds": elapsed,
+			"ticks_per_second": ticks / elapsed if elapsed > 0 else None,
+		}
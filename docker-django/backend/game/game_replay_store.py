@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import sys
+import uuid
+import zlib
+from array import array
+
+from backend.game.game_replay import ReplaySimulator
+
+logger = logging.getLogger(__name__)
+
+# Archivio colonnare dei replay: un file per partita (<game_id>.prpl) con lo
+# stato di ogni tick in colonne a larghezza fissa, divise in chunk compressi
+# singolarmente. Il file viene letto con mmap: un chunk non compresso viene
+# esposto senza copie (memoryview sul file), uno compresso viene
+# decompresso da solo, senza caricare il resto del replay.
+#
+# Layout (little endian):
+#   header      FILE_HEADER: magic, versione, tick rate, tick totali, chunk,
+#               offset della tabella dei chunk, game_id (16 byte)
+#   chunk...    colonne una dopo l'altra (COLUMNS), allineati a 8 byte
+#   tabella     CHUNK_ENTRY per chunk: offset, dimensione, primo tick, tick, codec
+
+MAGIC = b"PRPL"
+STORE_VERSION = 1
+STORE_EXTENSION = ".prpl"
+
+FILE_HEADER = struct.Struct("<4sHHIIQ16s")
+CHUNK_ENTRY = struct.Struct("<QIIIB3x")
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+
+POSITION_SCALE = 16  # Coordinate in 1/16 di pixel del canvas (come game_protocol)
+
+# (nome, typecode di array): dal più largo al più stretto, così ogni colonna resta allineata
+COLUMNS = (
+	("tick", "I"),
+	("ball_x", "h"), ("ball_y", "h"),
+	("paddle1", "h"), ("paddle2", "h"),
+	("score1", "B"), ("score2", "B"),
+)
+
+DEFAULT_CHUNK_SECONDS = 2
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def store_path(directory, game_id):
+	return os.path.join(directory, f"{game_id}{STORE_EXTENSION}")
+
+
+def _quantize(value, size):
+	return max(-32768, min(32767, round(value * size * POSITION_SCALE)))
+
+
+class ReplayStoreWriter:
+	"""Scrive un archivio colonnare, un chunk alla volta."""
+
+	def __init__(self, path, game_id, tick_rate, chunk_ticks=None):
+		self.path = path
+		self.game_id = uuid.UUID(str(game_id))
+		self.tick_rate = tick_rate
+		self.chunk_ticks = chunk_ticks or DEFAULT_CHUNK_SECONDS * tick_rate
+		self.ticks = 0
+		self._entries = []
+		self._columns = [array(code) for _, code in COLUMNS]
+		# Scrive su un file temporaneo: l'archivio compare solo quando è completo
+		self._tmp_path = f"{path}.tmp"
+		self._file = open(self._tmp_path, "wb")
+		self._file.write(bytes(FILE_HEADER.size))
+
+	def append(self, tick, ball_x, ball_y, paddle1, paddle2, score1, score2):
+		"""Aggiunge un tick (coordinate normalizzate 0-1)."""
+		values = (
+			tick,
+			_quantize(ball_x, 1000), _quantize(ball_y, 500),
+			_quantize(paddle1, 500), _quantize(paddle2, 500),
+			min(score1, 255), min(score2, 255),
+		)
+		for column, value in zip(self._columns, values):
+			column.append(value)
+		if len(self._columns[0]) >= self.chunk_ticks:
+			self._flush_chunk()
+
+	def append_room(self, room):
+		"""Aggiunge lo stato corrente di una stanza (callback per ReplaySimulator.run)."""
+		state = room.state
+		self.append(
+			room.tick,
+			state.ball_x, state.ball_y,
+			state.paddle_left, state.paddle_right,
+			state.score_left, state.score_right,
+		)
+
+	def _flush_chunk(self):
+		count = len(self._columns[0])
+		if not count:
+			return
+		first_tick = self._columns[0][0]
+		if not _LITTLE_ENDIAN:
+			for column in self._columns:
+				column.byteswap()
+		raw = b"".join(column.tobytes() for column in self._columns)
+		compressed = zlib.compress(raw, 6)
+		codec, data = (CODEC_ZLIB, compressed) if len(compressed) < len(raw) else (CODEC_RAW, raw)
+
+		# Allinea il chunk a 8 byte per le viste senza copia
+		offset = self._file.tell()
+		padding = -offset % 8
+		if padding:
+			self._file.write(bytes(padding))
+			offset += padding
+		self._file.write(data)
+		self._entries.append((offset, len(data), first_tick, count, codec))
+		self.ticks += count
+		self._columns = [array(code) for _, code in COLUMNS]
+
+	def close(self):
+		self._flush_chunk()
+		table_offset = self._file.tell()
+		for entry in self._entries:
+			self._file.write(CHUNK_ENTRY.pack(*entry))
+		self._file.seek(0)
+		self._file.write(FILE_HEADER.pack(
+			MAGIC, STORE_VERSION, self.tick_rate, self.ticks, len(self._entries), table_offset, self.game_id.bytes,
+		))
+		self._file.close()
+		os.replace(self._tmp_path, self.path)
+
+	def abort(self):
+		self._file.close()
+		os.remove(self._tmp_path)
+
+
+class ReplayStore:
+	"""
+	Lettura di un archivio colonnare tramite mmap.
+
+	chunk() restituisce le colonne come memoryview: vanno rilasciate (o
+	convertite) prima di close().
+	"""
+
+	def __init__(self, path):
+		self.path = path
+		self._file = open(path, "rb")
+		try:
+			self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+		except ValueError:  # File vuoto
+			self._file.close()
+			raise ValueError(f"Archivio replay vuoto: {path}")
+
+		magic, version, self.tick_rate, self.ticks, chunks, table_offset, game_id = FILE_HEADER.unpack_from(self._mmap, 0)
+		if magic != MAGIC or version != STORE_VERSION:
+			self.close()
+			raise ValueError(f"Archivio replay non valido: {path}")
+		self.game_id = uuid.UUID(bytes=game_id)
+		self.entries = [
+			CHUNK_ENTRY.unpack_from(self._mmap, table_offset + i * CHUNK_ENTRY.size)
+			for i in range(chunks)
+		]
+
+	def __len__(self):
+		return len(self.entries)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def chunk(self, index):
+		"""Colonne del chunk `index`: { nome: memoryview tipizzata }."""
+		offset, size, _, count, codec = self.entries[index]
+		data = memoryview(self._mmap)[offset:offset + size]
+		if codec == CODEC_ZLIB:
+			data = memoryview(zlib.decompress(data))
+
+		columns = {}
+		position = 0
+		for name, code in COLUMNS:
+			width = array(code).itemsize * count
+			view = data[position:position + width]
+			if _LITTLE_ENDIAN:
+				columns[name] = view.cast(code)
+			else:
+				column = array(code, view.tobytes())
+				column.byteswap()
+				columns[name] = memoryview(column)
+			position += width
+		return columns
+
+	def chunk_frames(self, index):
+		"""Chunk `index` in unità del canvas (px), come liste pronte da serializzare."""
+		columns = self.chunk(index)
+		try:
+			return {
+				"tick": columns["tick"][0] if len(columns["tick"]) else None,
+				"ticks": len(columns["tick"]),
+				"ballX": [v / POSITION_SCALE for v in columns["ball_x"]],
+				"ballY": [v / POSITION_SCALE for v in columns["ball_y"]],
+				"paddle1Y": [v / POSITION_SCALE for v in columns["paddle1"]],
+				"paddle2Y": [v / POSITION_SCALE for v in columns["paddle2"]],
+				"player1Score": columns["score1"].tolist(),
+				"player2Score": columns["score2"].tolist(),
+			}
+		finally:
+			for view in columns.values():
+				view.release()
+
+	def close(self):
+		if self._mmap is not None:
+			self._mmap.close()
+			self._mmap = None
+		self._file.close()
+
+
+def build_replay_store(replay_file, path=None, chunk_ticks=None):
+	"""Ri-simula un replay JSON Lines (game_replay) e ne scrive l'archivio colonnare."""
+	simulator = ReplaySimulator(replay_file)
+	header = simulator.header
+	if path is None:
+		path = store_path(os.path.dirname(replay_file), header["game_id"])
+	writer = ReplayStoreWriter(path, header["game_id"], header["tick_rate"], chunk_ticks)
+	try:
+		simulator.run(verify=False, on_tick=writer.append_room)
+	except Exception:
+		writer.abort()
+		raise
+	writer.close()
+	return path
+
+
+def _build_logged(replay_file):
+	try:
+		path = build_replay_store(replay_file)
+		logger.info("[REPLAY] Archivio colonnare scritto in %s", path)
+	except Exception as e:
+		logger.error("[REPLAY] Errore nella scrittura dell'archivio di %s: %s", replay_file, e)
+
+
+def build_replay_store_in_background(replay_file):
+	"""Costruisce l'archivio in un thread, senza bloccare l'event loop."""
+	try:
+		loop = asyncio.get_running_loop()
+	except RuntimeError:
+		_build_logged(replay_file)
+		return None
+	return loop.run_in_executor(None, _build_logged, replay_file)
+
+
+async def stream_replay(path, speed=1.0):
+	"""
+	Generatore asincrono per StreamingHttpResponse: un'intestazione e poi un
+	chunk per riga (NDJSON), alla velocità di riproduzione `speed`.
+	Legge un chunk alla volta dall'archivio.
+	"""
+	from backend.game.game_protocol import dumps
+
+	store = ReplayStore(path)
+	try:
+		yield dumps({
+			"type": "replay_header",
+			"gameId": str(store.game_id),
+			"tickRate": store.tick_rate,
+			"ticks": store.ticks,
+			"speed": speed,
+		}) + "\n"
+		for index in range(len(store)):
+			frames = store.chunk_frames(index)
+			frames["type"] = "replay_chunk"
+			yield dumps(frames) + "\n"
+			# Attende la durata del chunk in tempo di gioco, scalata per la velocità
+			if index + 1 < len(store):
+				await asyncio.sleep(frames["ticks"] / store.tick_rate / speed)
+	finally:
+		store.close()
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import time
+
+from backend.game.game_logging import process_task
+from backend.game.game_metrics import SCHEDULER_LATENESS
+
+logger = logging.getLogger(__name__)
+
+# Scheduler condiviso per tutte le partite del processo.
+# Invece di un task asyncio (e un timer a 120 Hz) per ogni Game, un unico task
+# avanza tutte le stanze attive. Le stanze sono distribuite su `phases` fasi
+# all'interno del tick, così il lavoro viene spalmato sull'intervallo invece
+# di concentrarsi tutto nello stesso istante.
+
+
+class GameTickScheduler:
+	"""
+	Avanza tutte le stanze registrate con un solo task per processo.
+
+	Ogni stanza viene assegnata alla fase meno carica e visitata una volta per
+	tick; la stanza decide quanti tick simulare tramite il proprio clock.
+	"""
+
+	def __init__(self, interval, phases=4, batch_engine=None, time_func=time.monotonic):
+		self.interval = interval
+		self.phases = phases
+		self.slot_interval = interval / phases
+		self.time_func = time_func
+		# Motore di fisica vettoriale opzionale (game_batch.BatchPhysicsEngine)
+		self.batch_engine = batch_engine
+
+		self._slots = [[] for _ in range(phases)]
+		self._room_slot = {}  # { Game: indice fase }
+		self._task = None
+		self._slot = 0          # Prossima fase da visitare
+		self._next_wake = None  # Istante (monotonic) della prossima visita
+
+		# Statistiche
+		self.cycles = 0           # Tick completi (tutte le fasi visitate)
+		self.deadline_misses = 0  # Fasi che hanno sforato il proprio budget
+		self.busy_ratio = 0.0     # Frazione del tick spesa a simulare (media mobile)
+		self.max_lateness = 0.0   # Ritardo massimo di risveglio osservato (s)
+		self.finished_skipped_ticks = 0  # Tick scartati dalle stanze già uscite dal loop
+
+	def add_room(self, room):
+		"""
+		Registra una stanza nella fase meno carica e avvia il loop se serve.
+		Una stanza già registrata (partita ripresa) resta nella sua fase, ma il
+		clock viene riallineato invece di recuperare i tick passati.
+		"""
+		slot = self._room_slot.get(room)
+		if slot is not None:
+			self._align(room, slot)
+			return
+		if room.clock.interval < self.interval:
+			logger.warning("[SCHEDULER] Stanza %s più veloce dello scheduler (%.4fs < %.4fs)", room.game_id, room.clock.interval, self.interval)
+		slot = min(range(self.phases), key=lambda i: len(self._slots[i]))
+		self._slots[slot].append(room)
+		self._room_slot[room] = slot
+
+		if self._task is None or self._task.done():
+			self._slot = 0
+			self._next_wake = self.time_func()
+			self._task = process_task(self._run())
+
+		self._align(room, slot)
+		logger.info("[SCHEDULER] Stanza %s registrata nella fase %s (%s stanze)", room.game_id, slot, len(self._room_slot))
+
+	def _align(self, room, slot):
+		# Allinea il clock della stanza alla sua fase: il tick scade mezza fase
+		# prima della visita, così il jitter del risveglio non fa perdere tick
+		visit = self._next_wake + ((slot - self._slot) % self.phases) * self.slot_interval
+		room.clock.start_at(visit + self.interval - self.slot_interval / 2)
+
+	def remove_room(self, room):
+		slot = self._room_slot.pop(room, None)
+		if slot is not None:
+			self._slots[slot].remove(room)
+			self.finished_skipped_ticks += room.clock.skipped_ticks
+			room.on_loop_stopped()
+
+	def __len__(self):
+		return len(self._room_slot)
+
+	def estimated_capacity(self):
+		"""Numero di stanze stimato prima di sforare la deadline del tick."""
+		if not self._room_slot or self.busy_ratio <= 0:
+			return None
+		return int(len(self._room_slot) / self.busy_ratio)
+
+	def stats(self):
+		return {
+			"rooms": len(self._room_slot),
+			"phases": [len(slot) for slot in self._slots],
+			"cycles": self.cycles,
+			"deadline_misses": self.deadline_misses,
+			"busy_ratio": round(self.busy_ratio, 4),
+			"max_lateness_ms": round(self.max_lateness * 1000, 3),
+			"skipped_ticks": self.finished_skipped_ticks + sum(room.clock.skipped_ticks for room in self._room_slot),
+			"estimated_capacity": self.estimated_capacity(),
+		}
+
+	async def _run(self):
+		logger.info("[SCHEDULER] Loop condiviso avviato")
+		cycle_busy = 0.0
+
+		try:
+			while self._room_slot:
+				slot = self._slot
+				started = self.time_func()
+				lateness = started - self._next_wake
+				self.max_lateness = max(self.max_lateness, lateness)
+				SCHEDULER_LATENESS.observe(max(0.0, lateness))
+
+				rooms = []
+				for room in list(self._slots[slot]):
+					if not room.is_running():
+						self.remove_room(room)
+						continue
+					rooms.append(room)
+
+				if self.batch_engine is not None:
+					await self.batch_engine.run_rooms(rooms)
+				else:
+					for room in rooms:
+						await room.run_due_ticks()
+
+				busy = self.time_func() - started
+				cycle_busy += busy
+				if busy > self.slot_interval:
+					self.deadline_misses += 1
+
+				self._slot = (slot + 1) % self.phases
+				if self._slot == 0:
+					self.cycles += 1
+					# Media mobile esponenziale del carico per tick
+					self.busy_ratio += 0.05 * (cycle_busy / self.interval - self.busy_ratio)
+					cycle_busy = 0.0
+
+				self._next_wake += self.slot_interval
+				delay = self._next_wake - self.time_func()
+				if delay < -self.interval:
+					# Troppo indietro: riallinea invece di recuperare a raffica
+					self._next_wake = self.time_func()
+					delay = 0
+				await asyncio.sleep(max(0.0, delay))
+		except Exception as e:
+			logger.error("[SCHEDULER] Errore fatale nel loop condiviso: %s", e)
+			import traceback
+			logger.error(traceback.format_exc())
+			for room in list(self._room_slot):
+				room.game_started = False
+				self.remove_room(room)
+		finally:
+			logger.info("[SCHEDULER] Loop condiviso terminato: %s", self.stats())
+
+
+_scheduler = None
+
+
+def get_scheduler():
+	"""
+	Restituisce lo scheduler del processo, creandolo al primo utilizzo. Visita
+	le stanze a settings.GAME_TICK_RATE; ogni stanza simula i tick del proprio clock.
+	"""
+	global _scheduler
+	if _scheduler is None:
+		from django.conf import settings
+		interval = 1 / getattr(settings, "GAME_TICK_RATE", 120)
+		batch_engine = None
+		if getattr(settings, "GAME_BATCH_PHYSICS", False):
+			from backend.game.game_batch import get_batch_engine
+			batch_engine = get_batch_engine()
+			if batch_engine is None:
+				logger.warning("[SCHEDULER] GAME_BATCH_PHYSICS attivo ma NumPy non è installato: uso la fisica scalare")
+		_scheduler = GameTickScheduler(interval, batch_engine=batch_engine)
+	return _scheduler
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+# Snapshot delta-compressi per il canale di gioco.
+# Ogni stanza conserva gli ultimi snapshot inviati (per tick). Un client che ha
+# confermato (ack) uno snapshot riceve solo i campi cambiati rispetto a quello;
+# alla connessione, su richiesta di resync o se il baseline è troppo vecchio
+# riceve invece un keyframe completo.
+
+# Campi sempre presenti in ogni frame (intestazione)
+HEADER_FIELDS = ("tick", "serverTime")
+
+# Campi di stato soggetti a delta
+STATE_FIELDS = (
+	"ballX", "ballY", "ballVX", "ballVY",
+	"paddle1Y", "paddle2Y",
+	"player1Score", "player2Score",
+	"player1Seq", "player2Seq",
+)
+
+
+class SnapshotHistory:
+	"""Buffer circolare degli ultimi snapshot inviati da una stanza."""
+
+	def __init__(self, size=64):
+		self.size = size
+		self._snapshots = OrderedDict()  # { tick: snapshot }
+
+	def record(self, snapshot):
+		tick = snapshot["tick"]
+		self._snapshots[tick] = snapshot
+		self._snapshots.move_to_end(tick)
+		while len(self._snapshots) > self.size:
+			self._snapshots.popitem(last=False)
+
+	def get(self, tick):
+		return self._snapshots.get(tick)
+
+	def latest(self):
+		if not self._snapshots:
+			return None
+		return next(reversed(self._snapshots.values()))
+
+	def clear(self):
+		self._snapshots.clear()
+
+	def usable_baseline(self, snapshot, baseline_tick):
+		"""Restituisce baseline_tick se può fare da base per `snapshot`, altrimenti None."""
+		if baseline_tick is None or baseline_tick >= snapshot["tick"] or baseline_tick not in self._snapshots:
+			return None
+		return baseline_tick
+
+	def frame(self, snapshot, baseline_tick=None):
+		"""
+		Costruisce il frame `game_update` da inviare per `snapshot`.
+
+		Se `baseline_tick` è ancora nel buffer il frame contiene solo i campi
+		cambiati e il tick di riferimento (`baseline`); altrimenti è un keyframe.
+		"""
+		baseline_tick = self.usable_baseline(snapshot, baseline_tick)
+		if baseline_tick is None:
+			frame = {"type": "game_update", "keyframe": True}
+			frame.update(snapshot)
+			return frame
+
+		baseline = self._snapshots[baseline_tick]
+		frame = {"type": "game_update", "baseline": baseline_tick}
+		for field in HEADER_FIELDS:
+			frame[field] = snapshot[field]
+		for field in STATE_FIELDS:
+			value = snapshot[field]
+			if baseline[field] != value:
+				frame[field] = value
+		return frame
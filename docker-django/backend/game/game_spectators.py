@@ -0,0 +1,136 @@
+import asyncio
+import logging
+
+from backend.game.game_protocol import dumps, encode_snapshot
+from backend.game.game_snapshots import SnapshotHistory
+
+logger = logging.getLogger(__name__)
+
+# Flusso per gli spettatori di una stanza.
+# Gli spettatori non passano dal percorso dei giocatori (notify_players): un
+# task separato preleva l'ultimo snapshot della stanza a frequenza ridotta
+# (settings.GAME_SPECTATOR_RATE), lo codifica una sola volta (delta rispetto
+# al frame precedente, keyframe per chi è appena entrato, binario) e invia lo
+# stesso frame a tutti. Il costo per i giocatori non dipende dal numero di
+# spettatori.
+
+
+class SpectatorBroadcaster:
+	"""Spettatori (in sola lettura) di una stanza e relativo flusso di snapshot."""
+
+	def __init__(self, room, rate=10):
+		self.room = room
+		self.interval = 1 / rate
+		self.members = []    # Consumer spettatori di questo processo
+		self._pending_keyframe = set()  # Spettatori che devono ricevere un keyframe
+		self._task = None
+		# Ultimo snapshot inviato: baseline comune per i delta di tutti gli spettatori
+		self.history = SnapshotHistory(size=2)
+		self.last_snapshot = None
+
+		# Statistiche
+		self.broadcasts = 0
+		self.frames_sent = 0
+
+	def __len__(self):
+		return len(self.members)
+
+	def add(self, consumer):
+		if consumer in self.members:
+			return
+		self.members.append(consumer)
+		self._pending_keyframe.add(consumer)
+		if self._task is None or self._task.done():
+			self._task = asyncio.create_task(self._run())
+		logger.info("[SPECTATOR] Nuovo spettatore per la partita %s (%s spettatori)", self.room.game_id, len(self.members))
+
+	def remove(self, consumer):
+		if consumer in self.members:
+			self.members.remove(consumer)
+		self._pending_keyframe.discard(consumer)
+
+	def request_keyframe(self, consumer):
+		"""Il prossimo frame per `consumer` sarà un keyframe (resync)."""
+		if consumer in self.members:
+			self._pending_keyframe.add(consumer)
+
+	async def _run(self):
+		try:
+			while self.members:
+				await asyncio.sleep(self.interval)
+				await self.broadcast()
+		except Exception as e:
+			logger.error("[SPECTATOR] Errore nel flusso spettatori della partita %s: %s", self.room.game_id, e)
+		finally:
+			self._task = None
+
+	async def broadcast(self):
+		"""Invia l'ultimo snapshot della stanza, se nuovo, a tutti gli spettatori."""
+		snapshot = self.room.snapshots.latest()
+		if snapshot is None or snapshot is self.last_snapshot:
+			return
+		previous = self.last_snapshot
+		self.last_snapshot = snapshot
+		self.history.record(snapshot)
+		self.broadcasts += 1
+
+		# Ogni formato viene codificato al più una volta per snapshot
+		frames = {}
+
+		def frame(kind):
+			if kind not in frames:
+				if kind == "binary":
+					frames[kind] = encode_snapshot(snapshot)
+				elif kind == "delta":
+					frames[kind] = dumps(self.history.frame(snapshot, previous["tick"]))
+				else:
+					frames[kind] = dumps(self.history.frame(snapshot))
+			return frames[kind]
+
+		for member in list(self.members):
+			try:
+				if member.binary_frames:
+					await member.send(bytes_data=frame("binary"))
+				elif previous is None or member in self._pending_keyframe:
+					await member.send(text_data=frame("keyframe"))
+				else:
+					await member.send(text_data=frame("delta"))
+				self._pending_keyframe.discard(member)
+				self.frames_sent += 1
+			except Exception as e:
+				logger.warning("[SPECTATOR] Invio fallito, spettatore rimosso: %s", e)
+				self.remove(member)
+
+	async def send_event(self, message):
+		"""Inoltra agli spettatori un evento della partita (fine, abbandono)."""
+		if not self.members:
+			return
+		text = dumps(message)
+		for member in list(self.members):
+			try:
+				await member.send(text_data=text)
+			except Exception:
+				self.remove(member)
+
+	async def close(self, code, message=None):
+		"""Stanza chiusa: invia `message`, chiude le connessioni degli spettatori e ferma il flusso."""
+		members, self.members = self.members, []
+		self._pending_keyframe.clear()
+		if self._task is not None:
+			self._task.cancel()
+			self._task = None
+		text = dumps(message) if message is not None else None
+		for member in members:
+			try:
+				if text is not None:
+					await member.send(text_data=text)
+				await member.close(code=code)
+			except Exception as e:
+				logger.warning("[SPECTATOR] Chiusura della connessione fallita: %s", e)
+
+	def stats(self):
+		return {
+			"spectators": len(self.members),
+			"broadcasts": self.broadcasts,
+			"frames_sent": self.frames_sent,
+		}
@@ -0,0 +1,49 @@
+# Stato della simulazione di una stanza.
+# Un oggetto a slot fissi modificato sul posto: il tick aggiorna i campi
+# invece di costruire nuovi dizionari per posizione e velocità della palla,
+# quindi una stanza in gioco non produce oggetti da raccogliere a ogni tick.
+# Gli snapshot per i client (Game.build_snapshot) e i keyframe
+# (game_replay.capture_state) sono viste costruite solo quando servono.
+
+
+class RoomState:
+	"""Palla, paddle e punteggi di una stanza (coordinate normalizzate 0-1)."""
+
+	__slots__ = (
+		"ball_x", "ball_y", "ball_vx", "ball_vy",
+		"paddle_left", "paddle_right",
+		"score_left", "score_right",
+	)
+
+	def __init__(self):
+		self.reset()
+
+	def reset(self):
+		"""Stato iniziale della partita: palla al centro, paddle centrati, 0-0."""
+		self.ball_x = 0.5
+		self.ball_y = 0.5
+		self.ball_vx = 0.01
+		self.ball_vy = 0.01
+		self.paddle_left = 0.5
+		self.paddle_right = 0.5
+		self.score_left = 0
+		self.score_right = 0
+
+	def paddle(self, side):
+		return self.paddle_left if side == "left" else self.paddle_right
+
+	def set_paddle(self, side, position):
+		if side == "left":
+			self.paddle_left = position
+		else:
+			self.paddle_right = position
+
+	def add_point(self, side):
+		if side == "left":
+			self.score_left += 1
+		else:
+			self.score_right += 1
+
+	def set_scores(self, left, right):
+		self.score_left = left
+		self.score_right = right
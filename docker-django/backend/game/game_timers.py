@@ -0,0 +1,147 @@
+import asyncio
+import inspect
+import logging
+import math
+import time
+
+from backend.game.game_logging import process_task
+
+logger = logging.getLogger(__name__)
+
+# Timer del processo su una hashed timing wheel.
+# Scadenze delle stanze (fine partita, attesa dell'avversario, conferma
+# "pronto", grazia per la riconnessione) passano tutte da qui invece di un
+# task asyncio con sleep ciascuna. La ruota ha `slots` caselle da
+# `tick_seconds`: un timer finisce nella casella del suo tick di scadenza
+# (modulo il numero di caselle), quindi inserimento e cancellazione sono
+# O(1) e ogni avanzamento visita solo la casella corrente. Un solo task per
+# processo fa girare la ruota finché ci sono timer in attesa.
+
+
+class Timer:
+	__slots__ = ("wheel", "deadline", "kind", "callback", "args", "active")
+
+	def __init__(self, wheel, deadline, kind, callback, args):
+		self.wheel = wheel
+		self.deadline = deadline  # Tick di scadenza
+		self.kind = kind
+		self.callback = callback
+		self.args = args
+		self.active = True
+
+	def cancel(self):
+		"""Annulla il timer (nessun effetto se è già scaduto o annullato)."""
+		if self.active:
+			self.wheel._remove(self)
+			self.wheel.cancelled[self.kind] = self.wheel.cancelled.get(self.kind, 0) + 1
+
+
+class TimingWheel:
+	"""Hashed timing wheel: `slots` caselle da `tick_seconds` secondi."""
+
+	def __init__(self, tick_seconds=0.25, slots=512, time_func=time.monotonic):
+		self.tick_seconds = tick_seconds
+		self.slots = [dict() for _ in range(slots)]  # Insiemi ordinati di Timer
+		self.time_func = time_func
+		self.origin = time_func()
+		self.current = 0  # Ultimo tick elaborato
+		self.pending = 0
+		self._task = None
+
+		# Statistiche per tipo di timer
+		self.pending_by_kind = {}
+		self.scheduled = {}
+		self.expired = {}
+		self.cancelled = {}
+		self.errors = 0
+
+	def _now_tick(self):
+		return int((self.time_func() - self.origin) / self.tick_seconds)
+
+	def schedule(self, delay, callback, *args, kind="timer"):
+		"""
+		Esegue `callback(*args)` fra `delay` secondi (arrotondati per eccesso al tick).
+		Una coroutine restituita dal callback viene avviata come task.
+		"""
+		if not self.pending:
+			# Ruota ferma: riparte dal tick attuale
+			self.current = self._now_tick()
+		deadline = self.current + max(1, math.ceil(delay / self.tick_seconds))
+		timer = Timer(self, deadline, kind, callback, args)
+		self.slots[deadline % len(self.slots)][timer] = None
+		self.pending += 1
+		self.pending_by_kind[kind] = self.pending_by_kind.get(kind, 0) + 1
+		self.scheduled[kind] = self.scheduled.get(kind, 0) + 1
+		self._ensure_running()
+		return timer
+
+	def _remove(self, timer):
+		timer.active = False
+		self.slots[timer.deadline % len(self.slots)].pop(timer, None)
+		self.pending -= 1
+		self.pending_by_kind[timer.kind] -= 1
+
+	def advance(self):
+		"""Esegue i timer scaduti fino al tick attuale. Restituisce quanti ne sono scaduti."""
+		target = self._now_tick()
+		fired = 0
+		while self.current < target and self.pending:
+			self.current += 1
+			slot = self.slots[self.current % len(self.slots)]
+			if not slot:
+				continue
+			# I timer di giri successivi della ruota restano nella casella
+			for timer in [t for t in slot if t.deadline <= self.current]:
+				self._remove(timer)
+				self.expired[timer.kind] = self.expired.get(timer.kind, 0) + 1
+				fired += 1
+				self._fire(timer)
+		if not self.pending:
+			self.current = max(self.current, target)
+		return fired
+
+	def _fire(self, timer):
+		try:
+			result = timer.callback(*timer.args)
+			if inspect.isawaitable(result):
+				asyncio.ensure_future(result)
+		except Exception as e:
+			self.errors += 1
+			logger.error("[TIMERS] Errore nel timer %s: %s", timer.kind, e)
+
+	def _ensure_running(self):
+		try:
+			loop = asyncio.get_running_loop()
+		except RuntimeError:
+			# Nessun event loop (test, comandi): la ruota avanza con advance()
+			return
+		if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+			self._task = process_task(self._run(), loop)
+
+	async def _run(self):
+		try:
+			while self.pending:
+				await asyncio.sleep(self.tick_seconds)
+				self.advance()
+		finally:
+			logger.debug("[TIMERS] Ruota ferma: %s", self.stats())
+
+	def stats(self):
+		return {
+			"pending": {kind: count for kind, count in self.pending_by_kind.items() if count},
+			"scheduled": dict(self.scheduled),
+			"expired": dict(self.expired),
+			"cancelled": dict(self.cancelled),
+			"errors": self.errors,
+		}
+
+
+_timing_wheel = None
+
+
+def get_timing_wheel():
+	"""Restituisce la timing wheel del processo, creandola al primo utilizzo."""
+	global _timing_wheel
+	if _timing_wheel is None:
+		_timing_wheel = TimingWheel()
+	return _timing_wheel
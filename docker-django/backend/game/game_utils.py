@@ -14,7 +14,7 @@ def find_available_game_session():
 		session = GameSession.objects.filter(status="waiting", player2__isnull=True).first()
 		return session
 	except Exception as e:
-		logger.error(f"Errore nella ricerca di una sessione disponibile: {e}")
+		logger.error("Errore nella ricerca di una sessione disponibile: %s", e)
 		return None
 
 def create_new_game_session(player1_user):
@@ -29,14 +29,14 @@ def create_new_game_session(player1_user):
 	"""
 	from .models import GameSession  # Import protetto dentro funzione
 
-	logger.info(f"Creazione di una nuova sessione di gioco per l'utente: {player1_user.username}")
+	logger.info("Creazione di una nuova sessione di gioco per l'utente: %s", player1_user.username)
 
 	try:
 		new_game = GameSession.objects.create(player1=player1_user, id=uuid.uuid4())
-		logger.info(f"Nuova sessione di gioco creata con ID: {new_game.id}")
+		logger.info("Nuova sessione di gioco creata con ID: %s", new_game.id)
 		return new_game
 	except Exception as e:
-		logger.error(f"Errore durante la creazione della sessione di gioco: {e}")
+		logger.error("Errore durante la creazione della sessione di gioco: %s", e)
 		return None
 
 @sync_to_async
@@ -46,7 +46,7 @@ def save_match_history(game_id, left_score, right_score, abandoned=False):
 	try:
 		session = GameSession.objects.filter(game_id=game_id).first()
 		if not session:
-			logger.warning(f"Sessione di gioco con ID {game_id} non trovata.")
+			logger.warning("Sessione di gioco con ID %s non trovata.", game_id)
 			return
 
 		player1 = session.player1
@@ -104,10 +104,10 @@ def save_match_history(game_id, left_score, right_score, abandoned=False):
 				profile.losses += 1
 				profile.save()
 
-		logger.info(f"Match salvato correttamente per il game_id {game_id}. {'(Abbandonato)' if abandoned else ''} {'(Torneo)' if session.session_type == 'tournament' else ''}")
+		logger.info("Match salvato correttamente per il game_id %s. %s %s", game_id, '(Abbandonato)' if abandoned else '', '(Torneo)' if session.session_type == 'tournament' else '')
 		return match1
 
 	except Exception as e:
-		logger.error(f"[DB ERROR] Impossibile salvare il match per il game_id {game_id}: {e}")
+		logger.error("[DB ERROR] Impossibile salvare il match per il game_id %s: %s", game_id, e)
 		import traceback
 		logger.error(traceback.format_exc())
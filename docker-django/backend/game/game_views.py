@@ -2,12 +2,13 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from .models import GameSession
+from .models import GameSession, MatchHistory
 from django.shortcuts import get_object_or_404
 from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
+import os
 import uuid
 import logging
 
@@ -98,7 +99,7 @@ class FindOrCreateGameSession(APIView):
 						'player1_username': new_session.player1_username,
 					})
 		except Exception as e:
-			logger.error(f"Error in FindOrCreateGameSession: {str(e)}")
+			logger.error("Error in FindOrCreateGameSession: %s", str(e))
 			return Response(
 				{'error': 'Failed to create or join game session'},
 				status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -129,9 +130,9 @@ class FindOrCreateGameSession(APIView):
 			if stale_sessions.exists():
 				count = stale_sessions.count()
 				stale_sessions.update(status='cancelled')
-				logger.info(f"[CLEANUP] Cancelled {count} stale sessions")
+				logger.info("[CLEANUP] Cancelled %s stale sessions", count)
 		except Exception as e:
-			logger.error(f"Error in cleanup_stale_sessions: {str(e)}")
+			logger.error("Error in cleanup_stale_sessions: %s", str(e))
 			# Non solleviamo l'eccezione per non bloccare la creazione della sessione
 
 class JoinGameSession(APIView):
@@ -251,4 +252,71 @@ class CleanupGameSession(APIView):
 			return Response(
 				{'error': f'Failed to cleanup game session: {str(e)}'},
 				status=status.HTTP_500_INTERNAL_SERVER_ERROR
-			) 
\ No newline at end of file
+			) 
+
+class ReplayStreamAPIView(APIView):
+	"""
+	API view per riprodurre in streaming il replay di una partita.
+	Legge l'archivio colonnare un chunk alla volta e lo invia come NDJSON
+	alla velocità indicata da ?speed= (1 = tempo reale).
+	"""
+	permission_classes = [IsAuthenticated]
+
+	MIN_SPEED = 0.25
+	MAX_SPEED = 64.0
+
+	@staticmethod
+	def played_by(user, game_id):
+		"""True se `user` ha giocato la partita `game_id` (storico o sessione ancora aperta)."""
+		if MatchHistory.objects.filter(game_id=game_id, user=user).exists():
+			return True
+		return GameSession.objects.filter(Q(player1=user) | Q(player2=user), game_id=game_id).exists()
+
+	def get(self, request, game_id, *args, **kwargs):
+		from django.conf import settings
+		from django.http import StreamingHttpResponse
+		from .game_replay_store import store_path, stream_replay
+
+		try:
+			speed = float(request.query_params.get('speed', 1))
+		except ValueError:
+			speed = None
+		if speed is None or not self.MIN_SPEED <= speed <= self.MAX_SPEED:
+			return Response(
+				{'error': f'speed deve essere tra {self.MIN_SPEED} e {self.MAX_SPEED}'},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+
+		# Il replay è visibile solo ai giocatori della partita; per gli altri non esiste
+		if not self.played_by(request.user, game_id):
+			return Response({'error': 'Replay non disponibile'}, status=status.HTTP_404_NOT_FOUND)
+
+		path = store_path(settings.GAME_REPLAY_DIR, game_id)
+		if not os.path.exists(path):
+			return Response({'error': 'Replay non disponibile'}, status=status.HTTP_404_NOT_FOUND)
+
+		response = StreamingHttpResponse(stream_replay(path, speed), content_type='application/x-ndjson')
+		response['Cache-Control'] = 'no-cache'
+		response['X-Accel-Buffering'] = 'no'  # Niente buffering in nginx: i chunk arrivano col loro ritmo
+		return response
+
+
+async def metrics_view(request):
+	"""
+	Metriche del worker in formato Prometheus (vedi game_metrics).
+	Vista asincrona: legge lo stato delle stanze nello stesso event loop del gioco.
+	Richiede l'header "Authorization: Bearer <settings.GAME_METRICS_TOKEN>"; senza
+	token l'endpoint non esiste (404), salvo opt-in esplicito con GAME_METRICS_PUBLIC.
+	"""
+	import hmac
+	from django.conf import settings
+	from django.http import HttpResponse
+	from .game_metrics import CONTENT_TYPE, METRICS
+
+	token = getattr(settings, "GAME_METRICS_TOKEN", "")
+	if not token:
+		if not getattr(settings, "GAME_METRICS_PUBLIC", False):
+			return HttpResponse(status=404)
+	elif not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+		return HttpResponse(status=401)
+	return HttpResponse(METRICS.render(), content_type=CONTENT_TYPE)
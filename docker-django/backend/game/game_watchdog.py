@@ -0,0 +1,186 @@
+import asyncio
+import collections
+import inspect
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from backend.game.game_logging import process_task
+from backend.game.game_metrics import LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+# Watchdog dell'event loop del worker.
+# Un heartbeat sul loop dorme `interval` secondi e misura quanto si sveglia in
+# ritardo (lag): i campioni vanno nell'istogramma pong_loop_lag_seconds e in
+# una finestra da cui si calcolano i percentili esportati su /metrics.
+# Un thread separato controlla l'ultimo battito: se il loop non risponde da
+# più di `threshold` secondi, il loop è bloccato in quel momento da codice
+# sincrono (ORM fuori da sync_to_async, I/O, calcoli lunghi) e il thread
+# cattura lo stack del thread del loop e il task in esecuzione, cioè proprio
+# il punto che blocca. Lo stack viene registrato una volta per blocco.
+
+LAG_WINDOW = 1200  # Campioni per i percentili (un minuto con interval=0.05)
+QUANTILES = (0.5, 0.9, 0.99)
+MAX_STALLS = 20    # Blocchi recenti conservati con il loro stack
+
+
+class LoopWatchdog:
+	def __init__(self, interval=0.05, threshold=0.1, time_func=time.monotonic):
+		self.interval = interval
+		self.threshold = threshold
+		self.time_func = time_func
+
+		self.loop = None
+		self.loop_thread_id = None
+		self.last_beat = None
+		self._task = None
+		self._thread = None
+		self._stop = threading.Event()
+
+		self.samples = collections.deque(maxlen=LAG_WINDOW)
+		self.max_lag = 0.0
+		self.stalls = collections.deque(maxlen=MAX_STALLS)  # { started, duration, task, coroutine, stack }
+		self.stall_count = 0
+		self._current_stall = None
+
+	def start(self):
+		"""Avvia heartbeat e thread di controllo sul loop in esecuzione (idempotente)."""
+		loop = asyncio.get_running_loop()
+		if self._task is not None and not self._task.done() and self.loop is loop:
+			return
+		self.loop = loop
+		self.loop_thread_id = threading.get_ident()
+		self.last_beat = self.time_func()
+		self._stop.clear()
+		self._task = process_task(self._heartbeat(), loop)
+		if self._thread is None or not self._thread.is_alive():
+			self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+			self._thread.start()
+		logger.info("[WATCHDOG] Avviato: intervallo %.0f ms, soglia %.0f ms", self.interval * 1000, self.threshold * 1000)
+
+	def stop(self):
+		self._stop.set()
+		if self._task is not None:
+			self._task.cancel()
+			self._task = None
+
+	async def _heartbeat(self):
+		while not self._stop.is_set():
+			before = self.time_func()
+			self.last_beat = before
+			await asyncio.sleep(self.interval)
+			lag = max(0.0, self.time_func() - before - self.interval)
+			self.last_beat = self.time_func()
+			self.samples.append(lag)
+			self.max_lag = max(self.max_lag, lag)
+			LOOP_LAG.observe(lag)
+			if self._current_stall is not None:
+				self._end_stall(lag)
+
+	def _watch(self):
+		"""Thread di controllo: rileva i blocchi mentre sono in corso."""
+		while not self._stop.wait(self.interval / 2):
+			if self.last_beat is None or self._current_stall is not None:
+				continue
+			# Loop fermato o chiuso (fine del processo, test): niente da controllare
+			if self.loop is None or not self.loop.is_running():
+				continue
+			blocked = self.time_func() - self.last_beat - self.interval
+			if blocked > self.threshold:
+				self._capture_stall(blocked)
+
+	def _capture_stall(self, blocked):
+		frame = sys._current_frames().get(self.loop_thread_id)
+		stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+		task = None
+		try:
+			current = asyncio.current_task(self.loop)
+			if current is not None:
+				task = f"{current.get_name()} ({current.get_coro().__qualname__})"
+		except RuntimeError:
+			pass
+		coroutine = blocking_coroutine(frame)
+		self._current_stall = {
+			"started": time.time() - blocked,
+			"duration": blocked,
+			"task": task,
+			"coroutine": coroutine,
+			"stack": stack,
+		}
+		self.stall_count += 1
+		logger.warning("[WATCHDOG] Event loop bloccato da %.0f ms in %s, task %s:\n%s", blocked * 1000, coroutine, task, stack)
+
+	def _end_stall(self, lag):
+		stall, self._current_stall = self._current_stall, None
+		stall["duration"] = max(stall["duration"], lag)
+		self.stalls.append(stall)
+		logger.warning("[WATCHDOG] Event loop di nuovo libero dopo %.0f ms (%s)", stall['duration'] * 1000, stall['coroutine'])
+
+	def percentiles(self):
+		"""Percentili del lag sulla finestra recente: { quantile: secondi }."""
+		if not self.samples:
+			return {}
+		ordered = sorted(self.samples)
+		last = len(ordered) - 1
+		return {q: ordered[min(last, int(q * len(ordered)))] for q in QUANTILES}
+
+	def stats(self):
+		return {
+			"samples": len(self.samples),
+			"percentiles_ms": {str(q): round(v * 1000, 3) for q, v in self.percentiles().items()},
+			"max_lag_ms": round(self.max_lag * 1000, 3),
+			"stalls": self.stall_count,
+			"last_stall": dict(self.stalls[-1], stack=None) if self.stalls else None,
+		}
+
+
+def blocking_coroutine(frame):
+	"""Coroutine più interna dello stack (l'handler che sta bloccando il loop), come modulo.nome."""
+	while frame is not None:
+		if frame.f_code.co_flags & inspect.CO_COROUTINE:
+			return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}"
+		frame = frame.f_back
+	return None
+
+
+_watchdog = None
+
+
+def start_loop_watchdog():
+	"""Avvia il watchdog del processo sul loop corrente (settings.GAME_LOOP_WATCHDOG)."""
+	global _watchdog
+	from django.conf import settings
+	if not getattr(settings, "GAME_LOOP_WATCHDOG", True):
+		return None
+	if _watchdog is None:
+		_watchdog = LoopWatchdog(
+			interval=getattr(settings, "GAME_LOOP_WATCHDOG_INTERVAL_MS", 50) / 1000,
+			threshold=getattr(settings, "GAME_LOOP_LAG_THRESHOLD_MS", 100) / 1000,
+		)
+	_watchdog.start()
+	return _watchdog
+
+
+class LoopWatchdogMiddleware:
+	"""
+	Middleware ASGI del worker (backend.asgi): avvia il watchdog sul loop del
+	server alla prima connessione o richiesta, qualunque sia il protocollo.
+	"""
+
+	def __init__(self, app):
+		self.app = app
+		self.started = False
+
+	async def __call__(self, scope, receive, send):
+		if not self.started:
+			self.started = True
+			start_loop_watchdog()
+		return await self.app(scope, receive, send)
+
+
+def get_loop_watchdog():
+	"""Watchdog del processo, None se non è ancora stato avviato."""
+	return _watchdog
@@ -0,0 +1,38 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand
+
+from backend.game.game_bench import measure_tick_allocations
+
+
+class Command(BaseCommand):
+    help = 'Misura headless le allocazioni per tick delle stanze in gioco (memoria trattenuta, picco, raccolte del GC)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=50, help='Stanze simulate')
+        parser.add_argument('--ticks', type=int, default=2000, help='Tick misurati per stanza')
+        parser.add_argument('--tick-rate', type=int, default=120, help='Frequenza di simulazione (Hz)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true', help='Stampa il risultato in JSON')
+
+    def handle(self, *args, **options):
+        # I log delle stanze (creazione, gol) falserebbero le misure
+        logging.disable(logging.INFO)
+        try:
+            result = measure_tick_allocations(
+                rooms=options['rooms'], ticks=options['ticks'],
+                tick_rate=options['tick_rate'], seed=options['seed'],
+            )
+        finally:
+            logging.disable(logging.NOTSET)
+
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+            return
+        self.stdout.write(
+            f"{result['rooms']} stanze x {result['ticks']} tick a {result['tick_rate']} Hz: "
+            f"{result['room_ticks_per_second']} tick-stanza/s, "
+            f"{result['retained_bytes_per_room']} byte trattenuti per stanza, "
+            f"picco {result['peak_bytes']} byte, {result['gc_collections']} raccolte del GC"
+        )
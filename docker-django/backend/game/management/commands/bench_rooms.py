@@ -0,0 +1,58 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.game.game_bench import check_regressions, measure_room_capacity
+
+
+class Command(BaseCommand):
+    help = 'Benchmark headless di un worker: N stanze complete guidate da consumer finti sul channel layer in memoria'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=50, help='Stanze simulate (due giocatori ciascuna)')
+        parser.add_argument('--ticks', type=int, default=1200, help='Tick misurati per stanza')
+        parser.add_argument('--tick-rate', type=int, default=120, help='Frequenza di simulazione (Hz)')
+        parser.add_argument('--warmup-ticks', type=int, default=120)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--binary', action='store_true', help='Client con frame di stato binari')
+        parser.add_argument('--json', action='store_true', help='Stampa il risultato in JSON')
+        # Soglie per la CI: il comando termina con errore se una è superata
+        parser.add_argument('--baseline', help='File JSON di un risultato precedente con cui confrontarsi')
+        parser.add_argument('--tolerance', type=float, default=0.1, help='Peggioramento ammesso rispetto al baseline (frazione)')
+        parser.add_argument('--min-ticks-per-second', type=float, help='Minimo di tick-stanza al secondo')
+        parser.add_argument('--max-tick-p99-ms', type=float, help='Massimo del p99 di un giro di tick (ms)')
+        parser.add_argument('--max-memory-per-room', type=int, help='Massimo di byte per stanza')
+
+    def handle(self, *args, **options):
+        result = async_to_sync(measure_room_capacity)(
+            rooms=options['rooms'], ticks=options['ticks'],
+            tick_rate=options['tick_rate'], seed=options['seed'],
+            warmup_ticks=options['warmup_ticks'], binary=options['binary'],
+        )
+
+        regressions = []
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                regressions += check_regressions(result, json.load(f), options['tolerance'])
+        if options['min_ticks_per_second'] is not None and result['room_ticks_per_second'] < options['min_ticks_per_second']:
+            regressions.append(f"room_ticks_per_second: {result['room_ticks_per_second']} < {options['min_ticks_per_second']}")
+        if options['max_tick_p99_ms'] is not None and result['tick_p99_ms'] > options['max_tick_p99_ms']:
+            regressions.append(f"tick_p99_ms: {result['tick_p99_ms']} > {options['max_tick_p99_ms']}")
+        if options['max_memory_per_room'] is not None and result['memory_per_room_bytes'] > options['max_memory_per_room']:
+            regressions.append(f"memory_per_room_bytes: {result['memory_per_room_bytes']} > {options['max_memory_per_room']}")
+        result['regressions'] = regressions
+
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+        else:
+            self.stdout.write(
+                f"{result['rooms']} stanze a {result['tick_rate']} Hz: "
+                f"{result['room_ticks_per_second']} tick-stanza/s, "
+                f"giro di tick p50 {result['tick_p50_ms']} ms / p99 {result['tick_p99_ms']} ms "
+                f"(budget {result['tick_budget_ms']} ms, capacità stimata {result['estimated_capacity']} stanze), "
+                f"{result['memory_per_room_bytes']} byte per stanza, "
+                f"{result['messages_per_second']} messaggi/s ({result['bytes_per_second']} byte/s)"
+            )
+        if regressions:
+            raise CommandError('Regressioni rispetto alle soglie: ' + '; '.join(regressions))
@@ -0,0 +1,27 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.game.game_registry import build_registry
+
+
+class Command(BaseCommand):
+    help = 'Avvia il drain di un worker di gioco: nessuna nuova stanza, partite trasferite agli altri worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('worker', nargs='?', help='Id del worker (GAME_WORKER_ID); senza argomento elenca i worker attivi')
+
+    def handle(self, *args, **options):
+        registry = build_registry()
+
+        if not options['worker']:
+            peers = async_to_sync(registry.peers)()
+            for worker, rooms in sorted(peers.items()):
+                self.stdout.write(f"{worker}: {rooms} stanze")
+            return
+
+        channel = async_to_sync(registry.worker_channel)(options['worker'])
+        if channel is None:
+            raise CommandError(f"Worker non trovato nel registro: {options['worker']}")
+        async_to_sync(get_channel_layer().send)(channel, {'type': 'worker.drain'})
+        self.stdout.write(self.style.SUCCESS(f"Drain richiesto al worker {options['worker']}"))
@@ -0,0 +1,53 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.game.game_replay import ReplaySimulator, replay_path
+
+
+class Command(BaseCommand):
+    help = 'Ri-simula headless il replay di una partita remota e verifica i keyframe registrati'
+
+    def add_arguments(self, parser):
+        parser.add_argument('replay', help='File di replay (.jsonl) oppure game_id da cercare in GAME_REPLAY_DIR')
+        parser.add_argument('--no-verify', action='store_true', help='Non confrontare lo stato con i keyframe')
+        parser.add_argument('--json', action='store_true', help='Stampa il riepilogo in JSON')
+        parser.add_argument('--store', action='store_true', help="Scrive anche l'archivio colonnare (.prpl) accanto al replay")
+
+    def handle(self, *args, **options):
+        path = options['replay']
+        if not os.path.exists(path):
+            path = replay_path(settings.GAME_REPLAY_DIR, path)
+        if not os.path.exists(path):
+            raise CommandError(f"Replay non trovato: {options['replay']}")
+
+        try:
+            result = ReplaySimulator(path).run(verify=not options['no_verify'])
+        except (ValueError, KeyError) as e:
+            raise CommandError(f"Replay non valido: {e}")
+
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+        else:
+            self.stdout.write(
+                f"Partita {result['game_id']}: {result['ticks']} tick in {result['seconds']:.3f}s "
+                f"({result['ticks_per_second'] or 0:.0f} tick/s), {result['goals']} gol, "
+                f"punteggio {result['scores'][0]}-{result['scores'][1]}"
+            )
+
+        if result['mismatches']:
+            first = result['mismatches'][0]
+            raise CommandError(
+                f"Ri-simulazione divergente in {len(result['mismatches'])} keyframe "
+                f"(primo al tick {first['tick']}: {', '.join(first['fields'])})"
+            )
+        if not options['json']:
+            self.stdout.write(self.style.SUCCESS(f"{result['keyframes_checked']} keyframe verificati"))
+
+        if options['store']:
+            from backend.game.game_replay_store import build_replay_store
+            store = build_replay_store(path)
+            if not options['json']:
+                self.stdout.write(self.style.SUCCESS(f"Archivio colonnare scritto in {store}"))
@@ -24,7 +24,7 @@ class Command(BaseCommand):
         if count > 0:
             # Imposta questi utenti come offline
             profiles.update(is_online=False)
-            logger.info(f"Aggiornati {count} utenti da online a offline")
+            logger.info("Aggiornati %s utenti da online a offline", count)
             self.stdout.write(
                 self.style.SUCCESS(f"Aggiornati con successo {count} utenti da online a offline")
             )
@@ -25,7 +25,7 @@ def user_profile_image_path(instance, filename):
 def delete_old_profile_image(sender, instance, **kwargs):
 	"""Elimina la vecchia immagine del profilo quando viene caricata una nuova"""
 	logger = logging.getLogger(__name__)
-	logger.info(f"delete_old_profile_image: Inizio processo per l'istanza {instance.pk}")
+	logger.info("delete_old_profile_image: Inizio processo per l'istanza %s", instance.pk)
 	
 	if not instance.pk:  # Se è una nuova istanza, non c'è vecchia immagine da eliminare
 		logger.info("delete_old_profile_image: Nuova istanza, nessuna immagine da eliminare")
@@ -33,31 +33,31 @@ def delete_old_profile_image(sender, instance, **kwargs):
 	
 	try:
 		old_instance = UserProfile.objects.get(pk=instance.pk)
-		logger.info(f"delete_old_profile_image: Vecchia istanza trovata con immagine: {old_instance.profile_image}")
+		logger.info("delete_old_profile_image: Vecchia istanza trovata con immagine: %s", old_instance.profile_image)
 		
 		if old_instance.profile_image and old_instance.profile_image != instance.profile_image:
-			logger.info(f"delete_old_profile_image: Immagine diversa rilevata. Vecchia: {old_instance.profile_image}, Nuova: {instance.profile_image}")
+			logger.info("delete_old_profile_image: Immagine diversa rilevata. Vecchia: %s, Nuova: %s", old_instance.profile_image, instance.profile_image)
 			
 			# Verifica che non sia l'immagine di default
 			if old_instance.profile_image.name != 'profile_pics/default.jpg':
-				logger.info(f"delete_old_profile_image: Non è l'immagine di default, procedo con l'eliminazione")
+				logger.info("delete_old_profile_image: Non è l'immagine di default, procedo con l'eliminazione")
 				if os.path.isfile(old_instance.profile_image.path):
-					logger.info(f"delete_old_profile_image: File trovato al percorso: {old_instance.profile_image.path}")
+					logger.info("delete_old_profile_image: File trovato al percorso: %s", old_instance.profile_image.path)
 					try:
 						os.remove(old_instance.profile_image.path)
 						logger.info("delete_old_profile_image: File eliminato con successo")
 					except Exception as e:
-						logger.error(f"delete_old_profile_image: Errore durante l'eliminazione del file: {str(e)}")
+						logger.error("delete_old_profile_image: Errore durante l'eliminazione del file: %s", str(e))
 				else:
-					logger.warning(f"delete_old_profile_image: File non trovato al percorso: {old_instance.profile_image.path}")
+					logger.warning("delete_old_profile_image: File non trovato al percorso: %s", old_instance.profile_image.path)
 			else:
 				logger.info("delete_old_profile_image: È l'immagine di default, non la elimino")
 		else:
 			logger.info("delete_old_profile_image: Nessuna differenza nelle immagini o immagine non presente")
 	except UserProfile.DoesNotExist:
-		logger.error(f"delete_old_profile_image: Profilo non trovato per pk={instance.pk}")
+		logger.error("delete_old_profile_image: Profilo non trovato per pk=%s", instance.pk)
 	except Exception as e:
-		logger.error(f"delete_old_profile_image: Errore imprevisto: {str(e)}")
+		logger.error("delete_old_profile_image: Errore imprevisto: %s", str(e))
 
 class UserProfile(models.Model):
 	user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='game_userprofile')
@@ -100,7 +100,7 @@ class UserProfile(models.Model):
 					# Verifica che non sia l'immagine di default
 					if old_instance.profile_image.name != 'profile_pics/default.jpg':
 						if os.path.isfile(old_instance.profile_image.path):
-							logger.info(f"Eliminazione vecchia immagine: {old_instance.profile_image.path}")
+							logger.info("Eliminazione vecchia immagine: %s", old_instance.profile_image.path)
 							os.remove(old_instance.profile_image.path)
 							logger.info("Vecchia immagine eliminata con successo")
 			except UserProfile.DoesNotExist:
@@ -243,7 +243,7 @@ class TournamentMatch(models.Model):
 
 def generate_uuid():
 	new_uuid = uuid.uuid4()
-	logger.info(f"UUID generato: {new_uuid}")
+	logger.info("UUID generato: %s", new_uuid)
 	return new_uuid
 
 class GameSession(models.Model):
@@ -2,15 +2,79 @@ from django.test import TestCase
 
 # Create your tests here.
 from django.contrib.auth.models import User
-from .models import GameSession
+from .models import GameSession, MatchHistory
 import logging
 logger = logging.getLogger(__name__)
 import uuid
+from unittest import mock
 from .game_utils import create_new_game_session
 from django.conf import settings
 from django.test import TestCase
 from django.db import connection
 
+import asyncio
+import io
+import json
+import os
+import random
+import signal
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from backend.game import game_checkpoint, game_drain, game_registry, game_replay
+from .consumers import ROOM_EXPIRED_CLOSE_CODE, Game, GameConsumer
+from .game_batch import BatchPhysicsEngine, np
+from .game_bench import check_regressions, measure_room_capacity, measure_tick_allocations
+from .game_checkpoint import CheckpointWriter, DiskCheckpointStore, checkpoint_state
+from .game_clock import FixedTimestepClock
+from .game_drain import drain_settings, hand_off_room
+from .game_inputs import InputMailbox
+from .game_logging import GameLogHandler, RoomEventLog, bind_room, process_task, unbind_room
+from .game_metrics import MetricsRegistry, RoomRateTracker, TICK_PHASE_SECONDS
+from .game_physics import BALL_RADIUS, GOAL_LEFT, GOAL_RIGHT, NO_GOAL, step_ball
+from .game_protocol import SNAPSHOT_FRAME, encode_snapshot, decode_snapshot
+from .game_ratelimit import InboundRateLimiter
+from .game_registry import LocalRoomRegistry, RoomHost
+from .game_replay import ReplayRecorder, ReplaySimulator, capture_state, read_replay
+from .game_replay_store import ReplayStore, build_replay_store, store_path, stream_replay
+from .game_scheduler import GameTickScheduler
+from .game_snapshots import SnapshotHistory
+from .game_timers import TimingWheel
+from .game_views import ReplayStreamAPIView, metrics_view
+from .game_watchdog import LoopWatchdog
+
+
+# I test non usano Redis: registro delle stanze locale e checkpoint su disco
+_local_stores = None
+
+
+def setUpModule():
+	global _local_stores
+	directory = tempfile.TemporaryDirectory()
+	_local_stores = (directory, override_settings(
+		GAME_ROOM_REGISTRY="local", GAME_CHECKPOINT_STORE="disk", GAME_CHECKPOINT_DIR=directory.name,
+	))
+	_local_stores[1].enable()
+	game_checkpoint._checkpoint_store = None
+	game_registry._room_host = None
+
+
+def tearDownModule():
+	directory, overrides = _local_stores
+	overrides.disable()
+	directory.cleanup()
+	game_checkpoint._checkpoint_store = None
+	game_registry._room_host = None
+
 
 class GameSessionTestCase(TestCase):
 	def test_create_new_game_session(self):
@@ -26,3 +90,1290 @@ class GameSessionTestCase(TestCase):
 		self.assertEqual(new_game.player1, user)
 		game_from_db = GameSession.objects.get(id=new_game.id)
 		self.assertEqual(game_from_db, new_game)
+
+
+class FixedTimestepClockTestCase(SimpleTestCase):
+	def setUp(self):
+		self.now = 100.0
+		self.clock = FixedTimestepClock(0.25, max_catchup_ticks=3, time_func=lambda: self.now)
+		self.clock.start()
+
+	def test_no_drift_between_ticks(self):
+		self.now += 0.375
+		self.assertEqual(self.clock.due_ticks(), 1)
+		# Il prossimo tick resta allineato alla griglia originale (100.5)
+		self.assertEqual(self.clock.time_until_next_tick(), 0.125)
+		self.now += 0.125
+		self.assertEqual(self.clock.due_ticks(), 1)
+		self.assertEqual(self.clock.overruns, 0)
+
+	def test_catchup_is_capped(self):
+		self.now += 2.625
+		self.assertEqual(self.clock.due_ticks(), 3)
+		self.assertEqual(self.clock.overruns, 1)
+		self.assertEqual(self.clock.skipped_ticks, 7)
+		self.assertEqual(self.clock.due_ticks(), 0)
+
+
+class ScheduledRoom:
+	"""Stanza minima per lo scheduler: si ferma da sola dopo `ticks` tick."""
+
+	def __init__(self, interval, ticks):
+		self.game_id = uuid.uuid4()
+		self.clock = FixedTimestepClock(interval)
+		self.ticks = ticks
+		self.game_started = True
+		self.visits = 0
+		self.stopped = 0
+
+	def is_running(self):
+		return self.game_started
+
+	async def run_due_ticks(self):
+		self.visits += 1
+		self.ticks -= self.clock.due_ticks()
+		if self.ticks <= 0:
+			self.game_started = False
+
+	def on_loop_stopped(self):
+		self.stopped += 1
+
+
+class GameTickSchedulerTestCase(SimpleTestCase):
+	def test_one_task_drives_every_room_until_it_stops(self):
+		async def scenario():
+			scheduler = GameTickScheduler(0.01, phases=2)
+			rooms = [ScheduledRoom(0.01, ticks) for ticks in (3, 10, 10)]
+			for room in rooms:
+				scheduler.add_room(room)
+			task = scheduler._task
+			phases = scheduler.stats()["phases"]
+
+			# La prima stanza finisce prima: esce dal loop, le altre continuano
+			for _ in range(400):
+				if rooms[0].stopped:
+					break
+				await asyncio.sleep(0.005)
+			remaining = len(scheduler)
+			await asyncio.wait_for(task, 2)
+			return scheduler, rooms, task, phases, remaining
+
+		scheduler, rooms, task, phases, remaining = async_to_sync(scenario)()
+
+		self.assertEqual(phases, [2, 1])
+		self.assertEqual(remaining, 2)
+		# Un solo task per tutte le stanze, terminato quando non ne restano
+		self.assertIs(scheduler._task, task)
+		self.assertEqual(len(scheduler), 0)
+		for room in rooms:
+			self.assertFalse(room.game_started)
+			self.assertEqual(room.stopped, 1)
+			self.assertGreaterEqual(room.visits, 2)
+		self.assertGreater(rooms[1].visits, rooms[0].visits)
+
+	def test_re_added_room_is_realigned_to_its_phase(self):
+		async def scenario():
+			scheduler = GameTickScheduler(0.01, phases=2)
+			other, room = ScheduledRoom(0.01, 10), ScheduledRoom(0.01, 10)
+			scheduler.add_room(other)
+			scheduler.add_room(room)
+			aligned = room.clock.next_tick_time
+			# Partita sospesa e ripresa prima che lo scheduler la visitasse: clock fermo da un secondo
+			room.clock.next_tick_time -= 1.0
+			scheduler.add_room(room)
+			realigned = room.clock.next_tick_time
+			due = room.clock.due_ticks()
+			for member in (other, room):
+				scheduler.remove_room(member)
+			scheduler._task.cancel()
+			return scheduler, aligned, realigned, due
+
+		scheduler, aligned, realigned, due = async_to_sync(scenario)()
+
+		self.assertEqual(realigned, aligned)
+		self.assertEqual(due, 0)
+		self.assertEqual(scheduler.stats()["phases"], [0, 0])
+
+
+@skipUnless(np is not None, "NumPy non installato")
+class BatchPhysicsParityTestCase(SimpleTestCase):
+	"""Il motore vettoriale deve dare gli stessi risultati della fisica scalare."""
+
+	def make_rooms(self, seed, count=200):
+		rng = random.Random(seed)
+		rooms = []
+		for _ in range(count):
+			room = Game()
+			room.state.ball_x, room.state.ball_y = rng.uniform(0.0, 1.0), rng.uniform(0.0, 1.0)
+			room.state.ball_vx, room.state.ball_vy = rng.choice([-1, 1]) * rng.uniform(0.003, 0.0095), rng.uniform(-0.0095, 0.0095)
+			room.state.paddle_left, room.state.paddle_right = rng.uniform(0.0, 0.8), rng.uniform(0.0, 0.8)
+			room.current_multiplier = rng.uniform(0.005, 0.0095)
+			# Stanze a 120, 60 e 30 Hz nello stesso batch
+			room.step_scale = rng.choice([1.0, 2.0, 4.0])
+			rooms.append(room)
+		return rooms
+
+	def serve(self, room):
+		room.state.ball_x, room.state.ball_y = 0.5, 0.5
+		room.state.ball_vx, room.state.ball_vy = 0.005, -0.005
+		room.current_multiplier = room.base_ball_speed
+
+	def test_parity_over_many_ticks(self):
+		scalar_rooms = self.make_rooms(42)
+		batch_rooms = self.make_rooms(42)
+		engine = BatchPhysicsEngine()
+		moves = random.Random(7)
+
+		for tick in range(600):
+			for a, b in zip(scalar_rooms, batch_rooms):
+				a.paddle_movements = b.paddle_movements = {
+					"left": moves.choice([-1, 0, 1]), "right": moves.choice([-1, 0, 1])
+				}
+			scalar_goals = []
+			for room in scalar_rooms:
+				room.update_paddles()
+				scalar_goals.append(room.update_ball())
+			batch_goals = engine.step(batch_rooms)
+
+			self.assertEqual(scalar_goals, batch_goals, f"tick {tick}")
+			for a, b, goal in zip(scalar_rooms, batch_rooms, scalar_goals):
+				if goal != NO_GOAL:
+					self.serve(a)
+					self.serve(b)
+					continue
+				self.assertEqual((a.state.ball_x, a.state.ball_y), (b.state.ball_x, b.state.ball_y))
+				self.assertEqual((a.state.ball_vx, a.state.ball_vy), (b.state.ball_vx, b.state.ball_vy))
+				self.assertEqual((a.state.paddle_left, a.state.paddle_right), (b.state.paddle_left, b.state.paddle_right))
+				self.assertEqual(a.current_multiplier, b.current_multiplier)
+
+	def started_rooms(self, seed):
+		rooms = self.make_rooms(seed, count=20)
+		for room in rooms:
+			room.game_started = True
+			room.clock.due_ticks = lambda: 1
+		return rooms
+
+	def test_failed_vector_step_falls_back_to_scalar_physics(self):
+		scalar_rooms = self.started_rooms(3)
+		batch_rooms = self.started_rooms(3)
+		engine = BatchPhysicsEngine()
+		engine.step = mock.Mock(side_effect=ValueError("broken"))
+
+		async def scenario():
+			for _ in range(5):
+				for room in scalar_rooms:
+					await room.step()
+				await engine.run_rooms(batch_rooms)
+
+		async_to_sync(scenario)()
+
+		for a, b in zip(scalar_rooms, batch_rooms):
+			self.assertEqual(b.tick, 5)
+			self.assertEqual(b.error_count, 0)
+			self.assertTrue(b.game_started)
+			self.assertEqual((a.state.ball_x, a.state.ball_y), (b.state.ball_x, b.state.ball_y))
+			self.assertEqual((a.state.score_left, a.state.score_right), (b.state.score_left, b.state.score_right))
+
+	def test_clean_tick_resets_the_error_count(self):
+		rooms = self.started_rooms(5)
+		rooms[0].error_count = 4
+		async_to_sync(BatchPhysicsEngine().run_rooms)(rooms)
+		self.assertEqual(rooms[0].error_count, 0)
+
+	def test_room_is_advanced_only_under_its_lock(self):
+		rooms = self.started_rooms(9)
+
+		async def scenario():
+			async with rooms[0].lock:
+				task = asyncio.ensure_future(BatchPhysicsEngine().run_rooms(rooms))
+				await asyncio.sleep(0)
+				ticks_while_locked = [room.tick for room in rooms]
+			await task
+			return ticks_while_locked
+
+		ticks_while_locked = async_to_sync(scenario)()
+		self.assertEqual(ticks_while_locked, [0] * len(rooms))
+		self.assertEqual([room.tick for room in rooms], [1] * len(rooms))
+
+
+class SweptCollisionTestCase(SimpleTestCase):
+	"""A tick rate bassi la palla veloce non deve attraversare i paddle."""
+
+	def test_fast_ball_does_not_tunnel_through_paddle(self):
+		# A 15 Hz la palla percorre 0.076 per passo, più dello spessore di collisione (0.04)
+		x, y, vx, vy, mult, goal = step_ball(0.09, 0.5, -0.0095, 0.0, 0.0095, 0.4, 0.4, 0.02, 0.98, scale=8.0)
+		self.assertEqual(goal, NO_GOAL)
+		self.assertGreater(vx, 0)
+		self.assertGreater(x, 0.02 + BALL_RADIUS)
+
+		x, y, vx, vy, mult, goal = step_ball(0.91, 0.5, 0.0095, 0.0, 0.0095, 0.4, 0.4, 0.02, 0.98, scale=8.0)
+		self.assertEqual(goal, NO_GOAL)
+		self.assertLess(vx, 0)
+
+	def test_ball_past_paddle_scores(self):
+		_, _, _, _, _, goal = step_ball(0.02, 0.5, -0.0095, 0.0, 0.0095, 0.0, 0.0, 0.02, 0.98, scale=8.0)
+		self.assertEqual(goal, GOAL_RIGHT)
+		_, _, _, _, _, goal = step_ball(0.98, 0.9, 0.0095, 0.0, 0.0095, 0.0, 0.0, 0.02, 0.98, scale=8.0)
+		self.assertEqual(goal, GOAL_LEFT)
+
+	def test_wall_bounce_keeps_remaining_motion(self):
+		x, y, vx, vy, _, goal = step_ball(0.5, 0.03, 0.0, -0.01, 0.005, 0.0, 0.0, 0.02, 0.98, scale=2.0)
+		self.assertEqual(goal, NO_GOAL)
+		self.assertGreater(vy, 0)
+		# 0.01 fino al bordo, poi 0.01 di risalita
+		self.assertAlmostEqual(y, BALL_RADIUS + 0.01)
+
+	def test_same_trajectory_at_lower_tick_rate(self):
+		state_120 = state_30 = (0.5, 0.5, 0.004, 0.003, 0.005)
+		for _ in range(40):
+			state_120 = step_ball(*state_120, 0.45, 0.45, 0.02, 0.98)[:5]
+		for _ in range(10):
+			state_30 = step_ball(*state_30, 0.45, 0.45, 0.02, 0.98, scale=4.0)[:5]
+		for a, b in zip(state_120, state_30):
+			self.assertAlmostEqual(a, b)
+
+
+class ServePhaseTestCase(SimpleTestCase):
+	"""Dopo un gol la palla resta ferma per serve_delay_ticks tick, i paddle no."""
+
+	def test_ball_waits_a_fixed_number_of_ticks(self):
+		room = Game(tick_rate=60)
+		room.reset_match(11)
+		room.score_goal(GOAL_LEFT)
+		self.assertEqual(room.serve_ticks, room.serve_delay_ticks)
+		self.assertEqual(room.serve_delay_ticks, 48)  # 0.8 s a 60 Hz
+
+		room.paddle_movements["left"] = 1
+		paddle = room.state.paddle_left
+		for _ in range(room.serve_delay_ticks):
+			self.assertEqual(room.simulate_tick(), NO_GOAL)
+			self.assertEqual((room.state.ball_x, room.state.ball_y), (0.5, 0.5))
+		self.assertGreater(room.state.paddle_left, paddle)
+		self.assertEqual(room.serve_ticks, 0)
+
+		room.simulate_tick()
+		self.assertNotEqual(room.state.ball_x, 0.5)
+
+	def test_snapshot_has_no_velocity_while_serving(self):
+		room = Game(tick_rate=60)
+		room.reset_match(11)
+		room.score_goal(GOAL_LEFT)
+		snapshot = room.build_snapshot()
+		# Il client non deve estrapolare la palla ferma nella direzione del servizio
+		self.assertEqual((snapshot["ballVX"], snapshot["ballVY"]), (0, 0))
+
+		for _ in range(room.serve_delay_ticks + 1):
+			room.simulate_tick()
+		snapshot = room.build_snapshot()
+		self.assertNotEqual(snapshot["ballVX"], 0)
+
+
+class SnapshotDeltaTestCase(SimpleTestCase):
+	def snapshot(self, tick, **fields):
+		snapshot = {
+			"tick": tick, "serverTime": 1000.0 + tick,
+			"ballX": 500.0, "ballY": 250.0, "ballVX": 600.0, "ballVY": 300.0,
+			"paddle1Y": 200.0, "paddle2Y": 200.0, "player1Score": 0, "player2Score": 0,
+			"player1Seq": 0, "player2Seq": 0,
+		}
+		snapshot.update(fields)
+		return snapshot
+
+	def test_delta_contains_only_changed_fields(self):
+		history = SnapshotHistory()
+		history.record(self.snapshot(4))
+		current = self.snapshot(8, ballX=520.0, player1Score=1)
+		history.record(current)
+
+		frame = history.frame(current, baseline_tick=4)
+		self.assertEqual(frame, {
+			"type": "game_update", "baseline": 4, "tick": 8, "serverTime": 1008.0,
+			"ballX": 520.0, "player1Score": 1,
+		})
+
+	def test_keyframe_without_known_baseline(self):
+		history = SnapshotHistory(size=2)
+		for tick in (4, 8, 12):
+			history.record(self.snapshot(tick))
+		frame = history.frame(history.latest(), baseline_tick=4)  # uscito dal buffer
+		self.assertTrue(frame["keyframe"])
+		self.assertEqual(frame["paddle2Y"], 200.0)
+
+
+class SnapshotRateTestCase(SimpleTestCase):
+	def test_snapshots_follow_the_broadcast_rate_and_goals(self):
+		async def scenario():
+			with override_settings(GAME_SNAPSHOT_RATE=30):
+				room = Game(tick_rate=120)
+			member = FakeMember()
+			room.add_member(member)
+			for tick in range(1, 17):
+				room.simulate_tick()
+				if tick == 10:
+					room.score_goal(GOAL_LEFT)
+				await room.maybe_notify()
+			return room, member
+
+		room, member = async_to_sync(scenario)()
+
+		self.assertEqual(room.snapshot_every, 4)
+		# Un gol forza lo snapshot nello stesso tick, poi si riparte dall'intervallo
+		self.assertEqual([snapshot["tick"] for snapshot in member.snapshots], [4, 8, 10, 14])
+		self.assertFalse(room.snapshot_pending)
+
+
+class InputSequenceTestCase(SimpleTestCase):
+	def test_snapshot_echoes_last_processed_input(self):
+		game = Game()
+		game.acknowledge_input("left", 5)
+		game.acknowledge_input("left", 3)      # fuori ordine: ignorato
+		game.acknowledge_input("right", True)  # non numerico: ignorato
+		game.acknowledge_input("right", "9")
+		snapshot = game.build_snapshot()
+		self.assertEqual((snapshot["player1Seq"], snapshot["player2Seq"]), (5, 0))
+
+
+class BinaryProtocolTestCase(SimpleTestCase):
+	def test_snapshot_round_trip(self):
+		snapshot = {
+			"tick": 1234, "serverTime": 1.0,
+			"ballX": 512.3, "ballY": -4.5, "ballVX": -1140.0, "ballVY": 570.25,
+			"paddle1Y": 0.0, "paddle2Y": 400.0, "player1Score": 3, "player2Score": 4,
+			"player1Seq": 70000, "player2Seq": 12,
+		}
+		data = encode_snapshot(snapshot)
+		self.assertEqual(len(data), SNAPSHOT_FRAME.size)
+		frame = decode_snapshot(data)
+		self.assertEqual(frame["tick"], 1234)
+		self.assertTrue(frame["keyframe"])
+		for field in ("ballX", "ballY", "ballVX", "ballVY", "paddle1Y", "paddle2Y"):
+			self.assertAlmostEqual(frame[field], snapshot[field], delta=1 / 32)
+		self.assertEqual((frame["player1Score"], frame["player2Score"]), (3, 4))
+		self.assertEqual((frame["player1Seq"], frame["player2Seq"]), (70000, 12))
+
+
+class InputMailboxTestCase(SimpleTestCase):
+	def test_inputs_coalesce_until_tick_boundary(self):
+		now = [10.0]
+		mailbox = InputMailbox(time_func=lambda: now[0])
+		mailbox.post("right", movement=1, seq=1)
+		mailbox.post("left", movement=-1, seq=4)
+		mailbox.post("right", movement=0, seq=2)  # sovrascrive il precedente
+		now[0] = 10.005
+
+		inputs = mailbox.drain()
+		self.assertEqual([side for side, _ in inputs], ["left", "right"])
+		self.assertEqual(inputs[1][1]["movement"], 0)
+		self.assertEqual(inputs[1][1]["seq"], 2)
+		self.assertEqual(mailbox.drain(), ())
+		self.assertEqual((mailbox.posted, mailbox.coalesced, mailbox.applied), (3, 1, 2))
+
+	def test_game_applies_inputs_on_next_tick(self):
+		game = Game()
+		game.inputs.post("left", movement=1, seq=3)
+		self.assertEqual(game.paddle_movements["left"], 0)
+		async_to_sync(game.step)()
+		self.assertEqual(game.paddle_movements["left"], 1)
+		self.assertEqual(game.input_seq["left"], 3)
+		self.assertGreater(game.state.paddle_left, 0.5)
+
+
+class InboundRateLimiterTestCase(SimpleTestCase):
+	def test_per_type_budget_refills_over_time(self):
+		now = [0.0]
+		limiter = InboundRateLimiter({"*": (100, 100), "paddle_move": (10, 2)}, time_func=lambda: now[0])
+		self.assertTrue(limiter.allow("paddle_move"))
+		self.assertTrue(limiter.allow("paddle_move"))
+		self.assertFalse(limiter.allow("paddle_move"))
+		self.assertAlmostEqual(limiter.retry_after("paddle_move"), 0.1)
+		self.assertTrue(limiter.allow("ping"))  # nessun budget per tipo
+
+		now[0] = 0.1
+		self.assertTrue(limiter.allow("paddle_move"))
+		self.assertFalse(limiter.allow("paddle_move"))
+
+	def test_connection_budget_and_counters(self):
+		limiter = InboundRateLimiter({"*": (1, 3)}, time_func=lambda: 0.0)
+		allowed = [limiter.allow_frame() for _ in range(5)]
+		self.assertEqual(allowed, [True, True, True, False, False])
+		limiter.count("unknown_type", "dropped")  # tipi senza budget contati sotto "*"
+		self.assertEqual(limiter.stats(), {"*": {"accepted": 0, "coalesced": 0, "dropped": 3}})
+		self.assertEqual(limiter.limited(), 3)
+
+	def test_default_budgets_come_from_settings(self):
+		with self.settings(GAME_WS_RATE_LIMITS={"*": (5, 2), "paddle_move": (1, 1)}):
+			limiter = InboundRateLimiter(time_func=lambda: 0.0)
+		self.assertEqual(limiter.connection.burst, 2)
+		self.assertEqual(list(limiter.buckets), ["paddle_move"])
+
+
+class ReplayTestCase(SimpleTestCase):
+	def play(self, room, ticks, moves):
+		for _ in range(ticks):
+			if moves.random() < 0.05:
+				room.inputs.post(moves.choice(["left", "right"]), movement=moves.choice([-1, 0, 1]))
+			goal = room.simulate_tick()
+			if goal != NO_GOAL:
+				room.score_goal(goal)
+			room.replay.maybe_keyframe(room)
+
+	def record_match(self, directory, seed=1234, ticks=3000):
+		room = Game(tick_rate=60)
+		room.reset_match(seed)
+		room.replay = ReplayRecorder.for_room(room, directory)
+		self.play(room, ticks, random.Random(3))
+		path = room.replay.path
+		room.close_replay()
+		return room, path
+
+	def test_recorded_match_replays_identically(self):
+		with tempfile.TemporaryDirectory() as directory:
+			room, path = self.record_match(directory)
+			result = ReplaySimulator(path).run()
+
+		self.assertEqual(result["mismatches"], [])
+		self.assertEqual(result["ticks"], 3000)
+		self.assertGreater(result["goals"], 0)
+		self.assertGreater(result["keyframes_checked"], 0)
+		self.assertEqual(result["scores"], [room.state.score_left, room.state.score_right])
+		self.assertEqual(result["scores"], result["recorded_scores"])
+
+	def test_divergence_is_reported(self):
+		with tempfile.TemporaryDirectory() as directory:
+			_, path = self.record_match(directory)
+			simulator = ReplaySimulator(path)
+			simulator.header["seed"] += 1  # servizi diversi da quelli registrati
+			header, _, keyframes, _ = read_replay(path)
+			result = simulator.run()
+
+		self.assertEqual(header["tick_rate"], 60)
+		self.assertEqual(keyframes[0]["tick"], 0)
+		self.assertTrue(result["mismatches"])
+
+	@mock.patch("backend.game.consumers.get_timing_wheel")
+	@mock.patch("backend.game.game_utils.save_match_history", new_callable=mock.AsyncMock)
+	def test_completed_match_replays_to_the_final_score(self, save_match_history, timing_wheel):
+		async def play_to_game_over(room):
+			moves = random.Random(5)
+			while room.game_started:
+				if moves.random() < 0.05:
+					room.inputs.post(moves.choice(["left", "right"]), movement=moves.choice([-1, 0, 1]))
+				await room.step()
+				if room.replay is not None:
+					room.replay.maybe_keyframe(room)
+
+		with tempfile.TemporaryDirectory() as directory, self.settings(GAME_REPLAY_COLUMNAR=False):
+			room = Game(tick_rate=60, channel_layer=InMemoryChannelLayer())
+			room.reset_match(99)
+			room.state.set_scores(3, 3)
+			room.game_started = True
+			recorder = room.replay = ReplayRecorder.for_room(room, directory)
+			async_to_sync(play_to_game_over)(room)
+			recorder.wait()
+			result = ReplaySimulator(recorder.path).run()
+
+		final = save_match_history.call_args.args[1:]
+		self.assertEqual(5, max(final))
+		self.assertEqual(result["recorded_scores"], list(final))
+		self.assertEqual(result["scores"], result["recorded_scores"])
+		self.assertEqual(result["mismatches"], [])
+
+	def test_resumed_match_is_recorded_as_a_continuation(self):
+		with tempfile.TemporaryDirectory() as directory, self.settings(
+			GAME_REPLAY_RECORDING=True, GAME_REPLAY_DIR=directory, GAME_REPLAY_COLUMNAR=False,
+		):
+			room = Game(tick_rate=60)
+			room.reset_match(42)
+			room.replay = ReplayRecorder.for_room(room, directory)
+			path = room.replay.path
+			self.play(room, 600, random.Random(1))
+			checkpoint = checkpoint_state(room)
+			checkpoint["game_started"] = True
+			# Tick simulati dopo l'ultimo checkpoint, persi con il crash del worker
+			self.play(room, 100, random.Random(2))
+			room.replay.flush()
+			room.replay._close_file()
+
+			resumed = Game(str(room.game_id), tick_rate=60)
+			resumed.restore_checkpoint(checkpoint)
+			resumed.inputs.clear()
+			resumed.paddle_movements = {"left": 0, "right": 0}
+			resumed.resume_replay()
+			self.play(resumed, 900, random.Random(3))
+			resumed.close_replay()
+
+			header, _, keyframes, _ = read_replay(path)
+			result = ReplaySimulator(path).run()
+
+		self.assertEqual(header["seed"], 42)
+		self.assertEqual(len([k for k in keyframes if "resume_seed" in k]), 1)
+		self.assertEqual(result["mismatches"], [])
+		self.assertEqual(result["ticks"], 1500)
+		self.assertEqual(result["scores"], [resumed.state.score_left, resumed.state.score_right])
+		self.assertEqual(result["scores"], result["recorded_scores"])
+
+	def test_replay_is_written_off_the_event_loop(self):
+		async def record(directory, released):
+			room = Game(tick_rate=60)
+			room.reset_match(7)
+			# Thread di scrittura occupato (disco lento): il tick non deve aspettarlo
+			game_replay._writer.submit(released.wait, 5)
+			recorder = room.replay = ReplayRecorder.for_room(room, directory)
+			self.play(room, 600, random.Random(4))
+			recorder.close(room)
+			return recorder, os.path.exists(recorder.path)
+
+		released = threading.Event()
+		with tempfile.TemporaryDirectory() as directory:
+			recorder, written_during_match = async_to_sync(record)(directory, released)
+			released.set()
+			recorder.wait(5)
+			header, _, keyframes, end = read_replay(recorder.path)
+
+		self.assertFalse(written_during_match)
+		self.assertEqual(header["seed"], 7)
+		self.assertEqual(end["tick"], 600)
+		self.assertEqual(keyframes[-1]["tick"], 600)
+
+	def test_new_match_rewrites_the_room_replay(self):
+		with tempfile.TemporaryDirectory() as directory:
+			room = Game(tick_rate=60)
+			for seed in (1, 2):
+				room.reset_match(seed)
+				room.replay = ReplayRecorder.for_room(room, directory)
+				self.play(room, 300, random.Random(seed))
+				path = room.replay.path
+				room.close_replay()
+			header, _, _, _ = read_replay(path)
+			result = ReplaySimulator(path).run()
+
+		self.assertEqual(header["seed"], 2)
+		self.assertEqual(result["mismatches"], [])
+
+
+class ReplayStoreTestCase(SimpleTestCase):
+	def test_columnar_store_round_trip(self):
+		with tempfile.TemporaryDirectory() as directory:
+			_, path = ReplayTestCase().record_match(directory, ticks=1000)
+			store_file = build_replay_store(path, chunk_ticks=128)
+			self.assertLess(os.path.getsize(store_file), 1000 * 12)
+
+			simulator = ReplaySimulator(path)
+			expected = []
+			simulator.run(verify=False, on_tick=lambda room: expected.append(
+				(room.tick, room.state.ball_x * 1000, room.state.paddle_right * 500, room.state.score_left)
+			))
+
+			with ReplayStore(store_file) as store:
+				self.assertEqual(store.ticks, 1000)
+				self.assertEqual(store.tick_rate, 60)
+				self.assertEqual(len(store), 8)
+				frames = [store.chunk_frames(i) for i in range(len(store))]
+
+		ticks = [f["tick"] + i for f in frames for i in range(f["ticks"])]
+		ball_x = [x for f in frames for x in f["ballX"]]
+		paddle2 = [y for f in frames for y in f["paddle2Y"]]
+		scores = [s for f in frames for s in f["player1Score"]]
+		self.assertEqual(ticks, [e[0] for e in expected])
+		for (_, x, p2, s1), bx, py, score in zip(expected, ball_x, paddle2, scores):
+			self.assertAlmostEqual(bx, x, delta=1 / 32)
+			self.assertAlmostEqual(py, p2, delta=1 / 32)
+			self.assertEqual(score, s1)
+
+	def test_stream_yields_header_and_chunks(self):
+		async def collect(path):
+			return [line async for line in stream_replay(path, speed=64)]
+
+		with tempfile.TemporaryDirectory() as directory:
+			_, path = ReplayTestCase().record_match(directory, ticks=300)
+			store_file = build_replay_store(path, chunk_ticks=100)
+			lines = async_to_sync(collect)(store_file)
+
+		self.assertEqual(len(lines), 4)
+		self.assertEqual(json.loads(lines[0])["type"], "replay_header")
+		self.assertEqual(json.loads(lines[1])["ticks"], 100)
+
+
+class ReplayAccessTestCase(TestCase):
+	def setUp(self):
+		self.player = User.objects.create_user(username='player', password='password')
+		self.opponent = User.objects.create_user(username='opponent', password='password')
+		self.outsider = User.objects.create_user(username='outsider', password='password')
+		self.game_id = uuid.uuid4()
+		MatchHistory.objects.create(user=self.player, opponent=self.opponent, score="5-3", game_id=self.game_id)
+
+	def stream(self, user, directory):
+		request = APIRequestFactory().get(f"/api/games/replays/{self.game_id}/stream/")
+		force_authenticate(request, user=user)
+		with override_settings(GAME_REPLAY_DIR=directory):
+			return ReplayStreamAPIView.as_view()(request, game_id=self.game_id)
+
+	def test_only_players_can_stream_the_replay(self):
+		with tempfile.TemporaryDirectory() as directory:
+			open(store_path(directory, self.game_id), "wb").close()
+			self.assertEqual(self.stream(self.player, directory).status_code, 200)
+			self.assertEqual(self.stream(self.outsider, directory).status_code, 404)
+
+
+class FakeSpectator:
+	def __init__(self, binary_frames=False):
+		self.binary_frames = binary_frames
+		self.sent = []
+
+	async def send(self, text_data=None, bytes_data=None):
+		self.sent.append(text_data if text_data is not None else bytes_data)
+
+	async def close(self, code=None):
+		self.close_code = code
+
+
+class SpectatorBroadcastTestCase(SimpleTestCase):
+	def test_spectators_are_closed_when_the_room_ends(self):
+		async def scenario():
+			room = Game()
+			GameConsumer.game_rooms[f"game_{room.game_id}"] = room
+			spectators = [FakeSpectator() for _ in range(2)]
+			for member in spectators:
+				room.spectators.add(member)
+			task = room.spectators._task
+			await room.end_room()
+			await asyncio.sleep(0)
+			return room, spectators, task
+
+		room, spectators, task = async_to_sync(scenario)()
+
+		for member in spectators:
+			self.assertEqual(member.close_code, ROOM_EXPIRED_CLOSE_CODE)
+		self.assertEqual(room.spectators.members, [])
+		self.assertTrue(task.cancelled())
+		self.assertNotIn(f"game_{room.game_id}", GameConsumer.game_rooms)
+
+	def test_one_encoded_frame_shared_by_all_spectators(self):
+		async def scenario():
+			room = Game()
+			early = [FakeSpectator() for _ in range(3)]
+			binary = FakeSpectator(binary_frames=True)
+			for member in early + [binary]:
+				room.spectators.add(member)
+
+			room.snapshots.record(room.build_snapshot())
+			await room.spectators.broadcast()
+			await room.spectators.broadcast()  # nessuno snapshot nuovo: niente invii
+
+			late = FakeSpectator()
+			room.spectators.add(late)
+			room.tick += 4
+			room.state.ball_x = 0.6
+			room.snapshots.record(room.build_snapshot())
+			await room.spectators.broadcast()
+
+			for member in early + [binary, late]:
+				room.spectators.remove(member)
+			return room, early, binary, late
+
+		room, early, binary, late = async_to_sync(scenario)()
+
+		self.assertEqual(room.spectators.broadcasts, 2)
+		for member in early:
+			self.assertEqual(len(member.sent), 2)
+			self.assertTrue(json.loads(member.sent[0])["keyframe"])
+			self.assertEqual(json.loads(member.sent[1])["baseline"], 0)
+			# Lo stesso oggetto frame per tutti: codificato una volta sola
+			self.assertIs(member.sent[1], early[0].sent[1])
+		self.assertIsInstance(binary.sent[0], bytes)
+		self.assertEqual(len(late.sent), 1)
+		self.assertTrue(json.loads(late.sent[0])["keyframe"])
+
+
+class RoomRegistryTestCase(SimpleTestCase):
+	def setUp(self):
+		self.now = 0.0
+		self.registry = LocalRoomRegistry(lease_seconds=10, time_func=lambda: self.now)
+
+	def test_room_has_a_single_owner_until_the_lease_expires(self):
+		claim = async_to_sync(self.registry.claim)
+		self.assertEqual(claim("room", "a"), "a")
+		self.assertEqual(claim("room", "b"), "a")
+		self.now = 8.0
+		self.assertTrue(async_to_sync(self.registry.renew)("room", "a"))
+		self.now = 17.0
+		self.assertEqual(claim("room", "b"), "a")
+		self.now = 18.5
+		self.assertEqual(claim("room", "b"), "b")
+		self.assertFalse(async_to_sync(self.registry.renew)("room", "a"))
+
+	def test_only_the_owner_releases(self):
+		async_to_sync(self.registry.claim)("room", "a")
+		self.assertFalse(async_to_sync(self.registry.release)("room", "b"))
+		self.assertTrue(async_to_sync(self.registry.release)("room", "a"))
+		self.assertIsNone(async_to_sync(self.registry.owner)("room"))
+
+	def test_forwarded_connection_runs_on_the_owner(self):
+		async def anonymous(user_id):
+			return AnonymousUser()
+
+		async def receive_until(layer, channel, text):
+			messages = []
+			while True:
+				event = await asyncio.wait_for(layer.receive(channel), 2)
+				messages.append(event)
+				if text in event["message"].get("text", ""):
+					return messages
+
+		async def scenario():
+			layer = InMemoryChannelLayer()
+			registry = LocalRoomRegistry()
+			host = RoomHost(layer, registry, "worker-a", user_loader=anonymous)
+			game_registry._room_host = host
+			game_id = str(uuid.uuid4())
+			try:
+				await host.start()
+				self.assertEqual(await host.claim(game_id), "worker-a")
+				self.assertEqual(await registry.claim(game_id, "worker-b"), "worker-a")
+
+				# Il worker del client inoltra la connessione al canale del proprietario
+				reply = await layer.new_channel()
+				await layer.send(await registry.worker_channel("worker-a"), {
+					"type": "room.join",
+					"reply_channel": reply,
+					"game_id": game_id,
+					"client": ["127.0.0.1", 5000],
+				})
+				joined = await receive_until(layer, reply, "waiting_for_opponent")
+				self.assertEqual(joined[0]["message"]["type"], "websocket.accept")
+				room = GameConsumer.game_rooms[f"game_{game_id}"]
+				self.assertEqual(room.player1.channel_name, joined[0]["proxy"])
+
+				# I frame del client arrivano al proxy, le risposte tornano al client
+				await layer.send(joined[0]["proxy"], {"type": "websocket.receive", "text": json.dumps({"type": "ping"})})
+				await receive_until(layer, reply, "pong")
+
+				await layer.send(host.channel_name, {"type": "room.leave", "reply_channel": reply, "code": 1000})
+				for _ in range(100):
+					if not host.proxies:
+						break
+					await asyncio.sleep(0.01)
+				return host.proxies, f"game_{game_id}" in GameConsumer.game_rooms
+			finally:
+				await host.stop()
+				game_registry._room_host = None
+				GameConsumer.game_rooms.pop(f"game_{game_id}", None)
+
+		proxies, room_alive = async_to_sync(scenario)()
+		self.assertEqual(proxies, {})
+		self.assertFalse(room_alive)
+
+
+class FakeMember:
+	"""Consumer locale della stanza: registra gli snapshot consegnati direttamente."""
+
+	def __init__(self):
+		self.snapshots = []
+
+	async def send_snapshot(self, game, snapshot):
+		self.snapshots.append(snapshot)
+
+
+class SnapshotDeliveryTestCase(SimpleTestCase):
+	def deliver(self, shared_group):
+		async def scenario():
+			layer = InMemoryChannelLayer()
+			room = Game(channel_layer=layer)
+			room.shared_group = shared_group
+			local = FakeMember()
+			room.add_member(local)
+			local_channel = await layer.new_channel()
+			remote_channel = await layer.new_channel()  # membro su un altro worker
+			for channel in (local_channel, remote_channel):
+				await layer.group_add(f"game_{room.game_id}", channel)
+
+			await room.notify_players()
+			received = []
+			for channel in (local_channel, remote_channel):
+				try:
+					received.append(await asyncio.wait_for(layer.receive(channel), 0.05))
+				except asyncio.TimeoutError:
+					received.append(None)
+			return room, local, received
+
+		return async_to_sync(scenario)()
+
+	def test_exclusive_room_delivers_directly(self):
+		room, local, received = self.deliver(shared_group=False)
+		self.assertEqual(local.snapshots, [room.snapshots.latest()])
+		self.assertEqual(received, [None, None])
+
+	def test_shared_room_reaches_members_on_other_workers(self):
+		room, local, received = self.deliver(shared_group=True)
+		self.assertEqual(local.snapshots, [])
+		for event in received:
+			self.assertEqual(event["type"], "game_state_update")
+			self.assertEqual(event["room"], room.instance_id)
+			self.assertEqual(event["snapshot"]["tick"], room.tick)
+
+	def test_group_snapshot_uses_the_room_copy_only_for_the_same_room(self):
+		room = Game()
+		room.snapshots.record(room.build_snapshot())
+		consumer = GameConsumer()
+		consumer.room_group_name = f"game_{room.game_id}"
+		consumer.send_snapshot = mock.AsyncMock()
+		GameConsumer.game_rooms[consumer.room_group_name] = room
+		try:
+			snapshot = dict(room.snapshots.latest())
+			async_to_sync(consumer.game_state_update)({"snapshot": snapshot, "room": room.instance_id})
+			async_to_sync(consumer.game_state_update)({"snapshot": snapshot, "room": "altro-worker"})
+		finally:
+			GameConsumer.game_rooms.pop(consumer.room_group_name)
+
+		(same_game, same_snapshot), _ = consumer.send_snapshot.call_args_list[0]
+		(other_game, other_snapshot), _ = consumer.send_snapshot.call_args_list[1]
+		self.assertIs(same_game, room)
+		self.assertIs(same_snapshot, room.snapshots.latest())
+		self.assertIsNone(other_game)
+		self.assertIs(other_snapshot, snapshot)
+
+
+def fake_player(user_id):
+	return SimpleNamespace(scope={"user": SimpleNamespace(pk=user_id, is_authenticated=True)})
+
+
+class SharedFrameTestCase(SimpleTestCase):
+	def member(self, room, acked_tick=None, binary_frames=False):
+		consumer = GameConsumer()
+		consumer.acked_tick = acked_tick
+		consumer.binary_frames = binary_frames
+		consumer.send = mock.AsyncMock()
+		room.add_member(consumer)
+		return consumer
+
+	def sent(self, consumer):
+		(_, kwargs), = consumer.send.call_args_list
+		return kwargs.get("text_data", kwargs.get("bytes_data"))
+
+	def test_frame_is_encoded_once_per_baseline_for_all_members(self):
+		room = Game()
+		async_to_sync(room.notify_players)()  # baseline al tick 0, nessun membro
+		fresh = [self.member(room) for _ in range(3)]
+		acked = [self.member(room, acked_tick=0) for _ in range(2)]
+		binary = [self.member(room, binary_frames=True) for _ in range(2)]
+		room.tick = 4
+		room.state.ball_x = 0.6
+
+		with mock.patch("backend.game.consumers.dumps", wraps=json.dumps) as dumps, \
+				mock.patch("backend.game.consumers.encode_snapshot", wraps=encode_snapshot) as encode:
+			async_to_sync(room.notify_players)()
+
+		# Un keyframe, un delta sul tick 0 e un frame binario per tutta la stanza
+		self.assertEqual(dumps.call_count, 2)
+		self.assertEqual(encode.call_count, 1)
+		for group in (fresh, acked, binary):
+			for consumer in group[1:]:
+				self.assertIs(self.sent(consumer), self.sent(group[0]))
+		self.assertTrue(json.loads(self.sent(fresh[0]))["keyframe"])
+		self.assertEqual(json.loads(self.sent(acked[0]))["baseline"], 0)
+		self.assertIsInstance(self.sent(binary[0]), bytes)
+
+
+class CheckpointTestCase(SimpleTestCase):
+	def play(self, room, ticks):
+		for _ in range(ticks):
+			goal = room.simulate_tick()
+			if goal != NO_GOAL:
+				room.score_goal(goal)
+
+	def test_room_resumes_from_its_last_checkpoint(self):
+		room = Game(tick_rate=60)
+		room.reset_match(99)
+		room.game_started = True
+		room.player1, room.player2 = fake_player(7), fake_player(8)
+		self.play(room, 900)
+
+		async def save_and_load(directory):
+			store = DiskCheckpointStore(directory)
+			writer = CheckpointWriter(store, room.game_id)
+			writer.submit(checkpoint_state(room))
+			writer.submit(checkpoint_state(room))  # accorpato con il precedente
+			await writer.flush()
+			return writer.saved, await store.load(room.game_id)
+
+		with tempfile.TemporaryDirectory() as directory:
+			saved, checkpoint = async_to_sync(save_and_load)(directory)
+
+		resumed = Game(room.game_id, tick_rate=60)
+		resumed.restore_checkpoint(checkpoint)
+
+		self.assertLessEqual(saved, 2)
+		self.assertEqual(capture_state(resumed), capture_state(room))
+		self.assertTrue(resumed.resume_pending)
+		# I posti restano a chi li occupava prima del crash
+		self.assertFalse(resumed.can_take_seat(fake_player(8), "left"))
+		self.assertTrue(resumed.can_take_seat(fake_player(8), "right"))
+
+	def test_discarded_checkpoint_is_not_resumed(self):
+		room = Game(tick_rate=60)
+		room.reset_match(5)
+		room.game_started = True
+
+		async def save_and_discard(directory):
+			store = DiskCheckpointStore(directory)
+			writer = CheckpointWriter(store, room.game_id)
+			writer.submit(checkpoint_state(room))
+			await writer.discard()
+			return await store.load(room.game_id)
+
+		with tempfile.TemporaryDirectory() as directory:
+			self.assertIsNone(async_to_sync(save_and_discard)(directory))
+
+
+class MigratingPlayer:
+	def __init__(self, user_id):
+		self.scope = {"user": SimpleNamespace(pk=user_id, is_authenticated=True)}
+		self.migrated_to = None
+
+	async def migrate(self, worker):
+		self.migrated_to = worker
+
+
+class WorkerDrainTestCase(SimpleTestCase):
+	def test_running_room_is_handed_off_to_a_peer(self):
+		async def scenario(store):
+			registry = LocalRoomRegistry()
+			host = RoomHost(InMemoryChannelLayer(), registry, "worker-a")
+			await registry.register_worker("worker-a", "a-channel")
+			await registry.register_worker("worker-b", "b-channel", rooms=3)
+
+			room = Game(tick_rate=60)
+			room.reset_match(11)
+			room.player1, room.player2 = MigratingPlayer(7), MigratingPlayer(8)
+			room.game_started = True
+			room.start_checkpoints()
+			for _ in range(200):
+				room.simulate_tick()
+			GameConsumer.game_rooms[f"game_{room.game_id}"] = room
+			await host.claim(room.game_id)
+
+			host.accepting = False
+			peer = await host.pick_peer()
+			self.assertTrue(await hand_off_room(host, room, peer))
+			# Durante il drain le nuove stanze vanno agli altri worker
+			new_owner = await host.claim(uuid.uuid4())
+			checkpoint = await store.load(room.game_id)
+			return room, peer, new_owner, await registry.owner(room.game_id), checkpoint
+
+		with tempfile.TemporaryDirectory() as directory:
+			store = DiskCheckpointStore(directory)
+			with mock.patch("backend.game.game_checkpoint._checkpoint_store", store):
+				room, peer, new_owner, owner, checkpoint = async_to_sync(scenario)(store)
+
+		self.assertEqual(peer, "worker-b")
+		self.assertEqual(owner, "worker-b")
+		self.assertEqual(new_owner, "worker-b")
+		self.assertNotIn(f"game_{room.game_id}", GameConsumer.game_rooms)
+		self.assertEqual(room.player1.migrated_to, "worker-b")
+		self.assertEqual(room.player2.migrated_to, "worker-b")
+		# Il nuovo worker riprende dallo stesso tick, con i posti riservati
+		self.assertTrue(checkpoint["game_started"])
+		self.assertEqual(checkpoint["tick"], 200)
+		self.assertEqual(checkpoint["players"], [7, 8])
+		self.assertFalse(room.game_started)
+
+
+class DrainSignalTestCase(SimpleTestCase):
+	def test_drain_exits_by_default(self):
+		from django.conf import settings
+		with self.settings():
+			del settings.GAME_DRAIN_EXIT
+			self.assertTrue(drain_settings()[2])
+
+	def test_signal_drains_a_worker_without_game_connections(self):
+		host = mock.Mock()
+
+		async def scenario():
+			with mock.patch("backend.game.game_registry.get_room_host", mock.AsyncMock(return_value=host)):
+				game_drain._on_drain_signal(signal.SIGUSR1, None)
+				for _ in range(3):
+					await asyncio.sleep(0)
+
+		async_to_sync(scenario)()
+		host.request_drain.assert_called_once_with()
+
+	def test_signal_before_the_server_starts_exits(self):
+		with self.settings(GAME_DRAIN_EXIT=True), self.assertRaises(SystemExit):
+			game_drain._on_drain_signal(signal.SIGUSR1, None)
+
+
+class LostLeaseTestCase(SimpleTestCase):
+	def setUp(self):
+		self.now = 0.0
+		self.registry = LocalRoomRegistry(lease_seconds=10, time_func=lambda: self.now)
+		self.host = RoomHost(InMemoryChannelLayer(), self.registry, "worker-a")
+		self.room = Game(tick_rate=60)
+		self.room.reset_match(11)
+		self.room.player1, self.room.player2 = MigratingPlayer(7), MigratingPlayer(8)
+		self.room.game_started = True
+		self.key = f"game_{self.room.game_id}"
+		GameConsumer.game_rooms[self.key] = self.room
+		async_to_sync(self.host.claim)(self.room.game_id)
+
+	def tearDown(self):
+		GameConsumer.game_rooms.pop(self.key, None)
+
+	def test_room_claimed_by_another_worker_is_closed_here(self):
+		game_id = str(self.room.game_id)
+
+		async def scenario(store):
+			self.room.start_checkpoints()
+			for _ in range(50):
+				self.room.simulate_tick()
+			# Il worker non rinnova in tempo e un altro prende la stanza
+			self.now = 11.0
+			self.assertEqual(await self.registry.claim(game_id, "worker-b"), "worker-b")
+			await self.host.check_leases()
+			return await store.load(game_id)
+
+		with tempfile.TemporaryDirectory() as directory:
+			store = DiskCheckpointStore(directory)
+			with mock.patch("backend.game.game_checkpoint._checkpoint_store", store):
+				checkpoint = async_to_sync(scenario)(store)
+
+		self.assertEqual(self.host.lost_leases, 1)
+		self.assertNotIn(game_id, self.host.owned)
+		self.assertNotIn(self.key, GameConsumer.game_rooms)
+		self.assertFalse(self.room.game_started)
+		self.assertEqual(self.room.player1.migrated_to, "worker-b")
+		self.assertEqual(self.room.player2.migrated_to, "worker-b")
+		self.assertEqual(checkpoint["tick"], 50)
+
+	def test_expired_lease_nobody_claimed_is_taken_back(self):
+		self.now = 11.0
+		async_to_sync(self.host.check_leases)()
+
+		self.assertEqual(self.host.lost_leases, 1)
+		self.assertIn(str(self.room.game_id), self.host.owned)
+		self.assertIs(GameConsumer.game_rooms[self.key], self.room)
+		self.assertTrue(self.room.game_started)
+		self.assertIsNone(self.room.player1.migrated_to)
+		self.assertEqual(async_to_sync(self.registry.owner)(self.room.game_id), "worker-a")
+
+
+class FakeTime:
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self):
+		return self.now
+
+
+class TimingWheelTestCase(SimpleTestCase):
+	def test_timers_fire_once_at_their_deadline(self):
+		clock = FakeTime()
+		wheel = TimingWheel(tick_seconds=0.25, slots=8, time_func=clock)
+		fired = []
+		wheel.schedule(1.0, fired.append, "short", kind="ready")
+		# Più di un giro della ruota: resta nella casella finché non scade
+		wheel.schedule(10.0, fired.append, "long", kind="waiting")
+		cancelled = wheel.schedule(0.5, fired.append, "cancelled", kind="ready")
+		cancelled.cancel()
+
+		clock.now = 0.75
+		wheel.advance()
+		self.assertEqual(fired, [])
+		clock.now = 1.0
+		wheel.advance()
+		self.assertEqual(fired, ["short"])
+		clock.now = 9.9
+		wheel.advance()
+		self.assertEqual(fired, ["short"])
+		clock.now = 10.0
+		wheel.advance()
+		self.assertEqual(fired, ["short", "long"])
+
+		stats = wheel.stats()
+		self.assertEqual(stats["pending"], {})
+		self.assertEqual(stats["expired"], {"ready": 1, "waiting": 1})
+		self.assertEqual(stats["cancelled"], {"ready": 1})
+
+	def test_lobby_timers_follow_the_room_state(self):
+		wheel = TimingWheel(time_func=FakeTime())
+		with mock.patch("backend.game.consumers.get_timing_wheel", return_value=wheel):
+			room = Game(tick_rate=60)
+			room.update_lobby_timers()
+			self.assertTrue(room.has_timer("waiting"))
+			room.player1, room.player2 = fake_player(1), fake_player(2)
+			room.update_lobby_timers()
+			self.assertFalse(room.has_timer("waiting"))
+			self.assertTrue(room.has_timer("ready"))
+			room.game_started = True
+			room.update_lobby_timers()
+			self.assertEqual(wheel.stats()["pending"], {})
+
+
+class TickAllocationTestCase(SimpleTestCase):
+	def test_ticks_do_not_retain_memory(self):
+		short = measure_tick_allocations(rooms=10, ticks=300, tick_rate=60)
+		long = measure_tick_allocations(rooms=10, ticks=3000, tick_rate=60)
+		# Restano allocati solo i valori correnti (stato, contatori), qualunque sia il numero di tick
+		self.assertLess(long["retained_bytes_per_room"], 512)
+		extra_room_ticks = 10 * (3000 - 300)
+		self.assertLess((long["retained_bytes"] - short["retained_bytes"]) / extra_room_ticks, 0.25)
+		self.assertEqual(long["gc_collections"], 0)
+
+
+class MetricsTestCase(SimpleTestCase):
+	def test_histogram_exposition(self):
+		registry = MetricsRegistry()
+		latency = registry.histogram("test_latency_seconds", "Latenza", ("type",), buckets=(0.01, 0.1))
+		for value in (0.005, 0.01, 0.05, 2.0):
+			latency.labels("game_end").observe(value)
+		registry.gauge("test_rooms", "Stanze").labels().set(3)
+
+		text = registry.render()
+		self.assertIn('test_latency_seconds_bucket{type="game_end",le="0.01"} 2', text)
+		self.assertIn('test_latency_seconds_bucket{type="game_end",le="0.1"} 3', text)
+		self.assertIn('test_latency_seconds_bucket{type="game_end",le="+Inf"} 4', text)
+		self.assertIn('test_latency_seconds_count{type="game_end"} 4', text)
+		self.assertIn("# TYPE test_rooms gauge\ntest_rooms 3", text)
+
+	def test_room_tick_rate_between_reads(self):
+		clock = FakeTime()
+		tracker = RoomRateTracker(time_func=clock)
+		room = Game(tick_rate=60)
+		self.assertEqual(tracker.update([room]), {})
+		clock.now = 2.0
+		room.tick = 120
+		self.assertEqual(tracker.update([room]), {str(room.game_id): 60.0})
+
+	@override_settings(GAME_METRICS_TOKEN="segreto")
+	def test_metrics_endpoint(self):
+		room = Game(tick_rate=60)
+		room.reset_match(3)
+		count = TICK_PHASE_SECONDS.labels("paddles").count
+		# Replay e benchmark (simulate_tick) non finiscono nelle metriche dei tick dal vivo
+		room.simulate_tick()
+		self.assertEqual(TICK_PHASE_SECONDS.labels("paddles").count, count)
+		async_to_sync(room.step)()
+		self.assertEqual(TICK_PHASE_SECONDS.labels("paddles").count, count + 1)
+
+		factory = RequestFactory()
+		denied = async_to_sync(metrics_view)(factory.get("/metrics"))
+		response = async_to_sync(metrics_view)(factory.get("/metrics", HTTP_AUTHORIZATION="Bearer segreto"))
+		self.assertEqual(denied.status_code, 401)
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+		self.assertIn('pong_tick_phase_seconds_count{phase="paddles"}', response.content.decode())
+
+	def test_metrics_endpoint_without_token_is_hidden(self):
+		request = RequestFactory().get("/metrics")
+		with override_settings(GAME_METRICS_TOKEN="", GAME_METRICS_PUBLIC=False):
+			self.assertEqual(async_to_sync(metrics_view)(request).status_code, 404)
+		with override_settings(GAME_METRICS_TOKEN="", GAME_METRICS_PUBLIC=True):
+			self.assertEqual(async_to_sync(metrics_view)(request).status_code, 200)
+
+
+def blocking_handler():
+	time.sleep(0.3)  # Chiamata sincrona che blocca l'event loop
+
+
+class LoopWatchdogTestCase(SimpleTestCase):
+	def test_stall_is_captured_with_the_blocking_stack(self):
+		watchdog = LoopWatchdog(interval=0.01, threshold=0.1)
+
+		async def scenario():
+			watchdog.start()
+			await asyncio.sleep(0.05)
+			blocking_handler()
+			await asyncio.sleep(0.05)
+			watchdog.stop()
+
+		async_to_sync(scenario)()
+
+		self.assertEqual(watchdog.stall_count, 1)
+		stall = watchdog.stalls[-1]
+		self.assertIn("blocking_handler", stall["stack"])
+		self.assertIn("scenario", stall["coroutine"])
+		self.assertGreaterEqual(stall["duration"], 0.25)
+		self.assertGreaterEqual(watchdog.percentiles()[0.99], 0.25)
+
+
+class GameLogHandlerTestCase(SimpleTestCase):
+	def setUp(self):
+		self.stream = io.StringIO()
+		self.handler = GameLogHandler(
+			default_level="WARNING", categories="LOOP=INFO", sampling="LOOP=3", stream=self.stream,
+		)
+		self.handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+		self.logger = logging.getLogger("backend.game.tests.logging")
+		self.logger.propagate = False
+		self.logger.addHandler(self.handler)
+		self.logger.setLevel(self.handler.lowest_level())
+
+	def tearDown(self):
+		self.logger.removeHandler(self.handler)
+		self.handler.stop()
+
+	def output(self):
+		self.handler.stop()
+		return self.stream.getvalue()
+
+	def test_category_levels_and_sampling(self):
+		self.logger.info("[RECEIVE] scartato %s", 1)
+		for tick in range(6):
+			self.logger.info("[LOOP] tick %s", tick)
+		self.logger.warning("[RECEIVE] scritto")
+
+		lines = self.output().splitlines()
+		self.assertEqual(lines, ["INFO [LOOP] tick 0", "INFO [LOOP] tick 3", "WARNING [RECEIVE] scritto"])
+		self.assertEqual(self.handler.sampled_out, 4)
+
+	def test_room_buffer_is_dumped_before_an_error(self):
+		events = RoomEventLog("partita-1")
+		token = bind_room(events)
+		try:
+			self.logger.info("[MOVE] input %s", 7)
+			self.logger.debug("[MOVE] sotto il livello del buffer")
+			self.logger.error("[LOOP] errore")
+		finally:
+			unbind_room(token)
+
+		lines = self.output().splitlines()
+		self.assertIn("[ROOM LOG] Ultimi 1 eventi della partita partita-1", lines[0])
+		self.assertEqual(lines[1:], ["INFO [MOVE] input 7", "ERROR [LOOP] errore"])
+		self.assertEqual(len(events.records), 0)
+
+	def test_process_tasks_do_not_inherit_the_room(self):
+		events = RoomEventLog("partita-1")
+
+		async def log_move():
+			self.logger.info("[MOVE] da un task")
+
+		async def scenario():
+			token = bind_room(events)
+			try:
+				await asyncio.create_task(log_move())  # lavoro della stanza: eredita il buffer
+				await process_task(log_move())  # task di processo (scheduler, timing wheel)
+			finally:
+				unbind_room(token)
+
+		async_to_sync(scenario)()
+		self.assertEqual(len(events.records), 1)
+
+
+class RoomCapacityBenchTestCase(SimpleTestCase):
+	def test_rooms_are_driven_through_the_consumers(self):
+		result = async_to_sync(measure_room_capacity)(rooms=3, ticks=120, warmup_ticks=30)
+
+		self.assertEqual(result["tick_budget_ms"], 8.333)
+		self.assertGreater(result["room_ticks_per_second"], 0)
+		self.assertLessEqual(result["tick_p50_ms"], result["tick_p99_ms"])
+		self.assertGreater(result["memory_per_room_bytes"], 0)
+		# Snapshot consegnati ai client dal percorso reale di notify_players
+		self.assertGreater(result["messages_per_second"], 0)
+		# Le stanze del benchmark vengono chiuse con le disconnessioni
+		self.assertEqual(GameConsumer.game_rooms, {})
+
+	def test_regressions_against_baseline(self):
+		baseline = {"room_ticks_per_second": 1000, "tick_p99_ms": 2.0, "memory_per_room_bytes": 50000}
+		current = {"room_ticks_per_second": 850, "tick_p99_ms": 2.1, "memory_per_room_bytes": 40000}
+		regressions = check_regressions(current, baseline, tolerance=0.1)
+		self.assertEqual(len(regressions), 1)
+		self.assertTrue(regressions[0].startswith("room_ticks_per_second: 850"))
@@ -27,7 +27,8 @@ from .social_views import (
 )
 
 from .game_views import (
-	FindOrCreateGameSession, JoinGameSession, GetGameSession, CleanupGameSession
+	FindOrCreateGameSession, JoinGameSession, GetGameSession, CleanupGameSession,
+	ReplayStreamAPIView, metrics_view
 )
 urlpatterns = [
 	path('api/auth/register/', UserRegistrationAPIView.as_view(), name='api_register'),
@@ -61,9 +62,11 @@ urlpatterns = [
 	path('api/games/sessions/<uuid:game_id>/join/', JoinGameSession.as_view(), name='api_join_game'),
 	path('api/games/sessions/<uuid:game_id>/', GetGameSession.as_view(), name='api_get_game'),
 	path('api/games/sessions/<uuid:game_id>/cleanup/', CleanupGameSession.as_view(), name='cleanup_game_session'),
+	path('api/games/replays/<uuid:game_id>/stream/', ReplayStreamAPIView.as_view(), name='api_replay_stream'),
 	path('api/account/upload-image/', ProfileImageUploadAPIView.as_view(), name='api_upload_profile_image'),
 	path('api/users/me/', UsernameAPIView.as_view(), name='api_get_username'),
 	path('api/matches/recent/', RecentMatchesAPIView.as_view(), name='api_recent_matches'),
+	path('metrics', metrics_view, name='metrics'),
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
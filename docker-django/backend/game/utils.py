@@ -34,7 +34,7 @@ def log_execution_time(view_func):
 		result = view_func(request, *args, **kwargs)
 		execution_time = time.time() - start_time
 		logger.debug(
-			f"Execution time for {view_func.__name__}: {execution_time:.4f} seconds"
+			"Execution time for %s: %.4f seconds", view_func.__name__, execution_time
 		)
 		return result
 	return _wrapped_view
@@ -60,7 +60,7 @@ def find_available_game_session():
 		session = GameSession.objects.filter(status="waiting", player2__isnull=True).first()
 		return session
 	except Exception as e:
-		logger.error(f"Errore nella ricerca di una sessione disponibile: {e}")
+		logger.error("Errore nella ricerca di una sessione disponibile: %s", e)
 		return None
 
 def create_new_game_session(player1_user):
@@ -75,14 +75,14 @@ def create_new_game_session(player1_user):
 	"""
 	from .models import GameSession  # Import protetto dentro funzione
 
-	logger.info(f"Creazione di una nuova sessione di gioco per l'utente: {player1_user.username}")
+	logger.info("Creazione di una nuova sessione di gioco per l'utente: %s", player1_user.username)
 
 	try:
 		new_game = GameSession.objects.create(player1=player1_user, id=uuid.uuid4())
-		logger.info(f"Nuova sessione di gioco creata con ID: {new_game.id}")
+		logger.info("Nuova sessione di gioco creata con ID: %s", new_game.id)
 		return new_game
 	except Exception as e:
-		logger.error(f"Errore durante la creazione della sessione di gioco: {e}")
+		logger.error("Errore durante la creazione della sessione di gioco: %s", e)
 		return None
 
 @sync_to_async
@@ -92,7 +92,7 @@ def save_match_history(game_id, left_score, right_score):
 	try:
 		session = GameSession.objects.filter(game_id=game_id).first()
 		if not session:
-			logger.warning(f"Sessione di gioco con ID {game_id} non trovata.")
+			logger.warning("Sessione di gioco con ID %s non trovata.", game_id)
 			return
 
 		player1 = session.player1
@@ -126,7 +126,7 @@ def save_match_history(game_id, left_score, right_score):
 			loser.game_userprofile.losses += 1
 			loser.game_userprofile.save()
 
-		logger.info(f"Match salvato correttamente per il game_id {game_id}.")
+		logger.info("Match salvato correttamente per il game_id %s.", game_id)
 
 	except Exception as e:
-		logger.error(f"[DB ERROR] Impossibile salvare il match per il game_id {game_id}: {e}") 
\ No newline at end of file
+		logger.error("[DB ERROR] Impossibile salvare il match per il game_id %s: %s", game_id, e) 
\ No newline at end of file
@@ -277,6 +277,16 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        # Motore di gioco: coda fuori dall'event loop, livelli per categoria ([TAG] del
+        # messaggio), campionamento e buffer per stanza (vedi backend/game/game_logging.py)
+        'game': {
+            'class': 'backend.game.game_logging.GameLogHandler',
+            'formatter': 'verbose',
+            'default_level': os.environ.get('GAME_LOG_LEVEL', 'WARNING'),
+            'categories': os.environ.get('GAME_LOG_CATEGORIES', ''),
+            'sampling': os.environ.get('GAME_LOG_SAMPLING', 'RECEIVE=100,MOVE=100,POSITION=100,PING=100'),
+            'buffer_level': os.environ.get('GAME_LOG_BUFFER_LEVEL', 'INFO'),
+        },
     },
     'loggers': {
         'django': {
@@ -289,6 +299,12 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': False,
         },
+        # Livello allineato al minimo richiesto dall'handler in PongConfig.ready()
+        'backend.game': {
+            'handlers': ['game'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
     'root': {
         'handlers': ['console'],
@@ -296,3 +312,64 @@ LOGGING = {
     },
 }
 
+
+# Motore di gioco remoto
+# Fisica vettoriale (NumPy) per tutte le stanze del processo
+GAME_BATCH_PHYSICS = os.environ.get('GAME_BATCH_PHYSICS', 'False') == 'True'
+# Snapshot di stato inviati ai client al secondo (indipendente da GAME_TICK_RATE)
+GAME_SNAPSHOT_RATE = int(os.environ.get('GAME_SNAPSHOT_RATE', 30))
+# Frequenza di simulazione delle partite (Hz): 120, 60 o 30 con lo stesso gameplay
+GAME_TICK_RATE = int(os.environ.get('GAME_TICK_RATE', 120))
+# Budget dei messaggi in ingresso per connessione su ws/game: tipo -> (messaggi/s, burst).
+# "*" vale per tutti i frame della connessione; gli input paddle in eccesso vengono accorpati
+GAME_WS_RATE_LIMITS = {
+    '*': (60, 60),
+    'paddle_move': (30, 10),
+    'paddle_position': (30, 10),
+    'snapshot_ack': (20, 5),
+    'resync_request': (1, 3),
+}
+# Dati del motore di gioco su disco: fuori da MEDIA_ROOT, quindi non serviti da
+# nginx né da Django (i replay passano solo dalla view autenticata)
+GAME_DATA_DIR = os.environ.get('GAME_DATA_DIR', os.path.join(BASE_DIR, 'game_data'))
+# Replay deterministici delle partite (seed, input e keyframe in JSON Lines)
+GAME_REPLAY_RECORDING = os.environ.get('GAME_REPLAY_RECORDING', 'True') == 'True'
+GAME_REPLAY_DIR = os.environ.get('GAME_REPLAY_DIR', os.path.join(GAME_DATA_DIR, 'replays'))
+# Archivio colonnare (mmap, chunk compressi) costruito a fine partita per lo streaming dei replay
+GAME_REPLAY_COLUMNAR = os.environ.get('GAME_REPLAY_COLUMNAR', 'True') == 'True'
+# Snapshot al secondo per gli spettatori (flusso separato da quello dei giocatori)
+GAME_SPECTATOR_RATE = int(os.environ.get('GAME_SPECTATOR_RATE', 10))
+# Registro delle stanze fra worker ("redis" o "local"): ogni partita gira su un solo worker,
+# gli altri inoltrano le connessioni al proprietario tramite il channel layer
+GAME_ROOM_REGISTRY = os.environ.get('GAME_ROOM_REGISTRY', 'redis')
+GAME_ROOM_REGISTRY_URL = f"redis://{os.environ.get('REDIS_HOST', '127.0.0.1')}:{os.environ.get('REDIS_PORT', 6379)}/2"
+GAME_ROOM_LEASE_SECONDS = int(os.environ.get('GAME_ROOM_LEASE_SECONDS', 10))
+# Identificativo del worker (default: hostname-pid), usato anche come hint di routing
+GAME_WORKER_ID = os.environ.get('GAME_WORKER_ID') or None
+# Checkpoint delle stanze per la ripresa dopo un crash ("redis", "disk" o "" per disattivarli):
+# ogni GAME_CHECKPOINT_SECONDS e a ogni gol; un checkpoint non ripreso scade dopo GAME_CHECKPOINT_TTL
+GAME_CHECKPOINT_STORE = os.environ.get('GAME_CHECKPOINT_STORE', 'redis')
+GAME_CHECKPOINT_DIR = os.environ.get('GAME_CHECKPOINT_DIR', os.path.join(GAME_DATA_DIR, 'checkpoints'))
+GAME_CHECKPOINT_SECONDS = float(os.environ.get('GAME_CHECKPOINT_SECONDS', 1))
+GAME_CHECKPOINT_TTL = int(os.environ.get('GAME_CHECKPOINT_TTL', 300))
+# Drain del worker (SIGUSR1 o manage.py drain_worker): le partite in corso hanno
+# GAME_DRAIN_GRACE_SECONDS per finire, poi passano a un altro worker; con GAME_DRAIN_EXIT
+# il processo termina a drain completato
+GAME_DRAIN_GRACE_SECONDS = int(os.environ.get('GAME_DRAIN_GRACE_SECONDS', 20))
+GAME_DRAIN_TIMEOUT_SECONDS = int(os.environ.get('GAME_DRAIN_TIMEOUT_SECONDS', 120))
+GAME_DRAIN_EXIT = os.environ.get('GAME_DRAIN_EXIT', 'True') == 'True'
+# Scadenze delle stanze (timing wheel del worker): stanza senza avversario, conferma
+# "pronto" mancante e tempo concesso a un giocatore disconnesso per tornare in partita
+GAME_WAITING_TIMEOUT_SECONDS = int(os.environ.get('GAME_WAITING_TIMEOUT_SECONDS', 300))
+GAME_READY_TIMEOUT_SECONDS = int(os.environ.get('GAME_READY_TIMEOUT_SECONDS', 60))
+GAME_RECONNECT_GRACE_SECONDS = int(os.environ.get('GAME_RECONNECT_GRACE_SECONDS', 15))
+# Metriche del motore di gioco in formato Prometheus su /metrics (non esposto da nginx):
+# la richiesta deve avere "Authorization: Bearer <GAME_METRICS_TOKEN>"; senza token
+# l'endpoint risponde 404, a meno di GAME_METRICS_PUBLIC (accesso libero, solo in sviluppo)
+GAME_METRICS_TOKEN = os.environ.get('GAME_METRICS_TOKEN', '')
+GAME_METRICS_PUBLIC = os.environ.get('GAME_METRICS_PUBLIC', 'False') == 'True'
+# Watchdog dell'event loop: lag misurato ogni GAME_LOOP_WATCHDOG_INTERVAL_MS; oltre
+# GAME_LOOP_LAG_THRESHOLD_MS viene registrato lo stack del codice che blocca il loop
+GAME_LOOP_WATCHDOG = os.environ.get('GAME_LOOP_WATCHDOG', 'True') == 'True'
+GAME_LOOP_WATCHDOG_INTERVAL_MS = int(os.environ.get('GAME_LOOP_WATCHDOG_INTERVAL_MS', 50))
+GAME_LOOP_LAG_THRESHOLD_MS = int(os.environ.get('GAME_LOOP_LAG_THRESHOLD_MS', 100))
@@ -30,6 +30,12 @@ let playerRole = null;
  */
 let gameActive = false;
 
+/**
+ * @type {boolean}
+ * @description Whether we are watching the game as a read-only spectator (?spectate=1)
+ */
+let spectating = false;
+
 /**
  * @type {boolean}
  * @description Whether the player has indicated they are ready to play
@@ -40,10 +46,16 @@ let playerReady = false;
  * @typedef {Object} GameState
  * @property {number} ballX - X coordinate of the ball
  * @property {number} ballY - Y coordinate of the ball
+ * @property {number} [ballVX] - Ball X velocity in px/s (for extrapolation)
+ * @property {number} [ballVY] - Ball Y velocity in px/s (for extrapolation)
+ * @property {number} [tick] - Server simulation tick of the snapshot
+ * @property {number} [receivedAt] - performance.now() when the snapshot arrived
  * @property {number} paddle1Y - Y coordinate of player 1's paddle
  * @property {number} paddle2Y - Y coordinate of player 2's paddle
  * @property {number} player1Score - Score of player 1
  * @property {number} player2Score - Score of player 2
+ * @property {number} [player1Seq] - Last input of player 1 processed by the server
+ * @property {number} [player2Seq] - Last input of player 2 processed by the server
  */
 
 /**
@@ -65,6 +77,12 @@ let gameState = {
  */
 let connectionLost = false;
 
+/**
+ * @type {boolean}
+ * @description Set by a `migrate` message: the next close is a hand-off to another worker
+ */
+let migrating = false;
+
 /**
  * @type {Object.<string, boolean>}
  * @description Map of currently pressed keys
@@ -83,6 +101,91 @@ let lastUpdateTime = Date.now();
  */
 let myPaddleSide = null;
 
+/**
+ * @constant {number}
+ * @description Maximum time (seconds) the ball is extrapolated past the last snapshot
+ */
+const MAX_EXTRAPOLATION_S = 0.1;
+
+/**
+ * @constant {number}
+ * @description Ball radius in canvas pixels (0.02 of the 500px field height)
+ */
+const BALL_RADIUS_PX = 10;
+
+/**
+ * @type {Map<number, GameState>}
+ * @description Recent full snapshots by server tick, used as baselines for delta updates
+ */
+const snapshotHistory = new Map();
+
+/**
+ * @constant {number}
+ * @description Number of snapshots kept as possible delta baselines
+ */
+const SNAPSHOT_HISTORY_SIZE = 64;
+
+/**
+ * @type {number}
+ * @description performance.now() of the last snapshot acknowledgement sent
+ */
+let lastSnapshotAck = 0;
+
+/**
+ * @constant {string}
+ * @description WebSocket subprotocol for compact binary game frames
+ */
+const BINARY_FRAMES_SUBPROTOCOL = 'pong.bin.v2';
+
+/**
+ * @constant {number}
+ * @description Fixed-point scale of coordinates in binary frames (1/16 px)
+ */
+const BINARY_POSITION_SCALE = 16;
+
+/**
+ * @type {boolean}
+ * @description Whether to ask the server for binary frames (disabled after a failed handshake)
+ */
+let useBinaryFrames = true;
+
+/**
+ * @constant {number}
+ * @description Paddle speed in canvas px/s (server: 0.012 per 60 Hz frame of a 500px field)
+ */
+const PADDLE_SPEED_PX_S = 360;
+
+/**
+ * @constant {number}
+ * @description Lowest Y of the paddle top edge in canvas pixels (field height - paddle height)
+ */
+const PADDLE_MAX_Y = 400;
+
+/**
+ * @type {number}
+ * @description Sequence number of the last paddle input sent to the server
+ */
+let inputSeq = 0;
+
+/**
+ * @typedef {Object} PendingInput
+ * @property {number} seq - Sequence number sent with the input
+ * @property {number} movement - Paddle movement (-1 up, 0 stop, 1 down)
+ * @property {number} time - performance.now() when the input was sent
+ */
+
+/**
+ * @type {PendingInput[]}
+ * @description Inputs sent but not yet included in a server snapshot
+ */
+let pendingInputs = [];
+
+/**
+ * @type {number}
+ * @description Paddle movement of the last input the server has processed
+ */
+let acknowledgedMovement = 0;
+
 /**
  * Initializes the remote game functionality.
  * Loads required scripts, establishes connections, and sets up the game UI.
@@ -96,10 +199,11 @@ async function initializeGameRemote() {
 	
 	const urlParams = new URLSearchParams(window.location.search);
 	gameID = urlParams.get('game_id');
+	spectating = Boolean(gameID) && urlParams.get('spectate') === '1';
 	
 	if (!gameID)
 		await findOrCreateGameSession();
-	else
+	else if (!spectating)
 		await joinGameSession(gameID);
 	connectToGameWebSocket(gameID);
 	setupGameUI();
@@ -301,9 +405,16 @@ function connectToGameWebSocket(id) {
 	const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
 	const host = window.location.host;
 
-	gameSocket = new WebSocket(`${protocol}//${host}/ws/game/${id}/`);
+	const url = `${protocol}//${host}/ws/game/${id}/` + (spectating ? '?spectate=1' : '');
+	gameSocket = useBinaryFrames ? new WebSocket(url, [BINARY_FRAMES_SUBPROTOCOL]) : new WebSocket(url);
+	gameSocket.binaryType = 'arraybuffer';
+	// Una nuova connessione riparte sempre da un keyframe
+	snapshotHistory.clear();
+	resetPrediction();
+	let opened = false;
 	
 	gameSocket.onopen = function(e) {
+		opened = true;
 		connectionLost = false;
 		sendPing();
 		gameSocket.send(JSON.stringify({
@@ -319,13 +430,29 @@ function connectToGameWebSocket(id) {
 			return;
 		}
 		
-		const data = JSON.parse(e.data);
+		const data = e.data instanceof ArrayBuffer ? decodeBinaryFrame(e.data) : JSON.parse(e.data);
 		connectionLost = false;
-		handleWebSocketMessage(data);
+		if (data)
+			handleWebSocketMessage(data);
 	};
 	
 	gameSocket.onclose = function(e) {
 		connectionLost = true;
+
+		// Drain del server: riconnessione immediata al nuovo worker, senza abbandono
+		if (migrating) {
+			migrating = false;
+			connectToGameWebSocket(id);
+			gameID = id;
+			return;
+		}
+
+		// Handshake binario rifiutato: riprova con i frame JSON
+		if (!opened && useBinaryFrames) {
+			useBinaryFrames = false;
+			connectToGameWebSocket(id);
+			return;
+		}
 		
 		// Se la chiusura è intenzionale (codice 1000), non fare nulla
 		if (e.code === 1000) {
@@ -350,6 +477,35 @@ function connectToGameWebSocket(id) {
 	};
 }
 
+/**
+ * Decodes a binary snapshot frame (see backend/game/game_protocol.py).
+ * @function decodeBinaryFrame
+ * @param {ArrayBuffer} buffer - Frame received from the server
+ * @returns {Object|null} game_update message, or null for unknown frames
+ */
+function decodeBinaryFrame(buffer) {
+	const view = new DataView(buffer);
+	if (buffer.byteLength < 28 || view.getUint8(0) !== 1)
+		return null;
+
+	const scale = BINARY_POSITION_SCALE;
+	return {
+		type: 'game_update',
+		keyframe: (view.getUint8(1) & 0x01) !== 0,
+		tick: view.getUint32(2, true),
+		ballX: view.getInt16(6, true) / scale,
+		ballY: view.getInt16(8, true) / scale,
+		ballVX: view.getInt16(10, true) / scale,
+		ballVY: view.getInt16(12, true) / scale,
+		paddle1Y: view.getInt16(14, true) / scale,
+		paddle2Y: view.getInt16(16, true) / scale,
+		player1Score: view.getUint8(18),
+		player2Score: view.getUint8(19),
+		player1Seq: view.getUint32(20, true),
+		player2Seq: view.getUint32(24, true)
+	};
+}
+
 /**
  * Send ping to server to keep connection alive
  */
@@ -448,6 +604,20 @@ function handleWebSocketMessage(data) {
 		case 'pong':
 			console.log('Server pong received');
 			break;
+		case 'migrate':
+			// Il worker sta per fermarsi: la partita continua su `data.worker`, la
+			// riconnessione viene inoltrata lì da qualunque worker la riceva
+			migrating = true;
+			break;
+		case 'opponent_disconnected':
+			// Partita sospesa: l'avversario ha `data.grace` secondi per tornare
+			showInfoToast(`L'avversario si è disconnesso. Attesa della riconnessione (${data.grace}s)...`);
+			break;
+		case 'room_expired':
+			// Stanza chiusa dal server per inattività (attesa o conferma "pronto")
+			gameActive = false;
+			showWarningToast('La stanza è scaduta per inattività');
+			break;
 		default:
 			console.log('Unknown message type:', data.type);
 	}
@@ -462,9 +632,13 @@ function handleGameStart(data) {
 	safelyUpdateElement('player1Name', data.player1_name);
 	safelyUpdateElement('player2Name', data.player2_name);
 	
-	// Reset scores
-	safelyUpdateElement('player1Score', '0');
-	safelyUpdateElement('player2Score', '0');
+	// Reset scores (una partita ripresa dopo un crash mantiene il punteggio del checkpoint)
+	if (data.resumed) {
+		showInfoToast('Partita ripresa dall\'ultimo salvataggio');
+	} else {
+		safelyUpdateElement('player1Score', '0');
+		safelyUpdateElement('player2Score', '0');
+	}
 	
 	// Hide ready overlay and update game container
 	const readyOverlay = document.getElementById('readyOverlay');
@@ -504,11 +678,80 @@ function handlePlayerJoined(data) {
 	}
 }
 
+/**
+ * Rebuilds a full snapshot from a keyframe or a delta frame.
+ * Delta frames only carry the fields that changed since `baseline`, a tick
+ * we acknowledged earlier; if that baseline is unknown a resync is requested.
+ * @function resolveSnapshot
+ * @param {Object} data - game_update frame from the server
+ * @returns {GameState|null} Full snapshot, or null if it cannot be rebuilt
+ */
+function resolveSnapshot(data) {
+	// Letto prima di rimuovere il campo: per un keyframe snapshot === data
+	const keyframe = data.keyframe === true;
+	let snapshot = data;
+	if (data.baseline !== undefined) {
+		const base = snapshotHistory.get(data.baseline);
+		if (!base) {
+			requestResync();
+			return null;
+		}
+		snapshot = { ...base, ...data };
+		delete snapshot.baseline;
+	}
+	delete snapshot.keyframe;
+
+	if (snapshot.tick !== undefined) {
+		snapshotHistory.set(snapshot.tick, snapshot);
+		if (snapshotHistory.size > SNAPSHOT_HISTORY_SIZE)
+			snapshotHistory.delete(snapshotHistory.keys().next().value);
+		acknowledgeSnapshot(snapshot.tick, keyframe);
+	}
+	return snapshot;
+}
+
+/**
+ * Acknowledges a snapshot so the server can use it as delta baseline.
+ * Keyframes are acknowledged immediately, deltas at most every 100 ms.
+ * @function acknowledgeSnapshot
+ * @param {number} tick - Server tick of the snapshot
+ * @param {boolean} immediate - Whether to bypass the ack throttling
+ * @returns {void}
+ */
+function acknowledgeSnapshot(tick, immediate) {
+	// I frame binari sono sempre completi e gli spettatori ricevono i delta
+	// rispetto al frame precedente: nessun baseline da confermare
+	if (spectating || (gameSocket && gameSocket.protocol === BINARY_FRAMES_SUBPROTOCOL))
+		return;
+	const now = performance.now();
+	if (!immediate && now - lastSnapshotAck < 100)
+		return;
+	if (gameSocket && gameSocket.readyState === WebSocket.OPEN) {
+		gameSocket.send(JSON.stringify({ type: 'snapshot_ack', tick: tick }));
+		lastSnapshotAck = now;
+	}
+}
+
+/**
+ * Asks the server for a full keyframe after losing the delta baseline.
+ * @function requestResync
+ * @returns {void}
+ */
+function requestResync() {
+	snapshotHistory.clear();
+	if (gameSocket && gameSocket.readyState === WebSocket.OPEN)
+		gameSocket.send(JSON.stringify({ type: 'resync_request' }));
+}
+
 /**
  * Handle game update event (ball and paddle positions)
- * @param {Object} data - The game update data
+ * @param {Object} frame - The game update frame (keyframe or delta)
  */
-function handleGameUpdate(data) {
+function handleGameUpdate(frame) {
+	const data = resolveSnapshot(frame);
+	if (!data)
+		return;
+
 	// Salva lo stato per poterlo riprodurre in caso di perdita di pacchetti
 	
 	// Conserva i dati di interpolazione
@@ -518,6 +761,10 @@ function handleGameUpdate(data) {
 		data.prevPaddle2Y = gameState.paddle2Y;
 		data.updateTime = Date.now();
 		lastUpdateTime = Date.now();
+
+		// Scarta snapshot arrivati fuori ordine
+		if (gameState.tick !== undefined && data.tick !== undefined && data.tick < gameState.tick)
+			return;
 	} else {
 		// Se è il primo aggiornamento, non c'è interpolazione
 		data.prevPaddle1Y = data.paddle1Y;
@@ -525,6 +772,8 @@ function handleGameUpdate(data) {
 		data.updateTime = Date.now();
 		lastUpdateTime = Date.now();
 	}
+	data.receivedAt = performance.now();
+	reconcileInputs(data);
 	
 	gameState = data;
 	
@@ -541,30 +790,119 @@ function handleGameUpdate(data) {
  */
 function renderGame() {
 	if (gameState) {
-		// Disegna lo stato corrente
-		updateGameState(gameState);
+		// Disegna lo stato corrente, estrapolato fino all'istante attuale
+		updateGameState(predictOwnPaddle(extrapolateState(gameState)));
 	}
 	// Continua l'animazione
 	window.animationFrameId = requestAnimationFrame(renderGame);
 }
 
 /**
- * Updates and renders the game state.
+ * Extrapolates the ball from the last server snapshot using its velocity.
+ * The server broadcasts at a lower rate than it simulates, so between two
+ * snapshots the ball keeps moving along its last known velocity.
+ * @function extrapolateState
+ * @param {GameState} state - Last snapshot received from the server
+ * @returns {GameState} State to render at the current frame
+ */
+function extrapolateState(state) {
+	if (state.ballVX === undefined || state.receivedAt === undefined)
+		return state;
+
+	const elapsed = Math.min((performance.now() - state.receivedAt) / 1000, MAX_EXTRAPOLATION_S);
+	const ballX = state.ballX + state.ballVX * elapsed;
+	let ballY = state.ballY + state.ballVY * elapsed;
+
+	// Rimbalzo sui bordi superiore e inferiore
+	const canvasHeight = 500;
+	if (ballY < BALL_RADIUS_PX)
+		ballY = 2 * BALL_RADIUS_PX - ballY;
+	else if (ballY > canvasHeight - BALL_RADIUS_PX)
+		ballY = 2 * (canvasHeight - BALL_RADIUS_PX) - ballY;
+
+	return { ...state, ballX, ballY };
+}
+
+/**
+ * Drops the inputs already included in a server snapshot.
+ * @function reconcileInputs
+ * @param {GameState} snapshot - Snapshot just received from the server
+ * @returns {void}
+ */
+function reconcileInputs(snapshot) {
+	const ack = myPaddleSide === 'left' ? snapshot.player1Seq : snapshot.player2Seq;
+	if (ack === undefined)
+		return;
+	while (pendingInputs.length > 0 && pendingInputs[0].seq <= ack)
+		acknowledgedMovement = pendingInputs.shift().movement;
+}
+
+/**
+ * Predicts our own paddle from the last snapshot plus the inputs the server
+ * has not processed yet, so the paddle reacts without waiting a round trip.
+ * @function predictOwnPaddle
+ * @param {GameState} state - State to render
+ * @returns {GameState} State with our paddle at its predicted position
+ */
+function predictOwnPaddle(state) {
+	if (!myPaddleSide || state.receivedAt === undefined)
+		return state;
+
+	const key = myPaddleSide === 'left' ? 'paddle1Y' : 'paddle2Y';
+	const advance = (y, movement, ms) =>
+		Math.max(0, Math.min(PADDLE_MAX_Y, y + movement * PADDLE_SPEED_PX_S * ms / 1000));
+
+	// Riapplica gli input non ancora confermati, ciascuno dal momento dell'invio
+	let y = state[key];
+	let movement = acknowledgedMovement;
+	let from = state.receivedAt;
+	for (const input of pendingInputs) {
+		const at = Math.max(from, input.time);
+		y = advance(y, movement, at - from);
+		movement = input.movement;
+		from = at;
+	}
+	y = advance(y, movement, performance.now() - from);
+
+	return { ...state, [key]: y };
+}
+
+/**
+ * Forgets predicted inputs (new connection or new game).
+ * @function resetPrediction
+ * @returns {void}
+ */
+function resetPrediction() {
+	pendingInputs = [];
+	acknowledgedMovement = 0;
+}
+
+/**
+ * Sends a paddle input with a sequence number and keeps it for prediction.
+ * @function sendPaddleInput
+ * @param {('up'|'down')} direction - Movement direction
+ * @param {('start'|'stop')} action - Whether the key was pressed or released
+ * @returns {void}
+ */
+function sendPaddleInput(direction, action) {
+	const seq = ++inputSeq;
+	const movement = action === 'stop' ? 0 : (direction === 'up' ? -1 : 1);
+	pendingInputs.push({ seq: seq, movement: movement, time: performance.now() });
+	gameSocket.send(JSON.stringify({
+		type: 'paddle_move',
+		direction: direction,
+		action: action,
+		seq: seq
+	}));
+}
+
+/**
+ * Renders the given game state.
  * @function updateGameState
- * @param {GameState} data - New game state data
+ * @param {GameState} data - Game state to draw
  * @returns {void}
  */
 function updateGameState(data) {
-	// Aggiorna direttamente lo stato con i dati del server
-	gameState = {
-		ballX: data.ballX,
-		ballY: data.ballY,
-		paddle1Y: data.paddle1Y,
-		paddle2Y: data.paddle2Y,
-		player1Score: data.player1Score,
-		player2Score: data.player2Score
-	};
-
 	const canvas = document.getElementById('gameCanvas');
 	if (!canvas) return;
 	
@@ -635,6 +973,13 @@ function updateGameState(data) {
  * @param {Object} data - The event data
  */
 function handleRoleAssignment(data) {
+	// Gli spettatori non controllano alcun paddle: solo rendering dello stream
+	if (data.role === 'spectator') {
+		myPaddleSide = null;
+		gameActive = true;
+		startGame();
+		return;
+	}
 	// Imposta il lato del paddle che controllo
 	myPaddleSide = data.role;
 	console.log(`Assegnato ruolo: ${myPaddleSide}`);
@@ -784,7 +1129,7 @@ function setupGameUI() {
  * @returns {void}
  */
 function handleKeyDown(event) {
-	if (!gameSocket || gameSocket.readyState !== WebSocket.OPEN || !gameActive) return;
+	if (!gameSocket || gameSocket.readyState !== WebSocket.OPEN || !gameActive || spectating) return;
 	
 	let direction = null;
 	
@@ -800,11 +1145,7 @@ function handleKeyDown(event) {
 	
 	if (direction) {
 		// Invia immediatamente il comando al server
-		gameSocket.send(JSON.stringify({
-			type: 'paddle_move',
-			direction: direction,
-			action: 'start'
-		}));
+		sendPaddleInput(direction, 'start');
 	}
 }
 
@@ -815,7 +1156,7 @@ function handleKeyDown(event) {
  * @returns {void}
  */
 function handleKeyUp(event) {
-	if (!gameSocket || gameSocket.readyState !== WebSocket.OPEN || !gameActive) return;
+	if (!gameSocket || gameSocket.readyState !== WebSocket.OPEN || !gameActive || spectating) return;
 	
 	let direction = null;
 	
@@ -831,11 +1172,7 @@ function handleKeyUp(event) {
 	
 	if (direction) {
 		// Invia immediatamente il comando al server
-		gameSocket.send(JSON.stringify({
-			type: 'paddle_move',
-			direction: direction,
-			action: 'stop'
-		}));
+		sendPaddleInput(direction, 'stop');
 	}
 }
 
@@ -868,6 +1205,7 @@ function startGame() {
 		player1Score: 0,
 		player2Score: 0
 	};
+	resetPrediction();
 	
 	// Avvia il loop di rendering
 	if (!window.animationFrameId) {